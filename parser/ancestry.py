@@ -0,0 +1,134 @@
+from collections import deque
+
+
+class AncestryIndex:
+    """
+    类继承关系的索引，每个图只建立一次
+
+    所有类（包括只作为父类出现的外部类，如torch.nn.Module）都被分配一个整数id，
+    id按class_info_dict的顺序分配，外部类排在最后。父类、子类邻接表都以id存储，
+    查询结果的顺序与class_info_dict中children_classes的顺序一致。
+
+    - descendants: 从任意一组根类出发的多源BFS，时间与输出规模成线性关系；
+    - ancestors: 沿父类邻接表的BFS，结果按id缓存；
+    - is_subclass: 查询缓存后的祖先集合，近似常数时间。
+    """
+
+    def __init__(self, class_info_dict):
+        self.names: list[str] = list(class_info_dict)
+        self.ids: dict[str, int] = {name: index for index, name in enumerate(self.names)}
+        self.parent_ids: list[list[int]] = []
+        for class_info in class_info_dict.values():
+            parent_ids = []
+            for parent_class in class_info.parent_classes:
+                parent_ids.append(self.add_name(parent_class))
+            self.parent_ids.append(parent_ids)
+        # 外部类没有父类
+        self.parent_ids.extend([] for _ in range(len(self.names) - len(self.parent_ids)))
+
+        self.child_ids: list[list[int]] = [[] for _ in self.names]
+        for class_id, parent_ids in enumerate(self.parent_ids):
+            for parent_id in parent_ids:
+                self.child_ids[parent_id].append(class_id)
+
+        self.ancestor_id_sets: dict[int, frozenset[int]] = {}
+
+    def add_name(self, name):
+        class_id = self.ids.get(name)
+        if class_id is None:
+            class_id = len(self.names)
+            self.ids[name] = class_id
+            self.names.append(name)
+        return class_id
+
+    def descendant_ids(self, root_ids):
+        """
+        找到一组根类的所有后代（不包括根类自身，除非它也是其它根类的后代）
+
+        直接继承根类的类按id顺序作为BFS的起点，已访问的类不会重复访问。
+
+        Args:
+            root_ids: Iterable[int], 根类id
+
+        Returns:
+            list[int]: 后代类id，按发现顺序排列
+        """
+        source_ids = sorted({child_id for root_id in root_ids for child_id in self.child_ids[root_id]})
+        visited = set()
+        descendant_ids = []
+        for source_id in source_ids:
+            if source_id in visited:
+                continue
+            visited.add(source_id)
+            descendant_ids.append(source_id)
+            queue = deque([source_id])
+            while queue:
+                current_id = queue.popleft()
+                for child_id in self.child_ids[current_id]:
+                    if child_id not in visited:
+                        visited.add(child_id)
+                        descendant_ids.append(child_id)
+                        queue.append(child_id)
+        return descendant_ids
+
+    def ancestor_id_set(self, class_id):
+        """
+        找到一个类的所有祖先，结果会被缓存
+
+        Args:
+            class_id: int, 类id
+
+        Returns:
+            frozenset[int]: 祖先类id
+        """
+        ancestor_id_set = self.ancestor_id_sets.get(class_id)
+        if ancestor_id_set is None:
+            visited = set()
+            queue = deque(self.parent_ids[class_id])
+            while queue:
+                current_id = queue.popleft()
+                if current_id in visited:
+                    continue
+                visited.add(current_id)
+                queue.extend(self.parent_ids[current_id])
+            ancestor_id_set = frozenset(visited)
+            self.ancestor_id_sets[class_id] = ancestor_id_set
+        return ancestor_id_set
+
+    def descendants(self, root_names):
+        """
+        Args:
+            root_names: Iterable[str], 根类的完整名称，不在图中的名称会被忽略
+
+        Returns:
+            list[str]: 所有后代类的名称
+        """
+        root_ids = [self.ids[name] for name in root_names if name in self.ids]
+        return [self.names[class_id] for class_id in self.descendant_ids(root_ids)]
+
+    def ancestors(self, class_name):
+        """
+        Args:
+            class_name: str, 类的完整名称
+
+        Returns:
+            list[str]: 所有祖先类的名称，按id排序；类不在图中时返回空列表
+        """
+        if class_name not in self.ids:
+            return []
+        return [self.names[class_id] for class_id in sorted(self.ancestor_id_set(self.ids[class_name]))]
+
+    def is_subclass(self, class_name, base_name):
+        """
+        判断class_name是否（直接或间接）继承自base_name，类不被视为自身的子类
+
+        Args:
+            class_name: str, 类的完整名称
+            base_name: str, 父类的完整名称
+
+        Returns:
+            bool
+        """
+        if class_name not in self.ids or base_name not in self.ids:
+            return False
+        return self.ids[base_name] in self.ancestor_id_set(self.ids[class_name])
@@ -0,0 +1,250 @@
+import gc
+import os
+from collections import OrderedDict
+
+from astroid.manager import AstroidManager
+
+
+class BoundedAstroidCache(dict):
+    """
+    替换astroid全局MANAGER的模块缓存（MANAGER.astroid_cache），由解析器决定缓存策略
+
+    - builtins以及其它不是由源文件构建的模块（包括安装时已在缓存中的模块）常驻，不会被淘汰；
+    - 外部模块（torch、torchvision等跨仓库共享的模块）放入LRU，调用trim时淘汰最久未使用的，直到不超过max_external_modules；
+      推断过程中模块之间互相引用，因此只在两个文件之间（调用trim时）淘汰，不在写入缓存时淘汰；
+    - 当前仓库内的模块在finish_repo时全部释放，同时清空astroid中引用这些AST节点的推断缓存。
+
+    命中率按astroid查询缓存的次数统计（modname in astroid_cache）。
+    多进程模式下子进程各自拥有缓存，统计只覆盖当前进程。
+    """
+
+    def __init__(self, entries, max_external_modules=512):
+        super().__init__(entries)
+        self.pinned_names = set(entries)
+        self.max_external_modules = max_external_modules
+        self.external_names: OrderedDict[str, None] = OrderedDict()
+        self.local_names: set[str] = set()
+        self.repo_path = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rss_before = 0
+
+    @classmethod
+    def install(cls, max_external_modules=512):
+        """
+        用BoundedAstroidCache替换astroid的全局模块缓存
+
+        Args:
+            max_external_modules: int, LRU中外部模块的数量上限
+
+        Returns:
+            BoundedAstroidCache: 已安装的缓存
+        """
+        from astroid import MANAGER
+
+        cache = cls(MANAGER.astroid_cache, max_external_modules=max_external_modules)
+        # 新创建的AstroidManager从brain中取得共享的模块缓存，brain不是字典的版本中只替换全局MANAGER的缓存
+        brain = getattr(AstroidManager, "brain", None)
+        if isinstance(brain, dict):
+            brain["astroid_cache"] = cache
+        MANAGER.astroid_cache = cache
+        return cache
+
+    def __contains__(self, modname):
+        found = super().__contains__(modname)
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def __getitem__(self, modname):
+        module = super().__getitem__(modname)
+        if modname in self.external_names:
+            self.external_names.move_to_end(modname)
+        return module
+
+    def __setitem__(self, modname, module):
+        super().__setitem__(modname, module)
+        self.track(modname, module)
+
+    def __delitem__(self, modname):
+        super().__delitem__(modname)
+        self.external_names.pop(modname, None)
+        self.local_names.discard(modname)
+
+    def pop(self, modname, *default):
+        # dict.pop不会调用__delitem__
+        if super().__contains__(modname):
+            module = super().__getitem__(modname)
+            del self[modname]
+            return module
+        return super().pop(modname, *default)
+
+    def setdefault(self, modname, module=None):
+        # astroid通过setdefault写入缓存，dict.setdefault不会调用__setitem__
+        if not super().__contains__(modname):
+            self[modname] = module
+        return super().__getitem__(modname)
+
+    def clear(self):
+        super().clear()
+        self.external_names.clear()
+        self.local_names.clear()
+
+    def track(self, modname, module):
+        module_file = getattr(module, "file", None)
+        if modname in self.pinned_names or module_file is None or not os.path.isfile(module_file):
+            self.pinned_names.add(modname)
+            return
+        if self.repo_path is not None and os.path.abspath(module_file).startswith(self.repo_path):
+            self.local_names.add(modname)
+            return
+        self.external_names[modname] = None
+        self.external_names.move_to_end(modname)
+
+    def trim(self):
+        """
+        淘汰最久未使用的外部模块，直到外部模块数量不超过max_external_modules
+        """
+        while len(self.external_names) > self.max_external_modules:
+            evicted_name, _ = self.external_names.popitem(last=False)
+            super().__delitem__(evicted_name)
+            self.evictions += 1
+
+    def begin_repo(self, repo_path):
+        """
+        开始解析一个仓库，此后文件位于repo_path下的模块视为仓库本地模块
+
+        Args:
+            repo_path: str, 仓库根路径
+        """
+        self.repo_path = os.path.join(os.path.abspath(repo_path), "")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rss_before = get_rss()
+
+    def finish_repo(self):
+        """
+        仓库解析完成，释放仓库本地模块的AST
+
+        Returns:
+            dict: 本仓库的缓存统计，包括命中率、淘汰与释放的模块数量以及前后的RSS（字节）
+        """
+        self.trim()
+        released_modules = len(self.local_names)
+        for modname in list(self.local_names):
+            super().__delitem__(modname)
+        self.local_names.clear()
+        self.repo_path = None
+        clear_inference_caches()
+        gc.collect()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "released_modules": released_modules,
+            "cached_modules": len(self),
+            "rss_before": self.rss_before,
+            "rss_after": get_rss(),
+        }
+
+
+def get_rss():
+    """
+    Returns:
+        int: 当前进程的RSS（字节），psutil只在使用BoundedAstroidCache时导入
+    """
+    import psutil
+
+    return psutil.Process().memory_info().rss
+
+
+def get_inference_cache_clearers():
+    """
+    查找astroid中以AST节点为key的推断缓存的清空函数，它们是astroid的内部实现
+
+    Returns:
+        list[Callable]: 清空函数，当前的astroid版本中缺少其中任意一个时返回None
+    """
+    try:
+        from astroid.context import _invalidate_cache
+        from astroid.inference_tip import clear_inference_tip_cache
+        from astroid.interpreter.objectmodel import ObjectModel
+        from astroid.nodes._base_nodes import LookupMixIn
+        from astroid.nodes.scoped_nodes import ClassDef
+
+        return [
+            clear_inference_tip_cache,
+            _invalidate_cache,
+            LookupMixIn.lookup.cache_clear,
+            ObjectModel.attributes.cache_clear,
+            ClassDef._metaclass_lookup_attribute.cache_clear,
+        ]
+    except (ImportError, AttributeError):
+        return None
+
+
+def get_module_path_cache_clearers():
+    """
+    查找astroid中模块路径查找缓存的清空函数，它们是astroid的内部实现
+
+    Returns:
+        list[Callable]: 清空函数，当前的astroid版本中缺少其中任意一个时返回None
+    """
+    from astroid import MANAGER
+
+    try:
+        from astroid.interpreter._import.spec import _find_spec
+        from astroid.modutils import _has_init, cached_os_path_isfile
+
+        return [
+            MANAGER._mod_file_cache.clear,
+            _find_spec.cache_clear,
+            _has_init.cache_clear,
+            cached_os_path_isfile.cache_clear,
+        ]
+    except (ImportError, AttributeError):
+        return None
+
+
+def clear_inference_caches():
+    """
+    清空astroid中以AST节点为key的推断缓存，否则已释放的模块仍会被这些缓存引用
+
+    astroid的内部实现改变、找不到这些缓存时，改用公开的MANAGER.clear_cache清空astroid的全部缓存（包括模块缓存）。
+    """
+    clearers = get_inference_cache_clearers()
+    if clearers is None:
+        from astroid import MANAGER
+
+        MANAGER.clear_cache()
+        return
+    for clear in clearers:
+        clear()
+
+
+def invalidate_modules(modnames, file_set_changed=False):
+    """
+    从astroid的全局缓存中移除源文件已改变的模块，并清空推断缓存
+
+    Args:
+        modnames: Iterable[str], 模块名
+        file_set_changed: bool, 是否有新增或删除的文件，为True时同时清空astroid的模块路径查找缓存
+    """
+    from astroid import MANAGER
+
+    for modname in modnames:
+        MANAGER.astroid_cache.pop(modname, None)
+    clear_inference_caches()
+    if file_set_changed:
+        clearers = get_module_path_cache_clearers()
+        if clearers is None:
+            MANAGER.clear_cache()
+            return
+        for clear in clearers:
+            clear()
@@ -0,0 +1,340 @@
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from parse import Class_Inheritance_Graph, PARSER_VERSION
+from profiler import PhaseProfiler
+
+# 基准结果文件格式版本，指标的含义改变时需要升级，旧的基准不再参与比较
+BENCHMARK_FORMAT_VERSION = 1
+
+# 合成仓库的参数
+SYNTHETIC_CASES = {
+    "small": dict(num_files=50, classes_per_file=4, inheritance_depth=3, import_fan_out=2, relative_import_level=1),
+    "medium": dict(num_files=400, classes_per_file=5, inheritance_depth=4, import_fan_out=3, relative_import_level=1),
+    "deep": dict(num_files=150, classes_per_file=5, inheritance_depth=12, import_fan_out=3, relative_import_level=2),
+    "fan_out": dict(num_files=150, classes_per_file=3, inheritance_depth=3, import_fan_out=12, relative_import_level=3),
+}
+
+# 仿照真实仓库结构的固定仓库，位于benchmark_fixtures目录
+FIXTURE_CASES = ("resnet", "transformer")
+FIXTURE_DIRPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+# 合成仓库默认生成在解析器目录下，与test_cases一样，仓库中的模块能够按完整名称解析
+WORK_DIRPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_repos")
+
+# 参与回归比较的指标，值为True表示越大越好
+REGRESSION_METRICS = {
+    "build_seconds": False,
+    "find_nn_modules_seconds": False,
+    "convert_to_dict_seconds": False,
+    "files_per_second": True,
+    "classes_per_second": True,
+    "peak_rss": False,
+    "output_bytes": False,
+}
+
+# 合成仓库目录中的标记文件，只有带有它的目录才会被清空重新生成
+SYNTHETIC_MARKER = ".synthetic_repo"
+# 合成仓库的顶层包名，以及每个子包中的文件数
+SYNTHETIC_PACKAGE = "synth"
+FILES_PER_PACKAGE = 16
+
+
+def generate_synthetic_repo(
+    repo_path,
+    num_files=200,
+    classes_per_file=5,
+    inheritance_depth=4,
+    import_fan_out=3,
+    relative_import_level=1,
+    seed=0,
+):
+    """
+    生成确定性的合成仓库，相同的参数总是生成相同的文件
+
+    文件位于synth/g<组号>/l1/.../l<relative_import_level - 1>/mod<i>.py，每组FILES_PER_PACKAGE个文件。
+    第i个文件从之前的import_fan_out个文件各导入一个类，同一子包内用from .mod<j>导入，
+    其余随机使用绝对导入或上溯relative_import_level + 1层的相对导入。
+    每个类继承一个导入的类或同一文件中之前定义的类（一半继承其中层数最深的类），继承链的长度不超过inheritance_depth，
+    继承链的根类继承torch.nn.Module或不继承任何类。
+
+    Args:
+        repo_path: str, 仓库路径，已存在时必须是之前生成的合成仓库
+        num_files: int, 文件数
+        classes_per_file: int, 每个文件中的类数
+        inheritance_depth: int, 继承链的最大长度
+        import_fan_out: int, 每个文件导入的其它文件数
+        relative_import_level: int, 文件所在子包相对顶层包的层数，即相对导入上溯的层数减一
+        seed: int, 随机数种子
+
+    Returns:
+        dict: 生成的文件数和类数
+    """
+    if os.path.exists(repo_path):
+        if os.listdir(repo_path) and not os.path.exists(os.path.join(repo_path, SYNTHETIC_MARKER)):
+            raise ValueError(f"{repo_path} 不是合成仓库，不能覆盖")
+        shutil.rmtree(repo_path)
+    os.makedirs(repo_path)
+    rng = random.Random(seed)
+
+    def get_package_parts(index):
+        return [SYNTHETIC_PACKAGE] + (
+            [f"g{index // FILES_PER_PACKAGE}"] + [f"l{level}" for level in range(1, relative_import_level)]
+            if relative_import_level > 0
+            else []
+        )
+
+    # 每个文件中的类，(类名, 继承链中的层数)
+    file_classes = []
+    num_classes = 0
+    for index in range(num_files):
+        package_parts = get_package_parts(index)
+        import_lines = []
+        # 可以继承的类，(类名, 层数)
+        candidates = []
+        for target in sorted(rng.sample(range(index), min(import_fan_out, index))):
+            class_name, level = max(file_classes[target], key=lambda item: item[1])
+            target_parts = get_package_parts(target)
+            if target_parts == package_parts:
+                import_lines.append(f"from .mod{target} import {class_name}")
+            elif rng.random() < 0.5:
+                import_lines.append(f"from {'.'.join(target_parts)}.mod{target} import {class_name}")
+            else:
+                relative_module = ".".join(target_parts[1:] + [f"mod{target}"])
+                import_lines.append(f"from {'.' * (len(package_parts))}{relative_module} import {class_name}")
+            candidates.append((class_name, level))
+
+        classes = []
+        class_lines = []
+        for class_index in range(classes_per_file):
+            class_name = f"Module{index}x{class_index}"
+            parents = [candidate for candidate in candidates if candidate[1] < inheritance_depth]
+            if parents and rng.random() < 0.8:
+                if rng.random() < 0.5:
+                    # 一半的类继承层数最深的类，使继承链能够达到inheritance_depth
+                    max_level = max(level for _, level in parents)
+                    parents = [parent for parent in parents if parent[1] == max_level]
+                base, level = rng.choice(parents)
+                level += 1
+            else:
+                base, level = ("nn.Module" if rng.random() < 0.7 else ""), 1
+            classes.append((class_name, level))
+            candidates.append((class_name, level))
+            class_lines.append(
+                f"class {class_name}{f'({base})' if base else ''}:\n"
+                f"    def __init__(self, dim={class_index + 1}):\n"
+                f"        super().__init__()\n"
+                f"        self.dim = dim\n"
+                f"        self.scale = {rng.random():.4f}\n"
+                f"\n"
+                f"    def forward(self, x):\n"
+                f"        return x * self.scale + self.dim\n"
+            )
+        file_classes.append(classes)
+        num_classes += len(classes)
+
+        package_dirpath = os.path.join(repo_path, *package_parts)
+        os.makedirs(package_dirpath, exist_ok=True)
+        for depth in range(1, len(package_parts) + 1):
+            init_path = os.path.join(repo_path, *package_parts[:depth], "__init__.py")
+            if not os.path.exists(init_path):
+                open(init_path, "w").close()
+        with open(os.path.join(package_dirpath, f"mod{index}.py"), "w", encoding="utf-8") as f:
+            f.write("import torch.nn as nn\n")
+            f.write("".join(f"{line}\n" for line in import_lines))
+            f.write("\n\n" + "\n\n".join(class_lines))
+
+    with open(os.path.join(repo_path, SYNTHETIC_MARKER), "w", encoding="utf-8") as f:
+        json.dump(
+            dict(
+                num_files=num_files,
+                classes_per_file=classes_per_file,
+                inheritance_depth=inheritance_depth,
+                import_fan_out=import_fan_out,
+                relative_import_level=relative_import_level,
+                seed=seed,
+            ),
+            f,
+        )
+    return {"files": num_files, "classes": num_classes}
+
+
+def measure_case(repo_path, fast=False, workers=1):
+    """
+    在当前进程中构建一次类继承图，测量build_class_inheritance_graph、find_nn_modules和convert_to_dict
+
+    Returns:
+        dict: 文件数、类数、nn模块数、各阶段耗时（秒）、吞吐量、峰值RSS（字节）和JSON输出大小（字节）
+    """
+    profiler = PhaseProfiler(slowest=0)
+    with profiler:
+        graph = Class_Inheritance_Graph(repo_path, workers=workers, fast=fast, profiler=profiler)
+        with profiler.phase("convert_to_dict"):
+            graph_dict = graph.convert_to_dict()
+        output = json.dumps(graph_dict, indent=4)
+    report = profiler.report()
+    phases = report["phases"]
+    build_seconds = phases["build"]["seconds"]
+    return {
+        "files": len(graph.py_files),
+        "classes": len(graph.class_info_dict),
+        "nn_modules": len(graph.nn_moudles_subclass),
+        "failures": len(report["failures"]),
+        "build_seconds": build_seconds,
+        "find_nn_modules_seconds": phases["nn_modules"]["seconds"],
+        "convert_to_dict_seconds": phases["convert_to_dict"]["seconds"],
+        "files_per_second": len(graph.py_files) / build_seconds,
+        "classes_per_second": len(graph.class_info_dict) / build_seconds,
+        "peak_rss": report["peak_rss"],
+        "output_bytes": len(output.encode("utf-8")),
+    }
+
+
+def run_case(repo_path, repeat=3, fast=False, workers=1):
+    """
+    重复测量repeat次，每次在新的进程中进行，避免astroid缓存和已分配的内存影响后续测量
+
+    Returns:
+        dict: 各指标的中位数
+    """
+    measurements = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            measurements.append(executor.submit(measure_case, repo_path, fast, workers).result())
+    return {
+        name: statistics.median(measurement[name] for measurement in measurements)
+        if name in REGRESSION_METRICS
+        else measurements[0][name]
+        for name in measurements[0]
+    }
+
+
+def compare_results(results, baseline, threshold=0.2, min_seconds=0.005):
+    """
+    与基准结果比较，找出变差超过threshold的指标
+
+    两者都小于min_seconds的耗时指标波动过大，不参与比较；基准中没有的用例不参与比较。
+
+    Args:
+        results: dict, run_benchmark的结果
+        baseline: dict, 之前保存的run_benchmark的结果
+        threshold: float, 允许变差的比例，0.2表示耗时、内存和输出大小最多增加20%，吞吐量最多降低20%
+        min_seconds: float, 参与比较的耗时指标的下限（秒）
+
+    Returns:
+        list[dict]: 变差的指标，包括用例、指标、基准值、当前值和变化比例
+    """
+    regressions = []
+    for case_name, metrics in results["cases"].items():
+        baseline_metrics = baseline["cases"].get(case_name)
+        if baseline_metrics is None:
+            continue
+        for metric_name, higher_is_better in REGRESSION_METRICS.items():
+            current, previous = metrics[metric_name], baseline_metrics.get(metric_name)
+            if not previous:
+                continue
+            if metric_name.endswith("_seconds") and max(current, previous) < min_seconds:
+                continue
+            change = (current - previous) / previous
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(
+                    {"case": case_name, "metric": metric_name, "baseline": previous, "current": current, "change": change}
+                )
+    return regressions
+
+
+def run_benchmark(case_names, work_dirpath, repeat=3, fast=False, workers=1):
+    """
+    运行一组用例，合成仓库生成到work_dirpath中
+
+    Returns:
+        dict: 结果，cases为用例名称到run_case结果的映射，同时记录运行环境和选项
+    """
+    results = {
+        "version": BENCHMARK_FORMAT_VERSION,
+        "parser_version": PARSER_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"repeat": repeat, "fast": fast, "workers": workers},
+        "cases": {},
+    }
+    for case_name in case_names:
+        if case_name in SYNTHETIC_CASES:
+            repo_path = os.path.join(work_dirpath, case_name)
+            generate_synthetic_repo(repo_path, **SYNTHETIC_CASES[case_name])
+        else:
+            repo_path = os.path.join(FIXTURE_DIRPATH, case_name)
+        results["cases"][case_name] = run_case(repo_path, repeat=repeat, fast=fast, workers=workers)
+        print_case(case_name, results["cases"][case_name])
+    return results
+
+
+def print_case(case_name, metrics):
+    print(
+        f"{case_name}: {metrics['files']} 个文件, {metrics['classes']} 个类, {metrics['nn_modules']} 个nn模块, "
+        f"构建 {metrics['build_seconds']:.3f}s ({metrics['files_per_second']:.1f} 文件/s, "
+        f"{metrics['classes_per_second']:.1f} 类/s), "
+        f"find_nn_modules {metrics['find_nn_modules_seconds'] * 1000:.2f}ms, "
+        f"convert_to_dict {metrics['convert_to_dict_seconds'] * 1000:.2f}ms, "
+        f"峰值RSS {metrics['peak_rss'] / 2**20:.1f}MiB, 输出 {metrics['output_bytes'] / 2**10:.1f}KiB",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="用合成仓库和固定仓库测量类继承图的构建性能，并与基准结果比较")
+    arg_parser.add_argument(
+        "cases",
+        nargs="*",
+        help=f"要运行的用例，默认全部运行，可选: {', '.join(list(SYNTHETIC_CASES) + list(FIXTURE_CASES))}",
+    )
+    arg_parser.add_argument(
+        "--work-dir",
+        default=WORK_DIRPATH,
+        help="合成仓库的生成目录；类名包含仓库相对解析器的路径，比较输出大小时需要使用相同的目录",
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3, help="每个用例测量的次数，结果取中位数")
+    arg_parser.add_argument("--fast", action="store_true", help="使用ast直接确定父类")
+    arg_parser.add_argument("--workers", type=int, default=1, help="并行解析文件的进程数")
+    arg_parser.add_argument("--output", default=None, help="将结果以JSON写出到该文件")
+    arg_parser.add_argument("--baseline", default=None, help="与该文件中保存的基准结果比较，有指标变差时以状态1退出")
+    arg_parser.add_argument("--save-baseline", default=None, help="将结果保存为基准")
+    arg_parser.add_argument("--threshold", type=float, default=0.2, help="允许指标变差的比例")
+    args = arg_parser.parse_args()
+
+    case_names = args.cases or list(SYNTHETIC_CASES) + list(FIXTURE_CASES)
+    for case_name in case_names:
+        if case_name not in SYNTHETIC_CASES and case_name not in FIXTURE_CASES:
+            arg_parser.error(f"未知用例: {case_name}")
+    results = run_benchmark(case_names, args.work_dir, repeat=args.repeat, fast=args.fast, workers=args.workers)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("version") != BENCHMARK_FORMAT_VERSION:
+            print(f"基准结果的格式版本 {baseline.get('version')} 与当前版本 {BENCHMARK_FORMAT_VERSION} 不同，不进行比较")
+            sys.exit(0)
+        if baseline.get("options") != results["options"]:
+            print(f"注意: 基准结果的选项 {baseline.get('options')} 与本次运行 {results['options']} 不同")
+        regressions = compare_results(results, baseline, threshold=args.threshold)
+        for regression in regressions:
+            print(
+                f"性能退化: {regression['case']} {regression['metric']} "
+                f"{regression['baseline']:.6g} -> {regression['current']:.6g} ({regression['change']:+.1%})"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"与基准 {args.baseline} 相比没有超过 {args.threshold:.0%} 的退化")
@@ -0,0 +1,3 @@
+from .layers import BasicBlock, Bottleneck, FrozenBatchNorm2d
+from .resnet import ResNet, ResNetFeatures, resnet18, resnet34, resnet50, resnet101
+from .heads import ClassificationHead
@@ -0,0 +1,24 @@
+import torch.nn as nn
+from torch import Tensor
+
+from .layers import conv1x1
+
+
+class ClassificationHead(nn.Sequential):
+    def __init__(self, in_channels, num_classes, dropout=0.0):
+        super().__init__(
+            nn.AdaptiveAvgPool2d((1, 1)),
+            nn.Flatten(1),
+            nn.Dropout(dropout),
+            nn.Linear(in_channels, num_classes),
+        )
+
+
+class SegmentationHead(nn.Module):
+    def __init__(self, in_channels, num_classes):
+        super().__init__()
+        self.proj = conv1x1(in_channels, num_classes)
+        self.upsample = nn.Upsample(scale_factor=32, mode="bilinear", align_corners=False)
+
+    def forward(self, x: Tensor) -> Tensor:
+        return self.upsample(self.proj(x))
@@ -0,0 +1,33 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from models import resnet50
+from models.heads import ClassificationHead
+
+
+class LabelSmoothingLoss(nn.Module):
+    def __init__(self, smoothing=0.1):
+        super().__init__()
+        self.smoothing = smoothing
+
+    def forward(self, logits, target):
+        log_probs = F.log_softmax(logits, dim=-1)
+        nll = -log_probs.gather(dim=-1, index=target.unsqueeze(1)).squeeze(1)
+        smooth = -log_probs.mean(dim=-1)
+        return ((1.0 - self.smoothing) * nll + self.smoothing * smooth).mean()
+
+
+class Trainer:
+    def __init__(self, num_classes, lr=0.1):
+        self.model = resnet50(num_classes=num_classes)
+        self.head = ClassificationHead(2048, num_classes)
+        self.criterion = LabelSmoothingLoss()
+        self.optimizer = torch.optim.SGD(self.model.parameters(), lr=lr, momentum=0.9)
+
+    def step(self, images, targets):
+        self.optimizer.zero_grad()
+        loss = self.criterion(self.model(images), targets)
+        loss.backward()
+        self.optimizer.step()
+        return loss.item()
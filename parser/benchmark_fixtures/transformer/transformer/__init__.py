@@ -0,0 +1,4 @@
+from .configuration_utils import PretrainedConfig
+from .modeling_utils import PreTrainedModel
+from .models.bert.modeling_bert import BertModel, BertForSequenceClassification
+from .models.gpt2.modeling_gpt2 import GPT2Model, GPT2LMHeadModel
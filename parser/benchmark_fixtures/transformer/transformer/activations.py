@@ -0,0 +1,38 @@
+import math
+from collections import OrderedDict
+
+import torch
+from torch import nn
+
+
+class GELUActivation(nn.Module):
+    def __init__(self, use_gelu_python=False):
+        super().__init__()
+        self.act = self._gelu_python if use_gelu_python else nn.functional.gelu
+
+    def _gelu_python(self, input):
+        return input * 0.5 * (1.0 + torch.erf(input / math.sqrt(2.0)))
+
+    def forward(self, input):
+        return self.act(input)
+
+
+class NewGELUActivation(nn.Module):
+    def forward(self, input):
+        return 0.5 * input * (1.0 + torch.tanh(math.sqrt(2.0 / math.pi) * (input + 0.044715 * torch.pow(input, 3.0))))
+
+
+class ClassInstantier(OrderedDict):
+    def __getitem__(self, key):
+        content = super().__getitem__(key)
+        cls, kwargs = content if isinstance(content, tuple) else (content, {})
+        return cls(**kwargs)
+
+
+ACT2CLS = {
+    "gelu": GELUActivation,
+    "gelu_new": NewGELUActivation,
+    "relu": nn.ReLU,
+    "tanh": nn.Tanh,
+}
+ACT2FN = ClassInstantier(ACT2CLS)
@@ -0,0 +1,29 @@
+import copy
+import json
+
+
+class PretrainedConfig:
+    model_type = ""
+
+    def __init__(self, **kwargs):
+        self.output_hidden_states = kwargs.pop("output_hidden_states", False)
+        self.output_attentions = kwargs.pop("output_attentions", False)
+        self.use_return_dict = kwargs.pop("return_dict", True)
+        self.pad_token_id = kwargs.pop("pad_token_id", None)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def to_dict(self):
+        output = copy.deepcopy(self.__dict__)
+        output["model_type"] = self.__class__.model_type
+        return output
+
+    def to_json_string(self):
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True) + "\n"
+
+    @classmethod
+    def from_dict(cls, config_dict, **kwargs):
+        config = cls(**config_dict)
+        for key, value in kwargs.items():
+            setattr(config, key, value)
+        return config
@@ -0,0 +1,49 @@
+import os
+
+import torch
+from torch import nn
+
+from .configuration_utils import PretrainedConfig
+
+
+class ModuleUtilsMixin:
+    def num_parameters(self, only_trainable=False):
+        return sum(p.numel() for p in self.parameters() if p.requires_grad or not only_trainable)
+
+    def get_extended_attention_mask(self, attention_mask, input_shape):
+        extended_attention_mask = attention_mask[:, None, None, :]
+        extended_attention_mask = extended_attention_mask.to(dtype=torch.float32)
+        return (1.0 - extended_attention_mask) * torch.finfo(torch.float32).min
+
+
+class PreTrainedModel(nn.Module, ModuleUtilsMixin):
+    config_class = PretrainedConfig
+    base_model_prefix = ""
+
+    def __init__(self, config, *inputs, **kwargs):
+        super().__init__()
+        if not isinstance(config, PretrainedConfig):
+            raise ValueError(f"Parameter config in `{self.__class__.__name__}(config)` should be a PretrainedConfig")
+        self.config = config
+
+    def post_init(self):
+        self.apply(self._init_weights)
+
+    def _init_weights(self, module):
+        pass
+
+    def save_pretrained(self, save_directory):
+        os.makedirs(save_directory, exist_ok=True)
+        torch.save(self.state_dict(), os.path.join(save_directory, "pytorch_model.bin"))
+        with open(os.path.join(save_directory, "config.json"), "w", encoding="utf-8") as f:
+            f.write(self.config.to_json_string())
+
+
+class SequenceSummary(nn.Module):
+    def __init__(self, config: PretrainedConfig):
+        super().__init__()
+        self.summary = nn.Linear(config.hidden_size, config.num_labels)
+        self.first_dropout = nn.Dropout(getattr(config, "summary_first_dropout", 0.0))
+
+    def forward(self, hidden_states):
+        return self.summary(self.first_dropout(hidden_states[:, -1]))
@@ -0,0 +1 @@
+from . import bert, gpt2
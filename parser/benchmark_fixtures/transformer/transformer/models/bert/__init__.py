@@ -0,0 +1,2 @@
+from .configuration_bert import BertConfig
+from .modeling_bert import BertModel, BertForSequenceClassification
@@ -0,0 +1,2 @@
+from .configuration_gpt2 import GPT2Config
+from .modeling_gpt2 import GPT2Model, GPT2LMHeadModel
@@ -0,0 +1,331 @@
+import json
+import os
+import sys
+from collections import deque
+
+import numpy as np
+
+from source_span import load_source_span
+
+
+# 保存格式的版本，格式改变时需要升级
+STORE_FORMAT_VERSION = 1
+
+
+class ClassRecord:
+    """
+    单个类的元数据，使用__slots__避免每个对象一个__dict__
+
+    code为None时按code_span从源文件读取。
+    """
+
+    __slots__ = ("_code", "code_span")
+
+    def __init__(self, code, code_span=None):
+        self._code = code
+        self.code_span = code_span
+
+    @property
+    def code(self):
+        if self._code is None and self.code_span is not None:
+            return load_source_span(self.code_span)
+        return self._code
+
+
+class ClassGraphStore:
+    """
+    紧凑的类继承图：类名只保存一次，边以整数id的CSR数组保存
+
+    - names: 驻留后的类名表，前num_classes个为仓库中定义的类（按class_info_dict的顺序），其后为只作为父类出现的外部类；
+    - parent_offsets/parent_ids: 每个类的父类id，第i个类的父类为parent_ids[parent_offsets[i]:parent_offsets[i + 1]]；
+    - child_offsets/child_ids: 每个名称的子类id，包括外部类的子类，顺序与Class_Inheritance_Graph中children_classes一致；
+    - nn_module_ids: nn模块的id，顺序与nn_moudles_subclass一致；
+    - records: 每个类的ClassRecord，由save保存的图在load时不创建，访问时从内存映射的代码块中读取。
+
+    convert_to_dict的结果与Class_Inheritance_Graph.convert_to_dict相同。
+    ClassGraphStore由构建完成的Class_Inheritance_Graph转换得到，解析过程中的峰值内存不变，
+    紧凑的表示只在保存之后加载和查询时节省内存。
+    """
+
+    def __init__(
+        self,
+        names,
+        num_classes,
+        parent_offsets,
+        parent_ids,
+        child_offsets,
+        child_ids,
+        nn_module_ids,
+        records=None,
+    ):
+        self.names: list[str] = names
+        self.num_classes = num_classes
+        self.parent_offsets = parent_offsets
+        self.parent_ids = parent_ids
+        self.child_offsets = child_offsets
+        self.child_ids = child_ids
+        self.nn_module_ids = nn_module_ids
+        self.records: list[ClassRecord] | None = records
+        self._ids: dict[str, int] | None = None
+        # load时使用，代码块及其偏移、code_span数组和源文件路径表
+        self.code_blob = None
+        self.code_offsets = None
+        self.code_spans = None
+        self.code_span_files: list[str] = []
+
+    @classmethod
+    def from_class_info_dict(cls, class_info_dict, nn_module_names):
+        """
+        由Class_Inheritance_Graph的class_info_dict和nn_moudles_subclass建立紧凑图
+
+        Args:
+            class_info_dict: dict[str, ClassInfo], 类名到ClassInfo的映射
+            nn_module_names: Iterable[str], nn模块的类名
+
+        Returns:
+            ClassGraphStore
+        """
+        names = [sys.intern(class_name) for class_name in class_info_dict]
+        ids = {name: class_id for class_id, name in enumerate(names)}
+        num_classes = len(names)
+
+        parent_counts = np.zeros(num_classes + 1, dtype=np.int64)
+        parent_id_list = []
+        records = []
+        for class_id, class_info in enumerate(class_info_dict.values()):
+            for parent_class in class_info.parent_classes:
+                parent_id = ids.get(parent_class)
+                if parent_id is None:
+                    parent_id = len(names)
+                    ids[parent_class] = parent_id
+                    names.append(sys.intern(parent_class))
+                parent_id_list.append(parent_id)
+            parent_counts[class_id + 1] = len(class_info.parent_classes)
+            # 懒加载模式下ClassInfo的_code为None，只保存code_span
+            records.append(ClassRecord(class_info._code, class_info.code_span))
+        parent_offsets = np.cumsum(parent_counts)
+        parent_ids = np.array(parent_id_list, dtype=np.int32)
+
+        child_offsets, child_ids = invert_csr(parent_offsets, parent_ids, len(names))
+        nn_module_ids = np.array([ids[name] for name in nn_module_names], dtype=np.int32)
+        store = cls(names, num_classes, parent_offsets, parent_ids, child_offsets, child_ids, nn_module_ids, records)
+        store._ids = ids
+        return store
+
+    @property
+    def ids(self):
+        # load后第一次按名称查询时再建立名称到id的映射
+        if self._ids is None:
+            self._ids = {name: class_id for class_id, name in enumerate(self.names)}
+        return self._ids
+
+    def get_parent_ids(self, class_id):
+        if class_id >= self.num_classes:
+            return self.parent_ids[:0]
+        return self.parent_ids[self.parent_offsets[class_id] : self.parent_offsets[class_id + 1]]
+
+    def get_child_ids(self, class_id):
+        return self.child_ids[self.child_offsets[class_id] : self.child_offsets[class_id + 1]]
+
+    def get_record(self, class_id):
+        """
+        Args:
+            class_id: int, 仓库中定义的类的id
+
+        Returns:
+            ClassRecord
+        """
+        if self.records is not None:
+            return self.records[class_id]
+        code = bytes(self.code_blob[self.code_offsets[class_id] : self.code_offsets[class_id + 1]]).decode("utf-8")
+        file_index, start_byte, end_byte, start_col, end_col = self.code_spans[class_id].tolist()
+        code_span = None
+        if file_index >= 0:
+            code_span = (self.code_span_files[file_index], start_byte, end_byte, start_col, end_col)
+        return ClassRecord(code, code_span)
+
+    def descendant_ids(self, root_ids):
+        """
+        找到一组根类的所有后代，与AncestryIndex.descendant_ids的结果和顺序相同
+
+        Args:
+            root_ids: Iterable[int], 根类id
+
+        Returns:
+            list[int]: 后代类id，按发现顺序排列
+        """
+        source_ids = sorted({int(child_id) for root_id in root_ids for child_id in self.get_child_ids(root_id)})
+        visited = set()
+        descendant_ids = []
+        for source_id in source_ids:
+            if source_id in visited:
+                continue
+            visited.add(source_id)
+            descendant_ids.append(source_id)
+            queue = deque([source_id])
+            while queue:
+                current_id = queue.popleft()
+                for child_id in self.get_child_ids(current_id).tolist():
+                    if child_id not in visited:
+                        visited.add(child_id)
+                        descendant_ids.append(child_id)
+                        queue.append(child_id)
+        return descendant_ids
+
+    def find_subclasses(self, root_class_names):
+        """
+        找到继承自任意一个根类的所有类
+
+        Args:
+            root_class_names: Iterable[str], 根类的完整名称，不在图中的名称会被忽略
+
+        Returns:
+            list[str]: 后代类的名称
+        """
+        root_ids = [self.ids[name] for name in root_class_names if name in self.ids]
+        return [self.names[class_id] for class_id in self.descendant_ids(root_ids)]
+
+    @property
+    def nn_module_names(self):
+        return [self.names[class_id] for class_id in self.nn_module_ids.tolist()]
+
+    def convert_class_to_dict(self, class_id):
+        return {
+            "class_name": self.names[class_id],
+            "parent_classes": [self.names[parent_id] for parent_id in self.get_parent_ids(class_id).tolist()],
+            "children_classes": [self.names[child_id] for child_id in self.get_child_ids(class_id).tolist()],
+            "code": self.get_record(class_id).code,
+        }
+
+    def convert_to_dict(self):
+        return {
+            "class_info_dict": {
+                self.names[class_id]: self.convert_class_to_dict(class_id) for class_id in range(self.num_classes)
+            },
+            "nn_moudles_subclass": {
+                self.names[class_id]: self.convert_class_to_dict(class_id) for class_id in self.nn_module_ids.tolist()
+            },
+        }
+
+    def save(self, save_dirpath):
+        """
+        保存到目录，数组保存为.npy，类名和代码保存为UTF-8字节块，load时可以内存映射
+
+        懒加载模式的代码在保存时读取，保存后的图不再依赖源文件。
+
+        Args:
+            save_dirpath: str, 输出目录
+        """
+        os.makedirs(save_dirpath, exist_ok=True)
+        code_span_files = []
+        code_span_file_indices = {}
+        code_offsets = np.zeros(self.num_classes + 1, dtype=np.int64)
+        code_spans = np.full((self.num_classes, 5), -1, dtype=np.int64)
+        with open(os.path.join(save_dirpath, "codes.bin"), "wb") as f:
+            for class_id in range(self.num_classes):
+                record = self.get_record(class_id)
+                code = record.code.encode("utf-8")
+                f.write(code)
+                code_offsets[class_id + 1] = code_offsets[class_id] + len(code)
+                if record.code_span is not None:
+                    file_path, start_byte, end_byte, start_col, end_col = record.code_span
+                    file_index = code_span_file_indices.setdefault(file_path, len(code_span_files))
+                    if file_index == len(code_span_files):
+                        code_span_files.append(file_path)
+                    code_spans[class_id] = (file_index, start_byte, end_byte, start_col, end_col)
+        # 类名中不包含换行符
+        with open(os.path.join(save_dirpath, "names.bin"), "wb") as f:
+            f.write("\n".join(self.names).encode("utf-8"))
+        arrays = {
+            "parent_offsets": self.parent_offsets,
+            "parent_ids": self.parent_ids,
+            "child_offsets": self.child_offsets,
+            "child_ids": self.child_ids,
+            "nn_module_ids": self.nn_module_ids,
+            "code_offsets": code_offsets,
+            "code_spans": code_spans,
+        }
+        for array_name, array in arrays.items():
+            np.save(os.path.join(save_dirpath, f"{array_name}.npy"), np.asarray(array))
+        with open(os.path.join(save_dirpath, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "format_version": STORE_FORMAT_VERSION,
+                    "num_classes": self.num_classes,
+                    "num_names": len(self.names),
+                    "code_span_files": code_span_files,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, load_dirpath, mmap=True):
+        """
+        读取save保存的图
+
+        Args:
+            load_dirpath: str, save的输出目录
+            mmap: bool, 是否内存映射数组和代码块，为True时代码在访问时才读取
+
+        Returns:
+            ClassGraphStore
+        """
+        with open(os.path.join(load_dirpath, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["format_version"] != STORE_FORMAT_VERSION:
+            raise ValueError(f"不支持的格式版本: {meta['format_version']}")
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            array_name: np.load(os.path.join(load_dirpath, f"{array_name}.npy"), mmap_mode=mmap_mode)
+            for array_name in (
+                "parent_offsets",
+                "parent_ids",
+                "child_offsets",
+                "child_ids",
+                "nn_module_ids",
+                "code_offsets",
+                "code_spans",
+            )
+        }
+        with open(os.path.join(load_dirpath, "names.bin"), "rb") as f:
+            names = f.read().decode("utf-8").split("\n") if meta["num_names"] else []
+        codes_path = os.path.join(load_dirpath, "codes.bin")
+        if mmap and os.path.getsize(codes_path) > 0:
+            code_blob = np.memmap(codes_path, dtype=np.uint8, mode="r")
+        else:
+            code_blob = np.fromfile(codes_path, dtype=np.uint8)
+
+        store = cls(
+            names,
+            meta["num_classes"],
+            arrays["parent_offsets"],
+            arrays["parent_ids"],
+            arrays["child_offsets"],
+            arrays["child_ids"],
+            arrays["nn_module_ids"],
+        )
+        store.code_blob = code_blob
+        store.code_offsets = arrays["code_offsets"]
+        store.code_spans = arrays["code_spans"]
+        store.code_span_files = meta["code_span_files"]
+        return store
+
+
+def invert_csr(offsets, targets, num_nodes):
+    """
+    将CSR邻接数组反向（父类->子类），每个节点的子类按子类id排列，重复的边保留
+
+    Args:
+        offsets: np.ndarray, 长度为源节点数+1的偏移数组
+        targets: np.ndarray, 目标节点id
+        num_nodes: int, 节点总数
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 反向后的偏移数组（长度num_nodes+1）和目标节点id
+    """
+    sources = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+    # 稳定排序保证同一父类的子类按子类id（即class_info_dict的顺序）排列
+    order = np.argsort(targets, kind="stable")
+    inverted_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=num_nodes), out=inverted_offsets[1:])
+    return inverted_offsets, sources[order]
@@ -0,0 +1,196 @@
+import os
+import copy
+import json
+import zlib
+import hashlib
+import sqlite3
+
+
+class ContentStore:
+    """
+    语料库级别的文件内容去重：内容相同的py文件只解析一次，解析结果复用到包含它的每个仓库
+
+    解析结果中只有由convert_qname_to_class_name得到的、以模块名为前缀的类名，以及类代码位置中的文件路径与文件相关，
+    复用时把它们替换为目标文件的即可。其余名称（外部库、其它本地模块）不做改写，因此只有在下列情况下才复用：
+    - 目标文件在仓库中的相对路径与来源相同；或
+    - 文件的所有导入都指向外部库（按目标仓库判断），即解析结果不依赖文件所在的位置。
+
+    父类名称可能经由astroid跨文件推断得到，因此每个条目同时保存来源文件的依赖指纹（见DependencyGraph.fingerprint），
+    调用者在得到目标文件的依赖指纹后，用match_fingerprint选出指纹相同的条目，没有时重新解析。
+
+    同一个实例传给多个Class_Inheritance_Graph即可在一个进程中去重。
+    指定store_dir时条目保存在其中的sqlite数据库中，多个进程（如批量构建中的各个parse.py）共用同一个目录即可在整个语料库中去重，
+    新增的条目在调用commit之后才对其它进程可见，等待其它进程的写事务最多busy_timeout秒。
+    """
+
+    def __init__(self, store_dir=None, version="", busy_timeout=60.0):
+        """
+        Args:
+            store_dir: str, 持久化目录，为None时条目只保存在内存中
+            version: str, 解析器版本，不同版本的条目互不复用
+            busy_timeout: float, 等待其它进程写事务的秒数
+        """
+        self.store_dir = store_dir
+        self.version = version
+        # digest -> [entry]，同一内容在不同位置可能有多个无法互相复用的解析结果
+        self.entries: dict[str, list[dict]] = {}
+        self.files_seen = 0
+        self.files_reused = 0
+        self.connection = None
+        if store_dir is not None:
+            os.makedirs(store_dir, exist_ok=True)
+            self.connection = sqlite3.connect(os.path.join(store_dir, "content_store.sqlite3"), timeout=busy_timeout)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "version TEXT NOT NULL, digest TEXT NOT NULL, rel_path TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                "value BLOB NOT NULL, PRIMARY KEY (version, digest, rel_path, fingerprint))"
+            )
+            self.connection.commit()
+
+    @staticmethod
+    def make_digest(content_digest, variant=""):
+        """
+        Args:
+            content_digest: str, 文件内容的哈希（见get_file_digest），文件无法读取时为None
+            variant: str, 解析方式，不同解析方式的结果分别去重
+
+        Returns:
+            str: 去重使用的哈希，文件无法读取时返回None
+        """
+        if content_digest is None:
+            return None
+        return hashlib.sha256(f"{variant}\0{content_digest}".encode("utf-8")).hexdigest()
+
+    def get_entries(self, digest):
+        if self.connection is None:
+            return self.entries.get(digest, [])
+        rows = self.connection.execute(
+            "SELECT value FROM entries WHERE version = ? AND digest = ?", (self.version, digest)
+        ).fetchall()
+        return [json.loads(zlib.decompress(row[0]).decode("utf-8")) for row in rows]
+
+    def lookup(self, digest, module_class_name, rel_path, py_file, module_resolver):
+        """
+        查找可复用的解析结果，并改写为目标文件的类名和代码位置
+
+        Args:
+            digest: str, 由make_digest得到的哈希
+            module_class_name: str, 目标文件的模块名（经convert_qname_to_class_name转换）
+            rel_path: str, 目标文件相对仓库根路径的路径
+            py_file: str, 目标文件路径
+            module_resolver: ModuleResolver, 目标仓库的模块解析器
+
+        Returns:
+            list[tuple]: 可复用的(改写后的解析结果, 来源文件的依赖指纹)，最近加入的在前，没有可复用的结果时为空
+        """
+        candidates = []
+        for entry in reversed(self.get_entries(digest)):
+            if entry["rel_path"] == rel_path or all(
+                module_resolver.is_external(target) for target in entry["result"]["imports"].values()
+            ):
+                result = rewrite_module_class_name(
+                    entry["result"], entry["module_class_name"], module_class_name, py_file
+                )
+                candidates.append((result, entry["fingerprint"]))
+        return candidates
+
+    @staticmethod
+    def match_fingerprint(candidates, fingerprint):
+        """
+        Args:
+            candidates: list[tuple], lookup的结果
+            fingerprint: str, 目标文件的依赖指纹
+
+        Returns:
+            dict: 依赖指纹相同的解析结果，没有时返回None
+        """
+        for result, candidate_fingerprint in candidates:
+            if candidate_fingerprint == fingerprint:
+                return result
+        return None
+
+    def add(self, digest, result, module_class_name, rel_path, fingerprint):
+        """
+        记录一个新解析的文件，解析失败的文件不记录
+
+        Args:
+            digest: str, 由make_digest得到的哈希
+            result: dict, Class_Inheritance_Graph.parse_file的解析结果
+            module_class_name: str, 文件的模块名（经convert_qname_to_class_name转换）
+            rel_path: str, 文件相对仓库根路径的路径
+            fingerprint: str, 文件的依赖指纹
+        """
+        if digest is None or result is None:
+            return
+        entry = {
+            "result": result,
+            "module_class_name": module_class_name,
+            "rel_path": rel_path,
+            "fingerprint": fingerprint,
+        }
+        if self.connection is None:
+            # 解析结果随后用于构建ClassInfo并被修改（children_classes），因此保存副本
+            self.entries.setdefault(digest, []).append(copy.deepcopy(entry))
+            return
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries (version, digest, rel_path, fingerprint, value) VALUES (?, ?, ?, ?, ?)",
+            (self.version, digest, rel_path, fingerprint, zlib.compress(json.dumps(entry).encode("utf-8"))),
+        )
+
+    def commit(self):
+        """
+        提交一批新增的条目，使其对共用store_dir的其它进程可见
+        """
+        if self.connection is not None:
+            self.connection.commit()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def count(self, files_seen, files_reused):
+        """
+        记录一个仓库中需要解析的文件数量以及其中复用的数量
+        """
+        self.files_seen += files_seen
+        self.files_reused += files_reused
+
+    @property
+    def dedup_ratio(self):
+        """
+        复用的文件占需要解析的文件的比例
+        """
+        return self.files_reused / self.files_seen if self.files_seen else 0.0
+
+
+def rewrite_module_class_name(result, source_module_class_name, target_module_class_name, target_file=None):
+    """
+    将解析结果中以来源模块名为前缀的类名（类自身及同一模块中定义的父类）改写为目标模块名，
+    并将类代码位置中的文件路径改写为目标文件
+
+    Args:
+        result: dict, Class_Inheritance_Graph.parse_file的解析结果
+        source_module_class_name: str, 来源模块名
+        target_module_class_name: str, 目标模块名
+        target_file: str, 目标文件路径，为None时不改写代码位置
+
+    Returns:
+        dict: 改写后的解析结果副本
+    """
+    result = copy.deepcopy(result)
+    prefix = source_module_class_name + "."
+
+    def rewrite(class_name):
+        if source_module_class_name != target_module_class_name and class_name.startswith(prefix):
+            return target_module_class_name + class_name[len(source_module_class_name) :]
+        return class_name
+
+    for class_info in result["classes"]:
+        class_info["class_name"] = rewrite(class_info["class_name"])
+        class_info["parent_classes"] = [rewrite(parent_class) for parent_class in class_info["parent_classes"]]
+        if target_file is not None and class_info.get("code_span") is not None:
+            class_info["code_span"] = (target_file,) + tuple(class_info["code_span"][1:])
+    result["local_bases"] = [rewrite(base_class_name) for base_class_name in result.get("local_bases", [])]
+    return result
@@ -0,0 +1,302 @@
+import os
+import hashlib
+
+
+def get_repo_module_name(rel_path):
+    """
+    获取py文件相对仓库根路径的模块名，如models/blocks.py为models.blocks，包的__init__.py为包名
+
+    Args:
+        rel_path: str, py文件相对仓库根路径的路径
+    """
+    module_name = os.path.splitext(rel_path)[0].replace(os.sep, ".")
+    if module_name == "__init__":
+        return ""
+    if module_name.endswith(".__init__"):
+        module_name = module_name[: -len(".__init__")]
+    return module_name
+
+
+def get_file_digest(py_file):
+    """
+    Returns:
+        str: 文件内容的sha256，文件无法读取时返回None
+    """
+    try:
+        with open(py_file, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class DependencyGraph:
+    """
+    仓库内py文件之间的导入依赖图，由各文件的导入别名表（解析结果中的imports）建立
+
+    导入的完整名称target引用了本地模块module_name（模块自身、其中的名称或包含它的包），当且仅当
+    module_name是target中连续的一段点分名称（本地导入的完整名称可能带有导入文件所在目录的前缀），
+    或者target是包含module_name的包。指向外部库的导入不建立依赖。
+
+    一个文件的父类可能经由它导入的模块再导入的模块（如包的__init__.py转而导出的类）推断得到，
+    因此依赖按导入关系传递：
+    - transitive_dependents: 某些文件改变后，父类可能随之改变的文件；
+    - fingerprints: 由文件传递依赖的所有本地文件的相对路径和内容哈希决定，
+      指纹不变时文件的解析结果只取决于文件自身的内容。
+
+    监视模式下依赖图随文件的改变增量更新：update_imports只更新一个文件的依赖，
+    update_files新增和删除文件，只有引用的文件随之改变的导入重新建立依赖。
+    """
+
+    def __init__(self, repo_path, py_files, file_imports, module_resolver):
+        """
+        Args:
+            repo_path: str, 仓库根路径
+            py_files: Iterable[str], 仓库中的py文件路径
+            file_imports: dict[str, dict[str, str]], 每个文件的导入别名到完整名称的映射，缺少的文件视为没有导入
+            module_resolver: ModuleResolver, 用于跳过指向外部库的导入
+        """
+        self.repo_path = repo_path
+        self.module_resolver = module_resolver
+        self.py_files = []
+        # 相对路径只计算一次，模块名和依赖指纹都使用它
+        self.rel_paths: dict[str, str] = {}
+        # 模块名 -> 文件，以及包名 -> 包中的所有文件
+        self.module_files: dict[str, list[str]] = {}
+        self.package_files: dict[str, list[str]] = {}
+        self.dependencies: dict[str, set[str]] = {}
+        self.dependents: dict[str, set[str]] = {}
+        # 完整名称 -> 引用的本地文件，不同文件常导入相同的名称；以及完整名称 -> 导入它的文件
+        self.target_files: dict[str, set[str]] = {}
+        self.target_importers: dict[str, set[str]] = {}
+        self.file_targets: dict[str, set[str]] = {}
+        for py_file in py_files:
+            self.add_module(py_file)
+        for py_file in self.py_files:
+            self.update_imports(py_file, file_imports.get(py_file, {}))
+
+    def add_module(self, py_file):
+        self.py_files.append(py_file)
+        self.rel_paths[py_file] = os.path.relpath(py_file, self.repo_path)
+        self.dependencies[py_file] = set()
+        self.dependents[py_file] = set()
+        self.file_targets[py_file] = set()
+        module_name = get_repo_module_name(self.rel_paths[py_file])
+        if not module_name:
+            return
+        self.module_files.setdefault(module_name, []).append(py_file)
+        parts = module_name.split(".")
+        for end in range(1, len(parts)):
+            self.package_files.setdefault(".".join(parts[:end]), []).append(py_file)
+
+    def update_imports(self, py_file, imports):
+        """
+        按文件新的导入别名表更新它的依赖，只改变与该文件相连的边
+
+        Args:
+            py_file: str, 依赖图中的py文件
+            imports: dict[str, str], 导入别名到完整名称的映射
+        """
+        targets = set(imports.values())
+        for target in self.file_targets[py_file] - targets:
+            self.target_importers[target].discard(py_file)
+        for target in targets - self.file_targets[py_file]:
+            self.target_importers.setdefault(target, set()).add(py_file)
+        self.file_targets[py_file] = targets
+        imported_files = set()
+        for target in targets:
+            imported_files.update(self.find_target_files(target))
+        imported_files.discard(py_file)
+        for imported_file in self.dependencies[py_file] - imported_files:
+            self.dependents[imported_file].discard(py_file)
+        for imported_file in imported_files - self.dependencies[py_file]:
+            self.dependents[imported_file].add(py_file)
+        self.dependencies[py_file] = imported_files
+
+    def update_files(self, added_files, removed_files, module_resolver):
+        """
+        新增和删除文件，导入的完整名称引用的文件随之改变的文件重新建立依赖
+
+        Args:
+            added_files: Iterable[str], 新增的py文件，导入别名表随后由update_imports设置
+            removed_files: Iterable[str], 删除的py文件
+            module_resolver: ModuleResolver, 按新的文件集合建立的本地模块索引
+        """
+        removed_files = set(removed_files)
+        for py_file in removed_files:
+            self.update_imports(py_file, {})
+        self.py_files = [py_file for py_file in self.py_files if py_file not in removed_files]
+        for py_file in removed_files:
+            for dependent in self.dependents.pop(py_file):
+                self.dependencies[dependent].discard(py_file)
+            del self.dependencies[py_file], self.rel_paths[py_file], self.file_targets[py_file]
+        for files in list(self.module_files.values()) + list(self.package_files.values()):
+            files[:] = [py_file for py_file in files if py_file not in removed_files]
+        for py_file in added_files:
+            self.add_module(py_file)
+        # 本地模块和外部库的划分也可能改变，已记录的完整名称都重新查找（不需要读取文件）
+        self.module_resolver = module_resolver
+        previous_target_files, self.target_files = self.target_files, {}
+        stale_files = set()
+        for target, importers in self.target_importers.items():
+            if importers and self.find_target_files(target) != previous_target_files.get(target):
+                stale_files.update(importers)
+        for py_file in stale_files:
+            targets, self.file_targets[py_file] = self.file_targets[py_file], set()
+            self.update_imports(py_file, {target: target for target in targets})
+
+    def find_target_files(self, target):
+        if target in self.target_files:
+            return self.target_files[target]
+        imported_files = set()
+        if not self.module_resolver.is_external(target):
+            parts = target.split(".")
+            imported_files.update(self.package_files.get(target, ()))
+            for start in range(len(parts)):
+                for end in range(start + 1, len(parts) + 1):
+                    imported_files.update(self.module_files.get(".".join(parts[start:end]), ()))
+        self.target_files[target] = imported_files
+        return imported_files
+
+    def find_module_file(self, target):
+        """
+        完整名称中作为模块的一段及其对应的文件，与find_target_files一样允许带有导入文件所在目录的前缀，
+        多段都是模块名时取最长的一段（较短的是包含它的包或目录前缀）
+
+        Returns:
+            tuple[str, list[str]]: (模块文件, 模块之后剩余的点分名称)，外部库或无法确定唯一的模块文件时返回None
+        """
+        if self.module_resolver.is_external(target):
+            return None
+        parts = target.split(".")
+        matches = []
+        for start in range(len(parts)):
+            for end in range(start + 1, len(parts) + 1):
+                files = self.module_files.get(".".join(parts[start:end]))
+                if files:
+                    matches.append((end - start, files, end))
+        if not matches:
+            return None
+        length = max(match[0] for match in matches)
+        longest = [match for match in matches if match[0] == length]
+        if len(longest) != 1 or len(longest[0][1]) != 1:
+            return None
+        _, files, end = longest[0]
+        return files[0], parts[end:]
+
+    @staticmethod
+    def traverse(py_files, edges):
+        visited = set()
+        stack = [py_file for py_file in py_files if py_file in edges]
+        while stack:
+            py_file = stack.pop()
+            for next_file in edges[py_file]:
+                if next_file not in visited:
+                    visited.add(next_file)
+                    stack.append(next_file)
+        return visited
+
+    def transitive_dependents(self, py_files):
+        """
+        Returns:
+            set[str]: 直接或间接导入了py_files中任意一个文件的文件
+        """
+        return self.traverse(py_files, self.dependents)
+
+    def get_components(self, roots=None):
+        """
+        用Tarjan算法求依赖图的强连通分量（相互导入的文件）
+
+        Args:
+            roots: Iterable[str], 只求这些文件直接或间接依赖的分量，为None时求所有文件的分量
+
+        Returns:
+            list[list[str]]: 强连通分量，每个分量都排在依赖它的分量之前
+        """
+        indices: dict[str, int] = {}
+        lowlinks: dict[str, int] = {}
+        stack: list[str] = []
+        on_stack: set[str] = set()
+        components: list[list[str]] = []
+        for root in self.py_files if roots is None else roots:
+            if root in indices:
+                continue
+            indices[root] = lowlinks[root] = len(indices)
+            stack.append(root)
+            on_stack.add(root)
+            # 以显式的栈代替递归，依赖链很长时不会超过递归深度
+            work = [(root, iter(self.dependencies[root]))]
+            while work:
+                py_file, dependencies = work[-1]
+                for dependency in dependencies:
+                    if dependency not in indices:
+                        indices[dependency] = lowlinks[dependency] = len(indices)
+                        stack.append(dependency)
+                        on_stack.add(dependency)
+                        work.append((dependency, iter(self.dependencies[dependency])))
+                        break
+                    if dependency in on_stack:
+                        lowlinks[py_file] = min(lowlinks[py_file], indices[dependency])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlinks[parent] = min(lowlinks[parent], lowlinks[py_file])
+                    if lowlinks[py_file] == indices[py_file]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == py_file:
+                                break
+                        components.append(component)
+        return components
+
+    def fingerprints(self, file_digests, py_files=None):
+        """
+        按强连通分量从被依赖到依赖的顺序计算文件的依赖指纹，每个分量和每条依赖只处理一次
+
+        分量的哈希由分量中文件的相对路径和内容哈希以及它直接依赖的分量的哈希决定，
+        因此包含了分量传递依赖的所有文件。文件的指纹为它所在分量直接依赖的分量的哈希，
+        文件与其它文件相互导入时为所在分量的哈希，即不包括文件自身（除非存在循环导入）。
+
+        Args:
+            file_digests: dict[str, str], 文件路径到内容哈希的映射
+            py_files: Iterable[str], 需要依赖指纹的文件，只处理它们依赖的分量，为None时计算所有文件
+
+        Returns:
+            dict[str, str]: 文件路径到依赖指纹的映射，包含py_files及其传递依赖的文件，与仓库所在的位置无关
+        """
+        fingerprints = {}
+        component_hashes = {}
+        for component in self.get_components(py_files):
+            member_set = set(component)
+            dependency_hashes = sorted(
+                {
+                    component_hashes[dependency]
+                    for py_file in component
+                    for dependency in self.dependencies[py_file]
+                    if dependency not in member_set
+                }
+            )
+            dependencies_hash = hash_parts(dependency_hashes)
+            component_hash = hash_parts(
+                [dependencies_hash]
+                + [
+                    part
+                    for py_file in sorted(component)
+                    for part in (self.rel_paths[py_file], file_digests.get(py_file) or "")
+                ]
+            )
+            for py_file in component:
+                component_hashes[py_file] = component_hash
+                fingerprints[py_file] = component_hash if len(component) > 1 else dependencies_hash
+        return fingerprints
+
+
+def hash_parts(parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from class_graph_store import ClassGraphStore
+
+
+# 节点特征的列名，与graph_arrays中x的列一一对应
+NODE_FEATURE_NAMES = ("is_external", "num_parents", "num_children")
+
+
+def get_edge_index(store):
+    """
+    由ClassGraphStore的父类CSR数组得到边，方向为子类->父类，重复的继承边保留
+
+    Args:
+        store: ClassGraphStore
+
+    Returns:
+        np.ndarray: 形状为(2, num_edges)的int64数组，第一行为子类id，第二行为父类id
+    """
+    parent_offsets = np.asarray(store.parent_offsets)
+    child_ids = np.repeat(np.arange(store.num_classes, dtype=np.int64), np.diff(parent_offsets))
+    return np.stack([child_ids, np.asarray(store.parent_ids, dtype=np.int64)])
+
+
+def graph_arrays(store):
+    """
+    将ClassGraphStore转换为图学习使用的数组，节点为store.names中的所有名称（包括外部类）
+
+    Args:
+        store: ClassGraphStore
+
+    Returns:
+        dict:
+            edge_index: (2, num_edges) int64，子类->父类；
+            x: (num_nodes, len(NODE_FEATURE_NAMES)) float32，节点特征；
+            y: (num_nodes,) int64，nn模块为1，其余为0；
+            num_nodes: int；
+            names: list[str]，节点id对应的类名。
+    """
+    num_nodes = len(store.names)
+    x = np.zeros((num_nodes, len(NODE_FEATURE_NAMES)), dtype=np.float32)
+    x[store.num_classes :, 0] = 1
+    x[: store.num_classes, 1] = np.diff(np.asarray(store.parent_offsets))
+    x[:, 2] = np.diff(np.asarray(store.child_offsets))
+    y = np.zeros(num_nodes, dtype=np.int64)
+    y[np.asarray(store.nn_module_ids, dtype=np.int64)] = 1
+    return {
+        "edge_index": get_edge_index(store),
+        "x": x,
+        "y": y,
+        "num_nodes": num_nodes,
+        "names": store.names,
+    }
+
+
+def batch_graph_arrays(stores):
+    """
+    将多个图合并为一个不连通的大图（disjoint union），节点id按图依次偏移
+
+    Args:
+        stores: Iterable[ClassGraphStore]
+
+    Returns:
+        dict: 与graph_arrays相同的字段，另外包括
+            batch: (num_nodes,) int64，每个节点所属图的序号；
+            ptr: (num_graphs + 1,) int64，第i个图的节点为[ptr[i], ptr[i + 1])。
+    """
+    edge_indices, xs, ys, names, num_nodes = [], [], [], [], []
+    for store in stores:
+        arrays = graph_arrays(store)
+        edge_indices.append(arrays["edge_index"])
+        xs.append(arrays["x"])
+        ys.append(arrays["y"])
+        names.extend(arrays["names"])
+        num_nodes.append(arrays["num_nodes"])
+    ptr = np.zeros(len(num_nodes) + 1, dtype=np.int64)
+    np.cumsum(num_nodes, out=ptr[1:])
+    num_edges = np.array([edge_index.shape[1] for edge_index in edge_indices], dtype=np.int64)
+    if edge_indices:
+        edge_index = np.concatenate(edge_indices, axis=1) + np.repeat(ptr[:-1], num_edges)
+        x = np.concatenate(xs)
+        y = np.concatenate(ys)
+    else:
+        edge_index = np.zeros((2, 0), dtype=np.int64)
+        x = np.zeros((0, len(NODE_FEATURE_NAMES)), dtype=np.float32)
+        y = np.zeros(0, dtype=np.int64)
+    return {
+        "edge_index": edge_index,
+        "x": x,
+        "y": y,
+        "num_nodes": int(ptr[-1]),
+        "names": names,
+        "batch": np.repeat(np.arange(len(num_nodes), dtype=np.int64), num_nodes),
+        "ptr": ptr,
+    }
+
+
+def to_networkx(store):
+    """
+    Args:
+        store: ClassGraphStore
+
+    Returns:
+        networkx.MultiDiGraph: 节点为类名，边为子类->父类，节点属性为is_external和is_nn_module
+    """
+    import networkx
+
+    arrays = graph_arrays(store)
+    names = arrays["names"]
+    graph = networkx.MultiDiGraph()
+    graph.add_nodes_from(
+        (name, {"is_external": bool(is_external), "is_nn_module": bool(is_nn_module)})
+        for name, is_external, is_nn_module in zip(names, arrays["x"][:, 0].tolist(), arrays["y"].tolist())
+    )
+    child_ids, parent_ids = arrays["edge_index"].tolist()
+    graph.add_edges_from(zip((names[child_id] for child_id in child_ids), (names[parent_id] for parent_id in parent_ids)))
+    return graph
+
+
+def to_torch_geometric(arrays):
+    """
+    将graph_arrays或batch_graph_arrays的结果转换为torch_geometric的Data，需要安装construct extra（torch-geometric）
+
+    Args:
+        arrays: dict, graph_arrays或batch_graph_arrays的结果
+
+    Returns:
+        torch_geometric.data.Data
+    """
+    import torch
+    from torch_geometric.data import Data
+
+    data = Data(
+        x=torch.from_numpy(np.ascontiguousarray(arrays["x"])),
+        edge_index=torch.from_numpy(np.ascontiguousarray(arrays["edge_index"])),
+        y=torch.from_numpy(np.ascontiguousarray(arrays["y"])),
+        num_nodes=arrays["num_nodes"],
+    )
+    if "batch" in arrays:
+        data.batch = torch.from_numpy(arrays["batch"])
+        data.ptr = torch.from_numpy(arrays["ptr"])
+    return data
+
+
+def write_shards(stores, save_dirpath, shard_size=1000):
+    """
+    流式地将多个图按shard_size个一组合并并写出为.npz分片，内存中最多只保留一个分片的图
+
+    每个分片包括batch_graph_arrays的数组，类名保存为以换行符分隔的UTF-8字节块。
+    save_dirpath下的index.jsonl每行记录一个分片的文件名、图数量、节点数和边数。
+
+    Args:
+        stores: Iterable[ClassGraphStore], 可以是按需读取的生成器
+        save_dirpath: str, 输出目录
+        shard_size: int, 每个分片中图的数量
+
+    Returns:
+        int: 分片数量
+    """
+    os.makedirs(save_dirpath, exist_ok=True)
+    num_shards = 0
+    with open(os.path.join(save_dirpath, "index.jsonl"), "w", encoding="utf-8") as index_file:
+        shard_stores = []
+        for store in stores:
+            shard_stores.append(store)
+            if len(shard_stores) == shard_size:
+                write_shard(shard_stores, save_dirpath, num_shards, index_file)
+                num_shards += 1
+                shard_stores = []
+        if shard_stores:
+            write_shard(shard_stores, save_dirpath, num_shards, index_file)
+            num_shards += 1
+    return num_shards
+
+
+def write_shard(stores, save_dirpath, shard_index, index_file):
+    arrays = batch_graph_arrays(stores)
+    shard_name = f"shard-{shard_index:05d}.npz"
+    np.savez(
+        os.path.join(save_dirpath, shard_name),
+        edge_index=arrays["edge_index"],
+        x=arrays["x"],
+        y=arrays["y"],
+        batch=arrays["batch"],
+        ptr=arrays["ptr"],
+        names=np.frombuffer("\n".join(arrays["names"]).encode("utf-8"), dtype=np.uint8),
+    )
+    index_file.write(
+        json.dumps(
+            {
+                "shard": shard_name,
+                "num_graphs": len(stores),
+                "num_nodes": arrays["num_nodes"],
+                "num_edges": int(arrays["edge_index"].shape[1]),
+            }
+        )
+        + "\n"
+    )
+    index_file.flush()
+
+
+def read_shard(shard_path):
+    """
+    读取write_shards写出的分片
+
+    Args:
+        shard_path: str, .npz分片路径
+
+    Returns:
+        dict: 与batch_graph_arrays相同的字段
+    """
+    with np.load(shard_path) as shard:
+        arrays = {key: shard[key] for key in ("edge_index", "x", "y", "batch", "ptr")}
+        names = shard["names"].tobytes().decode("utf-8")
+    arrays["names"] = names.split("\n") if names else []
+    arrays["num_nodes"] = int(arrays["ptr"][-1])
+    return arrays
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="将ClassGraphStore目录（parse.py --format store的输出）批量转换为图学习使用的分片")
+    arg_parser.add_argument("store_list_path", help="每行一个ClassGraphStore目录的文本文件")
+    arg_parser.add_argument("save_dirpath", help="分片输出目录")
+    arg_parser.add_argument("--shard-size", type=int, default=1000, help="每个分片中图的数量")
+    args = arg_parser.parse_args()
+
+    def iterate_stores(store_list_path):
+        with open(store_list_path, "r", encoding="utf-8") as f:
+            for line in f:
+                store_dirpath = line.strip()
+                if store_dirpath:
+                    yield ClassGraphStore.load(store_dirpath, mmap=True)
+
+    num_shards = write_shards(iterate_stores(args.store_list_path), args.save_dirpath, shard_size=args.shard_size)
+    print(f"写出分片: {num_shards}")
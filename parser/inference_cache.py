@@ -0,0 +1,117 @@
+import os
+import re
+
+
+# 只由点分名称组成的父类表达式，如nn.Module、BaseBlock
+DOTTED_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*")
+
+# 推断失败的结果
+INFERENCE_FAILED = None
+
+
+class BaseInferenceCache:
+    """
+    父类推断结果的缓存，key由父类表达式所在模块的导入上下文和表达式文本决定
+
+    - 表达式的第一个名称来自导入（如import torch.nn as nn中的nn.Module），且该名称在模块中只由这一个导入绑定
+      （见ModuleBindings.lookup）时，key为导入后的完整名称（torch.nn.Module）。指向外部库的key在所有仓库间共享，
+      指向仓库本地模块的key只在同一仓库内共享，名称被重新绑定时不使用缓存；
+    - 第一个名称为在类定义之前于模块顶层唯一定义的类，或在模块中没有绑定（内置名称）时，只在同一模块内共享，
+      此时名称在类定义处引用的对象与作用域无关；
+    - 其余表达式（被内层作用域覆盖的名称、Generic[T]等）不使用缓存。
+
+    缓存的值为astroid推断得到的qname（未经convert_qname_to_class_name转换），推断失败时为INFERENCE_FAILED。
+    同一个实例传给多个Class_Inheritance_Graph即可跨仓库共享。多进程模式下子进程从空的缓存开始（for_worker），
+    每解析完一个文件就用drain取出新增的缓存和命中统计交给父进程，由merge合并。
+    """
+
+    def __init__(self):
+        self.entries: dict[tuple[str, str], str | None] = {}
+        self.hits = 0
+        self.misses = 0
+        # 子进程中上次drain之后新增的缓存，父进程中不记录
+        self.added: dict[tuple[str, str], str | None] | None = None
+
+    def make_key(self, base, module_bindings, short_class_name_to_qname, module_resolver, repo_path):
+        """
+        Args:
+            base: astroid.nodes.NodeNG, ClassDef.bases中的节点
+            module_bindings: ModuleBindings, 父类表达式所在模块中名称的绑定
+            short_class_name_to_qname: dict[str, str], 导入别名到完整名称的映射
+            module_resolver: ModuleResolver, 用于判断导入的完整名称是否为外部库
+            repo_path: str, 仓库根路径
+
+        Returns:
+            tuple[str, str]: (共享范围, 表达式)，不能使用缓存时返回None
+        """
+        base_string = base.as_string()
+        if not DOTTED_NAME.fullmatch(base_string):
+            return None
+        head, dot, tail = base_string.partition(".")
+        # 名称在模块中被重新绑定（如导入后又被赋值）或被内层作用域覆盖时，推断结果与类定义所在的作用域有关，不使用缓存
+        class_node = base.parent
+        nested = class_node.parent.frame() is not class_node.root()
+        binding = module_bindings.lookup(head, class_node.lineno, nested)
+        if binding == "import" and head in short_class_name_to_qname:
+            target = short_class_name_to_qname[head] + dot + tail
+            if module_resolver.is_external(target):
+                return ("", target)
+            return (os.path.abspath(repo_path), target)
+        if binding in ("class", "unbound"):
+            module = base.root()
+            return (module.file or module.name, base_string)
+        return None
+
+    def get(self, key):
+        """
+        Returns:
+            tuple[bool, str | None]: (是否命中, 缓存的qname)
+        """
+        if key in self.entries:
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, qname):
+        self.entries[key] = qname
+        if self.added is not None:
+            self.added[key] = qname
+
+    def for_worker(self):
+        """
+        创建在子进程中使用的空缓存，父进程中已有的缓存不传给子进程
+        """
+        inference_cache = type(self)()
+        inference_cache.added = {}
+        return inference_cache
+
+    def drain(self):
+        """
+        取出并清空上次drain之后新增的缓存和命中统计，子进程用它把结果交给父进程
+
+        Returns:
+            dict: 可pickle的统计，交给merge合并
+        """
+        snapshot = {"entries": self.added, "hits": self.hits, "misses": self.misses}
+        self.added, self.hits, self.misses = {}, 0, 0
+        return snapshot
+
+    def merge(self, snapshot):
+        self.entries.update(snapshot["entries"])
+        self.hits += snapshot["hits"]
+        self.misses += snapshot["misses"]
+
+    def discard_repo(self, repo_path):
+        """
+        移除与仓库本地模块相关的缓存，仓库中的文件改变后调用，指向外部库的缓存保留
+
+        Args:
+            repo_path: str, 仓库根路径
+        """
+        repo_path = os.path.abspath(repo_path)
+        repo_prefix = os.path.join(repo_path, "")
+        for key in list(self.entries):
+            scope = os.path.abspath(key[0]) if key[0] else ""
+            if scope == repo_path or scope.startswith(repo_prefix):
+                del self.entries[key]
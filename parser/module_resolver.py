@@ -0,0 +1,132 @@
+import os
+import sys
+import importlib.machinery
+
+
+# parser自身所在的目录，以脚本方式运行parse.py时位于sys.path[0]
+PARSER_DIR = os.path.realpath(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ModuleResolver:
+    """
+    判断导入的模块属于外部库（标准库或已安装的第三方库）还是仓库本地模块
+
+    判断过程不会导入或执行任何模块：
+    1. 相对导入（level大于0）一定是本地模块；
+    2. 仓库自身的顶层模块（根目录下的py文件和包含py文件的目录）预先建立索引，命中即为本地模块；
+    3. 其余顶层名称使用find_spec查找，只定位模块而不执行，结果按顶层名称缓存，
+       在同一进程中跨文件、跨仓库共享。查找时跳过parser目录，
+       parser自身的模块（profiler、benchmark、parse_cache等）不是仓库导入的外部库。
+
+    不是外部库的模块不一定在仓库中，如未安装的第三方库，is_local_module判断模块是否确实是仓库中的模块或包。
+    """
+
+    # 顶层名称 -> 是否为外部库，所有ModuleResolver实例共享
+    external_cache: dict[str, bool] = {}
+
+    def __init__(self, local_top_level_names=(), local_module_names=None):
+        self.local_top_level_names = frozenset(local_top_level_names)
+        # 仓库中所有模块和包相对仓库根路径的点分名称，为None时未建立索引
+        self.local_module_names = None if local_module_names is None else frozenset(local_module_names)
+
+    @classmethod
+    def from_files(cls, repo_path, py_files):
+        """
+        根据仓库中的py文件建立本地顶层模块索引
+
+        Args:
+            repo_path: str, 仓库根路径
+            py_files: list[str], 仓库中的py文件路径
+
+        Returns:
+            ModuleResolver: 解析器
+        """
+        local_top_level_names = set()
+        local_module_names = set()
+        for py_file in py_files:
+            parts = os.path.splitext(os.path.relpath(py_file, repo_path))[0].split(os.sep)
+            local_top_level_names.add(parts[0])
+            if parts[-1] == "__init__":
+                parts = parts[:-1]
+            for end in range(1, len(parts) + 1):
+                local_module_names.add(".".join(parts[:end]))
+        return cls(local_top_level_names, local_module_names)
+
+    def is_external(self, module_name, level=0):
+        """
+        判断模块是否为外部库
+
+        Args:
+            module_name: str, 模块名称，可以是多级的点分名称
+            level: int, 相对导入的层级，绝对导入为0或None
+
+        Returns:
+            bool: 外部库返回True，本地模块（包括空的模块名和相对导入）返回False
+        """
+        if module_name == "" or level:
+            return False
+        top_level_name = module_name.split(".")[0]
+        if top_level_name in self.local_top_level_names:
+            return False
+        is_external = self.external_cache.get(top_level_name)
+        if is_external is None:
+            is_external = self.find_top_level(top_level_name)
+            self.external_cache[top_level_name] = is_external
+        return is_external
+
+    def is_local_module(self, module_name):
+        """
+        判断模块是否为仓库中的模块或包
+
+        Args:
+            module_name: str, 相对仓库根路径的点分模块名称（见Class_Inheritance_Graph.get_module_qname）
+
+        Returns:
+            bool: 仓库中的模块或包返回True，未建立索引时也返回True
+        """
+        return self.local_module_names is None or module_name in self.local_module_names
+
+    @staticmethod
+    def find_top_level(top_level_name):
+        # 已经导入过的模块一定是外部库，其__spec__可能为None（如__main__），不能交给find_spec
+        module = sys.modules.get(top_level_name)
+        if module is not None and not is_parser_module(module):
+            return True
+        # 与importlib.util.find_spec相同，依次询问sys.meta_path中的查找器，但基于路径的查找跳过parser目录
+        search_path = [path for path in sys.path if not is_parser_dir(path)]
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            try:
+                if finder is importlib.machinery.PathFinder:
+                    spec = find_spec(top_level_name, search_path)
+                else:
+                    spec = find_spec(top_level_name, None)
+            except (ImportError, ValueError):
+                continue
+            if spec is not None:
+                return True
+        return False
+
+
+def is_parser_dir(path):
+    """
+    判断sys.path中的一项是否为parser目录，空字符串表示当前目录
+    """
+    return os.path.realpath(path or os.getcwd()) == PARSER_DIR
+
+
+def is_parser_module(module):
+    """
+    判断已导入的模块是否为parser目录中的模块（包括被测试导入的parse、profiler等）
+    """
+    locations = list(getattr(module, "__path__", None) or [])
+    module_file = getattr(module, "__file__", None)
+    if module_file:
+        locations.append(os.path.dirname(module_file))
+    for location in locations:
+        location = os.path.realpath(location)
+        if location == PARSER_DIR or location.startswith(os.path.join(PARSER_DIR, "")):
+            return True
+    return False
@@ -0,0 +1,167 @@
+import ast
+
+
+class ModuleVisitor:
+    """
+    对模块的语法树做一次先序遍历，将节点分发给按节点类型注册的处理函数
+
+    同时支持标准库ast和astroid的节点，遍历顺序与astroid的nodes_of_class一致。
+    需要从模块中提取新信息（嵌套类、__init__中的子模块实例化、装饰器等）时，
+    只需为对应的节点类型注册处理函数，而不必再遍历一次语法树。
+
+    处理函数的签名为handler(node, scope)，scope为节点所在作用域（类、函数）名称组成的元组，
+    例如类A的方法f中定义的类B，其scope为("A", "f")。
+    """
+
+    SCOPE_TYPES = (
+        ast.ClassDef,
+        ast.FunctionDef,
+        ast.AsyncFunctionDef,
+    )
+
+    def __init__(self, scope_types=SCOPE_TYPES):
+        self.scope_types = tuple(scope_types)
+        self.handlers: dict[type, list] = {}
+
+    def register(self, node_types, handler):
+        """
+        注册处理函数，节点类型按精确类型匹配，不匹配子类
+
+        Args:
+            node_types: type | tuple[type], 节点类型
+            handler: Callable[[node, tuple[str, ...]], None], 处理函数
+        """
+        if isinstance(node_types, type):
+            node_types = (node_types,)
+        for node_type in node_types:
+            self.handlers.setdefault(node_type, []).append(handler)
+
+    def visit(self, root):
+        """
+        遍历以root为根的语法树
+
+        Args:
+            root: ast.AST | astroid.nodes.NodeNG, 根节点
+        """
+        if isinstance(root, ast.AST):
+            iter_children = ast.iter_child_nodes
+        else:
+            iter_children = lambda node: node.get_children()
+        handlers = self.handlers
+        scope_types = self.scope_types
+        stack = [(root, ())]
+        while stack:
+            node, scope = stack.pop()
+            for handler in handlers.get(type(node), ()):
+                handler(node, scope)
+            if isinstance(node, scope_types):
+                scope = scope + (node.name,)
+            children = list(iter_children(node))
+            stack.extend((child, scope) for child in reversed(children))
+
+
+class ModuleBindings:
+    """
+    模块中名称的绑定，快速模式借此判断父类名称在类定义处引用的是什么
+
+    - bindings: 模块命名空间中每个名称的所有绑定（类定义、导入、赋值、函数定义等）及其行号；
+    - nested_names: 在类或函数内部绑定的名称，嵌套定义的类引用它们时不在模块命名空间中查找；
+    - has_star_import: 模块中存在from ... import *，任何名称都可能被覆盖。
+
+    使用register将收集函数注册到ModuleVisitor上，与其它信息在同一次遍历中收集。
+    """
+
+    def __init__(self):
+        self.bindings: dict[str, list[tuple[str, int]]] = {}
+        self.nested_names: set[str] = set()
+        self.has_star_import = False
+
+    def add(self, name, kind, node, scope):
+        if scope:
+            self.nested_names.add(name)
+        else:
+            self.bindings.setdefault(name, []).append((kind, node.lineno))
+
+    def add_import(self, node, scope):
+        # 与导入别名表的key一致，import a.b记为b
+        for alias in node.names:
+            self.add(alias.asname or alias.name.split(".")[-1], "import", node, scope)
+
+    def add_import_from(self, node, scope):
+        for alias in node.names:
+            if alias.name == "*":
+                self.has_star_import = True
+            else:
+                self.add(alias.asname or alias.name, "import", node, scope)
+
+    def add_name(self, node, scope):
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.add(node.id, "other", node, scope)
+
+    def add_pattern_name(self, node, scope):
+        # except ... as name、match语句中的捕获名称
+        name = node.rest if isinstance(node, ast.MatchMapping) else node.name
+        if name:
+            self.add(name, "other", node, scope)
+
+    def add_global(self, node, scope):
+        # 声明为global（或nonlocal）的名称可能在函数被调用时重新绑定
+        for name in node.names:
+            self.bindings.setdefault(name, []).append(("other", node.lineno))
+
+    def register(self, visitor):
+        """
+        Args:
+            visitor: ModuleVisitor, 遍历标准库ast语法树的访问器
+        """
+        visitor.register(ast.ClassDef, lambda node, scope: self.add(node.name, "class", node, scope))
+        visitor.register(
+            (ast.FunctionDef, ast.AsyncFunctionDef), lambda node, scope: self.add(node.name, "other", node, scope)
+        )
+        visitor.register(ast.Import, self.add_import)
+        visitor.register(ast.ImportFrom, self.add_import_from)
+        visitor.register(ast.Name, self.add_name)
+        visitor.register(ast.arg, lambda node, scope: self.add(node.arg, "other", node, scope))
+        visitor.register((ast.ExceptHandler, ast.MatchAs, ast.MatchStar, ast.MatchMapping), self.add_pattern_name)
+        visitor.register((ast.Global, ast.Nonlocal), self.add_global)
+
+    def exports(self):
+        """
+        模块执行完之后顶层名称的绑定，增量更新时用于跟踪转而导出的名称
+
+        Returns:
+            dict[str, str]: 名称到"class"（类定义）、"import"（导入）或"other"（多次绑定、赋值、函数定义等）的映射，
+                存在星号导入时返回None
+        """
+        if self.has_star_import:
+            return None
+        exports = {}
+        for name, bindings in self.bindings.items():
+            kind = bindings[0][0] if len(bindings) == 1 else "other"
+            exports[name] = kind if kind in ("class", "import") else "other"
+        return exports
+
+    def lookup(self, name, lineno, nested=False):
+        """
+        查找在第lineno行定义的类引用的名称name
+
+        Args:
+            name: str, 名称
+            lineno: int, 类定义所在的行号
+            nested: bool, 类是否定义在其它类或函数中
+
+        Returns:
+            str: "class"为该行之前在模块顶层定义的类，"import"为导入，"unbound"为模块中没有绑定（内置名称），
+                None为无法直接确定（多次绑定、被赋值、星号导入、被内层作用域覆盖等）
+        """
+        if self.has_star_import or (nested and name in self.nested_names):
+            return None
+        bindings = self.bindings.get(name, ())
+        if not bindings:
+            return "unbound"
+        if len(bindings) > 1:
+            return None
+        kind, binding_lineno = bindings[0]
+        if kind == "class" and binding_lineno >= lineno:
+            return None
+        return kind if kind in ("class", "import") else None
@@ -3,16 +3,53 @@ import ast
 import glob
 import astroid
 from astroid import MANAGER
+from astroid.modutils import modpath_from_file
 import json
-import importlib
-import sys
+import builtins
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from parse_cache import ParseCache
+from module_resolver import ModuleResolver
+from ancestry import AncestryIndex
+from module_visitor import ModuleVisitor, ModuleBindings
+from astroid_cache import BoundedAstroidCache, invalidate_modules
+from repo_watcher import RepoWatcher
+from inference_cache import BaseInferenceCache, INFERENCE_FAILED, DOTTED_NAME
+from content_store import ContentStore, rewrite_module_class_name
+from dependency_graph import DependencyGraph, get_file_digest
+from source_span import read_source_lines, slice_source_lines, load_source_span
+from profiler import NullProfiler, PhaseProfiler
+
+# 解析器版本，解析逻辑或输出格式改变时需要升级，以使旧的解析缓存失效
+PARSER_VERSION = "12"
+
+# torch.nn.Module的完整名称，直接或间接继承它们的类即为nn模块
+NN_MODULE_ROOTS = ("torch.nn.Module", "torch.nn.modules.module.Module")
+
 
 class ClassInfo:
-    def __init__(self, class_name, parent_classes=[], children_classes=[], code=""):
+    # 大仓库的类继承图中ClassInfo对象很多，使用__slots__避免每个对象一个__dict__
+    __slots__ = ("class_name", "parent_classes", "children_classes", "_code", "code_span")
+
+    def __init__(self, class_name, parent_classes=[], children_classes=[], code="", code_span=None):
         self.class_name = class_name
         self.parent_classes = parent_classes
         self.children_classes = children_classes
-        self.code = code
+        # 懒加载模式下code为None，只保存code_span，访问或导出code时再从文件读取
+        self._code = code
+        self.code_span = code_span
+
+    @property
+    def code(self):
+        if self._code is None and self.code_span is not None:
+            return load_source_span(self.code_span)
+        return self._code
+
+    @code.setter
+    def code(self, code):
+        self._code = code
 
     def convert_to_dict(self):
         return {
@@ -22,12 +59,97 @@ class ClassInfo:
             "code": self.code,
         }
 
+    @classmethod
+    def from_dict(cls, class_info_dict, lazy_code=False):
+        code = class_info_dict["code"]
+        code_span = class_info_dict.get("code_span")
+        if lazy_code and code_span is not None:
+            code = None
+        elif code is None:
+            code = load_source_span(code_span)
+        return cls(
+            class_info_dict["class_name"],
+            class_info_dict["parent_classes"],
+            class_info_dict["children_classes"],
+            code,
+            code_span,
+        )
+
+
+class ClassGraphJsonlReader:
+    """
+    流式读取Class_Inheritance_Graph.write_jsonl写出的JSON Lines文件
+
+    header和nn_moudles_subclass（类名列表）在打开时读取，
+    类记录在迭代时逐行读取并转换为ClassInfo，内存占用与文件大小无关。
+    """
+
+    def __init__(self, load_path):
+        self.load_path = load_path
+        with open(load_path, "r", encoding="utf-8") as f:
+            self.header = json.loads(f.readline())
+            self.nn_moudles_subclass = json.loads(f.readline())["class_names"]
+
+    def __iter__(self):
+        with open(self.load_path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["type"] == "class":
+                    yield ClassInfo.from_dict(record)
+
 
 class Class_Inheritance_Graph:
-    def __init__(self, repo_path):
+    def __init__(
+        self,
+        repo_path,
+        workers=1,
+        cache: ParseCache | None = None,
+        lazy_code=False,
+        fast=False,
+        astroid_cache: BoundedAstroidCache | None = None,
+        inference_cache: BaseInferenceCache | None = None,
+        content_store: ContentStore | None = None,
+        profiler: PhaseProfiler | None = None,
+    ):
         self.repo_path = repo_path
-        self.class_info_dict = self.build_class_inheritance_graph(repo_path)
+        self.workers = workers
+        self.cache = cache
+        self.lazy_code = lazy_code
+        self.fast = fast
+        self.astroid_cache = astroid_cache
+        # 父类推断缓存默认只在本仓库内共享，传入同一个实例可跨仓库共享
+        self.inference_cache = inference_cache if inference_cache is not None else BaseInferenceCache()
+        # 语料库级别的文件内容去重，不为None时内容相同的文件只解析一次
+        self.content_store = content_store
+        # 性能分析器，默认不记录；传入PhaseProfiler时记录各阶段耗时、每个文件的耗时和解析失败的文件
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        self.module_resolver = ModuleResolver()
+        # 文件内容的哈希，使用解析缓存时用于计算缓存key和依赖指纹
+        self.file_digests: dict[str, str | None] = {}
+        # 使用BoundedAstroidCache时，仓库解析完成后释放仓库本地模块的AST，并记录缓存统计
+        if astroid_cache is not None:
+            astroid_cache.begin_repo(repo_path)
+        with self.profiler.phase("build"):
+            self.class_info_dict = self.build_class_inheritance_graph(repo_path)
         self.nn_moudles_subclass = self.find_nn_modules(self.class_info_dict)
+        self.astroid_cache_report = None
+        if astroid_cache is not None:
+            self.astroid_cache_report = astroid_cache.finish_repo()
+
+    # 子进程解析文件用到的属性
+    WORKER_ATTRIBUTES = ("repo_path", "lazy_code", "fast", "module_resolver")
+
+    def __getstate__(self):
+        # 多进程模式下子进程只解析文件，parse_file_in_worker随每批任务pickle，因此只传解析文件用到的属性，
+        # 类继承图、各文件的解析结果、解析缓存、astroid缓存和内容去重只在父进程中使用
+        # 父类推断缓存可能很大，子进程从空的缓存开始，新增的缓存随解析结果交给父进程
+        state = {name: self.__dict__[name] for name in self.WORKER_ATTRIBUTES}
+        state["inference_cache"] = self.inference_cache.for_worker()
+        state["profiler"] = self.profiler.for_worker()
+        state["cache"] = None
+        state["astroid_cache"] = None
+        state["content_store"] = None
+        return state
 
     def convert_to_dict(self):
         return {
@@ -41,7 +163,40 @@ class Class_Inheritance_Graph:
             },
         }
 
-    def get_module_qname(self, module_name, current_file_path, repo_path):
+    def to_store(self):
+        """
+        转换为紧凑的ClassGraphStore，类名只保存一次，继承关系以整数id数组保存
+
+        转换在类继承图构建完成之后进行，不降低解析过程中的峰值内存；
+        节省的是保存后的体积以及之后以内存映射方式加载、查询时的内存。
+
+        Returns:
+            ClassGraphStore
+        """
+        # ClassGraphStore依赖numpy，只在导出store时导入
+        from class_graph_store import ClassGraphStore
+
+        return ClassGraphStore.from_class_info_dict(self.class_info_dict, self.nn_moudles_subclass)
+
+    def write_jsonl(self, save_path):
+        """
+        以JSON Lines格式流式写出类继承图，每个类一条记录
+
+        第一行为header，第二行为nn_moudles_subclass的类名列表，其余每行一个类。
+        nn模块只以类名引用，不再重复写出；懒加载模式下每个类的code在写出时才读取。
+
+        Args:
+            save_path: str, 输出文件路径
+        """
+        with open(save_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "header", "repo_path": self.repo_path, "parser_version": PARSER_VERSION}) + "\n")
+            f.write(json.dumps({"type": "nn_moudles_subclass", "class_names": list(self.nn_moudles_subclass)}) + "\n")
+            for class_info in self.class_info_dict.values():
+                record = {"type": "class"}
+                record.update(class_info.convert_to_dict())
+                f.write(json.dumps(record) + "\n")
+
+    def get_module_qname(self, module_name, current_file_path, repo_path, level=0):
         """
         获取模块的完整限定名
 
@@ -49,57 +204,65 @@ class Class_Inheritance_Graph:
             module_name: str, 模块名称
             current_file_path: str, 当前文件路径
             repo_path: str, 仓库根路径
-            node_level: int, 当前节点的层级
+            level: int, 相对导入的层级，相对导入的模块一定是本地模块
         Returns:
             str: 模块的完整限定名
         """
-        # 检查是否为标准库或已安装的第三方库
-        try:
-            if module_name != "":
-                importlib.import_module(module_name.split(".")[0])
-            else:
-                raise ImportError
+        # 检查是否为标准库或已安装的第三方库，只查找模块而不导入
+        with self.profiler.phase("module_qname"):
+            is_external = self.module_resolver.is_external(module_name, level)
+        if is_external:
             return module_name
-        except ImportError:
-            # 如果不是外部库，说明是本地模块
-            # 根据node_level，找到当前文件的相对路径
-            rel_path = os.path.relpath(os.path.dirname(current_file_path), repo_path)
-            if rel_path == ".":
-                return module_name
-            elif module_name == "":
-                return rel_path
-            else:
-                return f"{rel_path.replace(os.sep, '.')}.{module_name}"
-        except Exception as e:
-            print(f"获取模块的完整限定名时出错: {str(e)}")
+        # 如果不是外部库，说明是本地模块
+        # 根据node_level，找到当前文件的相对路径
+        rel_path = os.path.relpath(os.path.dirname(current_file_path), repo_path)
+        if rel_path == ".":
             return module_name
+        elif module_name == "":
+            return rel_path
+        else:
+            return f"{rel_path.replace(os.sep, '.')}.{module_name}"
 
-    def get_source_segment(self, file_path, node):
+    def get_source_segment(self, file_path, node, lines=None):
         """
         获取AST节点对应的源代码片段
 
         Args:
             file_path: str, 源代码文件路径
             node: ast.AST, AST节点
+            lines: list[str], 已读取的源代码行，为None时从file_path读取
 
         Returns:
             str: 节点对应的源代码
         """
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        with self.profiler.phase("source_segment"):
+            if lines is None:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
 
-        start_line, start_col = node.lineno - 1, node.col_offset
-        end_line, end_col = node.end_lineno - 1, node.end_col_offset
+            return slice_source_lines(
+                lines, node.lineno - 1, node.col_offset, node.end_lineno - 1, node.end_col_offset
+            )
 
-        if start_line == end_line:
-            return lines[start_line][start_col:end_col]
-        else:
-            # 获取多行代码
-            code_lines = [lines[start_line][start_col:]]
-            for i in range(start_line + 1, end_line):
-                code_lines.append(lines[i].rstrip("\n"))
-            code_lines.append(lines[end_line][:end_col])
-            return "\n".join(code_lines)
+    def get_source_span(self, file_path, node, line_offsets):
+        """
+        获取AST节点对应源代码的位置，供懒加载模式使用
+
+        Args:
+            file_path: str, 源代码文件路径
+            node: ast.AST, AST节点
+            line_offsets: list[int], 每一行在文件中的起始字节位置，最后一项为文件长度
+
+        Returns:
+            tuple: (file_path, start_byte, end_byte, start_col, end_col)
+        """
+        return (
+            file_path,
+            line_offsets[node.lineno - 1],
+            line_offsets[node.end_lineno],
+            node.col_offset,
+            node.end_col_offset,
+        )
 
     def convert_qname_to_class_name(self, qname, repo_path):
         # 获得current_file_path
@@ -123,82 +286,825 @@ class Class_Inheritance_Graph:
         # 将qname_parts重新拼接为字符串
         return ".".join(qname_parts)
 
-    def build_class_inheritance_graph(self, repo_path):
-        class_info_dict: dict[str, ClassInfo] = {}
-        # 遍历repo_path下的所有py文件
-        for py_file in glob.glob(os.path.join(repo_path, "**/*.py"), recursive=True):
-            try:
-                # 解析代码
-                module = MANAGER.ast_from_file(py_file)
-                short_class_name_to_qname = {}
-                # 收集导入信息
-                for node in module.nodes_of_class(astroid.ImportFrom):
-                    # 对于import from ... import ... 的语句，modname为空
-                    # 对这种情况进行特殊处理：找到有多少个.
-                    module_name = node.modname
-                    current_file_path = py_file
-                    if node.level is not None:
-                        for _ in range(node.level - 1):
-                            current_file_path = os.path.dirname(current_file_path)
-
-                    full_module_name = self.get_module_qname(
-                        module_name, current_file_path, repo_path
-                    )
-                    for name, alias in node.names:
-                        imported_name = alias or name
-                        short_class_name_to_qname[imported_name] = (
-                            f"{full_module_name}.{name}"
-                            if full_module_name != ""
-                            else name
+    def get_file_module_qname(self, py_file):
+        """
+        获取与astroid.MANAGER.ast_from_file一致的模块名，包的__init__.py以包名作为模块名
+
+        Args:
+            py_file: str, py文件路径
+
+        Returns:
+            str: 模块名
+        """
+        try:
+            module_qname = ".".join(modpath_from_file(py_file))
+        except ImportError:
+            module_qname = py_file
+        if module_qname.endswith(".__init__"):
+            module_qname = module_qname[: -len(".__init__")]
+        return module_qname
+
+    def get_module_class_name(self, py_file, repo_path):
+        """
+        获取py文件的模块名经convert_qname_to_class_name转换后的结果，即文件中顶层类名的前缀
+        """
+        return self.convert_qname_to_class_name(self.get_file_module_qname(py_file), repo_path)
+
+    def parse_file(self, py_file, repo_path, fast=None):
+        """
+        解析单个py文件，提取其中所有类的ClassInfo片段
+
+        Args:
+            py_file: str, py文件路径
+            repo_path: str, 仓库根路径
+            fast: bool, 是否使用快速模式，为None时由self.fast决定
+
+        Returns:
+            dict: 可json序列化的解析结果，解析失败时返回None
+                classes: list[dict], 文件中按出现顺序排列的ClassInfo字典，children_classes为空，
+                    懒加载模式下code为None
+                imports: dict[str, str], 导入别名到完整名称的映射
+                base_counts: dict[str, int], 快速模式下直接确定与回退推断的父类数量
+                local_bases: list[str], 快速模式下由导入直接确定的仓库本地父类，需要确认它们是仓库中定义的类
+        """
+        with self.profiler.file(py_file):
+            return self.parse_file_classes(py_file, repo_path, self.fast if fast is None else fast)
+
+    def parse_file_in_worker(self, py_file, repo_path, fast=None):
+        """
+        多进程模式下在子进程中解析文件，同时取出子进程中父类推断缓存和分析器记录的统计，交给父进程合并
+
+        Returns:
+            tuple: (parse_file的解析结果, BaseInferenceCache.drain的统计, PhaseProfiler.drain的统计，未开启性能分析时为None)
+        """
+        result = self.parse_file(py_file, repo_path, fast)
+        return result, self.inference_cache.drain(), self.profiler.drain() if self.profiler.enabled else None
+
+    def parse_file_classes(self, py_file, repo_path, fast):
+        """
+        parse_file的实现，不计入文件耗时
+        """
+        classes = []
+        try:
+            # 源代码只读取一次，所有类的代码片段都从这份缓冲中截取
+            with self.profiler.phase("read"):
+                with open(py_file, "rb") as f:
+                    source = f.read()
+                line_offsets = [0]
+                for line in source.splitlines(keepends=True):
+                    line_offsets.append(line_offsets[-1] + len(line))
+                lines = None if self.lazy_code else read_source_lines(source)
+            # 解析代码
+            if fast:
+                short_class_name_to_qname, module_bindings, class_nodes, base_counts, local_bases = (
+                    self.parse_module_fast(py_file, source, repo_path)
+                )
+            else:
+                short_class_name_to_qname, module_bindings, class_nodes = self.parse_module(
+                    py_file, source, repo_path
+                )
+                base_counts = {"fast": 0, "fallback": 0}
+                local_bases = []
+
+            base_targets = []
+            for node, class_name, parent_classes, class_base_targets in class_nodes:
+                base_targets.append(class_base_targets)
+                # 记录ClassInfo所需的信息，懒加载模式下不截取code
+                classes.append(
+                    {
+                        "class_name": class_name,
+                        "parent_classes": parent_classes,
+                        "children_classes": [],
+                        "code": None if lines is None else self.get_source_segment(py_file, node, lines),
+                        "code_span": self.get_source_span(py_file, node, line_offsets),
+                    }
+                )
+        except Exception as e:
+            print(f"处理文件 {py_file} 时出错: {str(e)}")
+            self.profiler.record_failure(py_file, e)
+            return None
+        return {
+            "classes": classes,
+            "imports": short_class_name_to_qname,
+            "base_counts": base_counts,
+            "local_bases": local_bases,
+            "exports": module_bindings.exports(),
+            "base_targets": base_targets,
+        }
+
+    def collect_import_from(self, short_class_name_to_qname, module_name, level, names, py_file, repo_path):
+        """
+        将from ... import ...语句导入的名称加入short_class_name_to_qname
+
+        Args:
+            short_class_name_to_qname: dict[str, str], 导入别名到完整名称的映射
+            module_name: str, 模块名称，对于from . import ...为空
+            level: int, 相对导入的层级，绝对导入为0或None
+            names: list[tuple[str, str]], (name, alias)列表
+            py_file: str, 当前py文件路径
+            repo_path: str, 仓库根路径
+        """
+        # 对于import from ... import ... 的语句，modname为空
+        # 对这种情况进行特殊处理：找到有多少个.
+        current_file_path = py_file
+        if level is not None:
+            for _ in range(level - 1):
+                current_file_path = os.path.dirname(current_file_path)
+
+        full_module_name = self.get_module_qname(module_name, current_file_path, repo_path, level)
+        for name, alias in names:
+            imported_name = alias or name
+            short_class_name_to_qname[imported_name] = (
+                f"{full_module_name}.{name}"
+                if full_module_name != ""
+                else name
+            )
+
+    def collect_import(self, short_class_name_to_qname, names, py_file, repo_path):
+        """
+        将import ...语句导入的名称加入short_class_name_to_qname，参数同collect_import_from
+        """
+        for name, alias in names:
+            imported_name = alias or name.split(".")[-1]
+            full_module_name = self.get_module_qname(name, py_file, repo_path)
+            short_class_name_to_qname[imported_name] = full_module_name
+
+    def infer_base_class_name(self, base, module_bindings, short_class_name_to_qname, repo_path):
+        """
+        使用astroid推断父类的完整名称，推断失败时按导入别名替换
+
+        Args:
+            base: astroid.nodes.NodeNG, ClassDef.bases中的节点
+            module_bindings: ModuleBindings, 当前模块中名称的绑定，决定能否使用父类推断缓存
+            short_class_name_to_qname: dict[str, str], 导入别名到完整名称的映射
+            repo_path: str, 仓库根路径
+
+        Returns:
+            str: 父类的完整名称
+        """
+        key = None
+        if self.inference_cache is not None:
+            key = self.inference_cache.make_key(
+                base, module_bindings, short_class_name_to_qname, self.module_resolver, repo_path
+            )
+        if key is not None:
+            hit, base_qname = self.inference_cache.get(key)
+            if hit:
+                if base_qname is INFERENCE_FAILED:
+                    return self.replace_short_class_name(base.as_string(), short_class_name_to_qname)
+                return self.convert_qname_to_class_name(base_qname, repo_path)
+        try:
+            # 使用infer来获得base的完整名称
+            with self.profiler.phase("infer"):
+                base_qname = base.inferred()[0].qname()
+            base_class_name = self.convert_qname_to_class_name(base_qname, repo_path)
+        except Exception as e:
+            base_qname = INFERENCE_FAILED
+            base_class_name = self.replace_short_class_name(base.as_string(), short_class_name_to_qname)
+        if key is not None:
+            self.inference_cache.put(key, base_qname)
+        return base_class_name
+
+    def replace_short_class_name(self, base_class_name, short_class_name_to_qname):
+        for short_class_name in short_class_name_to_qname:
+            if base_class_name.startswith(short_class_name):
+                # 将base_class_name中的class_name替换为class_name_to_qname[class_name]
+                return (
+                    short_class_name_to_qname[short_class_name]
+                    + base_class_name[len(short_class_name) :]
+                )
+        return base_class_name
+
+    def parse_module(self, py_file, source, repo_path):
+        """
+        使用astroid解析py文件，所有父类都通过推断得到
+
+        Args:
+            py_file: str, py文件路径
+            source: bytes, 文件内容
+            repo_path: str, 仓库根路径
+
+        Returns:
+            tuple:
+                dict[str, str]: 导入别名到完整名称的映射
+                ModuleBindings: 模块中名称的绑定
+                list[tuple]: (ClassDef节点, class_name, parent_classes, base_targets)列表，base_targets见get_base_target
+        """
+        with self.profiler.phase("astroid_parse"):
+            module = MANAGER.ast_from_file(py_file)
+        # 一次遍历同时收集导入语句和类定义
+        import_from_nodes, import_nodes, class_def_nodes = [], [], []
+        visitor = ModuleVisitor()
+        visitor.register(astroid.nodes.ImportFrom, lambda node, scope: import_from_nodes.append(node))
+        visitor.register(astroid.nodes.Import, lambda node, scope: import_nodes.append(node))
+        visitor.register(astroid.nodes.ClassDef, lambda node, scope: class_def_nodes.append(node))
+        visitor.visit(module)
+        module_bindings = self.collect_module_bindings(py_file, source)
+
+        short_class_name_to_qname = {}
+        # 收集导入信息，from ... import ...先于import ...处理，同名时后者覆盖前者
+        for node in import_from_nodes:
+            self.collect_import_from(
+                short_class_name_to_qname, node.modname, node.level, node.names, py_file, repo_path
+            )
+        for node in import_nodes:
+            self.collect_import(short_class_name_to_qname, node.names, py_file, repo_path)
+
+        # 遍历module中的所有类
+        class_nodes = []
+        for node in class_def_nodes:
+            # class_name要求完整名称
+            class_name = node.qname()
+            # 用convert_qname_to_class_name函数将class_name转换为完整名称
+            class_name = self.convert_qname_to_class_name(class_name, repo_path)
+            # 找到node的直接父类，用base来做
+            parent_classes = [
+                self.infer_base_class_name(base, module_bindings, short_class_name_to_qname, repo_path)
+                for base in node.bases
+            ]
+            nested = node.parent.frame() is not module
+            base_targets = [
+                self.get_base_target(base.as_string(), node.lineno, nested, module_bindings, short_class_name_to_qname)
+                for base in node.bases
+            ]
+            class_nodes.append((node, class_name, parent_classes, base_targets))
+        return short_class_name_to_qname, module_bindings, class_nodes
+
+    def collect_module_bindings(self, py_file, source):
+        """
+        使用标准库ast收集模块中名称的绑定，它决定父类推断能否使用缓存，与快速模式相同
+
+        Returns:
+            ModuleBindings: 模块中名称的绑定
+        """
+        with self.profiler.phase("ast_parse"):
+            tree = ast.parse(source, filename=py_file)
+        module_bindings = ModuleBindings()
+        visitor = ModuleVisitor()
+        module_bindings.register(visitor)
+        visitor.visit(tree)
+        return module_bindings
+
+    def parse_module_fast(self, py_file, source, repo_path):
+        """
+        使用标准库ast解析py文件，能够由导入信息直接确定的父类不再推断
+
+        父类为名称（Name）或属性链（Attribute）时，按名称在模块中的绑定直接确定：
+        在类定义之前于模块顶层定义的类、导入别名以及内置名称。名称被多次绑定（如同名的导入与类定义）、
+        被赋值、可能来自星号导入或被内层作用域覆盖时，与其余父类一样回退到astroid推断，
+        只有存在需要回退的父类时才会用astroid构建该文件的AST。
+
+        由导入确定的仓库本地父类记录在local_bases中，导入的名称可能是包的__init__.py等转而导出的，
+        其定义在其它模块中，因此所有文件解析完成后还要确认它们是仓库中定义的类（见verify_local_bases）。
+
+        Args:
+            py_file: str, py文件路径
+            source: bytes, 文件内容
+            repo_path: str, 仓库根路径
+
+        Returns:
+            tuple:
+                dict[str, str]: 导入别名到完整名称的映射
+                ModuleBindings: 模块中名称的绑定
+                list[tuple]: (ClassDef节点, class_name, parent_classes, base_targets)列表，base_targets见get_base_target
+                dict[str, int]: fast为直接确定的父类数量，fallback为回退到astroid推断的父类数量
+                list[str]: 由导入直接确定的仓库本地父类
+        """
+        with self.profiler.phase("ast_parse"):
+            tree = ast.parse(source, filename=py_file)
+        module_qname = self.get_file_module_qname(py_file)
+
+        # 一次遍历同时收集导入语句、名称的绑定和类定义，类定义同时记录其所在作用域
+        import_from_nodes, import_nodes, class_scoped_nodes = [], [], []
+        module_bindings = ModuleBindings()
+        visitor = ModuleVisitor()
+        visitor.register(ast.ImportFrom, lambda node, scope: import_from_nodes.append(node))
+        visitor.register(ast.Import, lambda node, scope: import_nodes.append(node))
+        visitor.register(ast.ClassDef, lambda node, scope: class_scoped_nodes.append((node, scope)))
+        module_bindings.register(visitor)
+        visitor.visit(tree)
+
+        short_class_name_to_qname = {}
+        # 收集导入信息，from ... import ...先于import ...处理，同名时后者覆盖前者
+        for node in import_from_nodes:
+            self.collect_import_from(
+                short_class_name_to_qname,
+                node.module or "",
+                node.level,
+                [(alias.name, alias.asname) for alias in node.names],
+                py_file,
+                repo_path,
+            )
+        for node in import_nodes:
+            self.collect_import(
+                short_class_name_to_qname,
+                [(alias.name, alias.asname) for alias in node.names],
+                py_file,
+                repo_path,
+            )
+
+        class_nodes = []
+        base_counts = {"fast": 0, "fallback": 0}
+        local_bases = []
+        astroid_class_nodes = None
+        for node, scope in class_scoped_nodes:
+            scope_qname = ".".join((module_qname,) + scope)
+            class_name = self.convert_qname_to_class_name(f"{scope_qname}.{node.name}", repo_path)
+            parent_classes = []
+            for base_index, base in enumerate(node.bases):
+                resolved = self.resolve_base_class_name(
+                    base, node.lineno, bool(scope), module_qname, module_bindings, short_class_name_to_qname, repo_path
+                )
+                if resolved is None:
+                    # 回退到astroid推断，按位置找到对应的astroid ClassDef节点
+                    if astroid_class_nodes is None:
+                        astroid_class_nodes = {}
+                        visitor = ModuleVisitor()
+                        visitor.register(
+                            astroid.nodes.ClassDef,
+                            lambda class_node, scope: astroid_class_nodes.setdefault(
+                                (class_node.lineno, class_node.col_offset), class_node
+                            ),
                         )
-                for node in module.nodes_of_class(astroid.Import):
-                    for name, alias in node.names:
-                        imported_name = alias or name.split(".")[-1]
-                        full_module_name = self.get_module_qname(
-                            name, py_file, repo_path
+                        with self.profiler.phase("astroid_parse"):
+                            module = MANAGER.ast_from_file(py_file)
+                        visitor.visit(module)
+                    astroid_class_node = astroid_class_nodes.get((node.lineno, node.col_offset))
+                    if astroid_class_node is None:
+                        base_class_name = self.replace_short_class_name(
+                            ast.unparse(base), short_class_name_to_qname
                         )
-                        short_class_name_to_qname[imported_name] = full_module_name
-
-                # 遍历module中的所有类
-                for node in module.nodes_of_class(astroid.ClassDef):
-                    # 创建ClassInfo对象
-                    # class_name要求完整名称
-                    class_name = node.qname()
-                    # 用convert_qname_to_class_name函数将class_name转换为完整名称
-                    class_name = self.convert_qname_to_class_name(class_name, repo_path)
-                    # 找到node的直接父类，用base来做
-                    parent_classes = []
-                    for base in node.bases:
-                        try:
-                            # 使用infer来获得base的完整名称
-                            base_class_name = base.inferred()[0].qname()
-                            base_class_name = self.convert_qname_to_class_name(
-                                base_class_name, repo_path
-                            )
-                        except Exception as e:
-                            base_class_name = base.as_string()
-                            for short_class_name in short_class_name_to_qname:
-                                if base_class_name.startswith(short_class_name):
-                                    # 将base_class_name中的class_name替换为class_name_to_qname[class_name]
-                                    base_class_name = (
-                                        short_class_name_to_qname[short_class_name]
-                                        + base_class_name[len(short_class_name) :]
-                                    )
-                                    break
-                        parent_classes.append(base_class_name)
-
-                    # 创建ClassInfo对象
-                    class_info = ClassInfo(
-                        class_name,
-                        parent_classes,
-                        [],
-                        self.get_source_segment(py_file, node),
-                    )
-                    # 建立一个字典，key为class_name，value为class_info
-                    class_info_dict[class_name] = class_info
+                    else:
+                        base_class_name = self.infer_base_class_name(
+                            astroid_class_node.bases[base_index], module_bindings, short_class_name_to_qname, repo_path
+                        )
+                    base_counts["fallback"] += 1
+                else:
+                    base_class_name, is_local = resolved
+                    if is_local:
+                        local_bases.append(base_class_name)
+                    base_counts["fast"] += 1
+                parent_classes.append(base_class_name)
+            base_targets = [
+                self.get_base_target(ast.unparse(base), node.lineno, bool(scope), module_bindings, short_class_name_to_qname)
+                for base in node.bases
+            ]
+            class_nodes.append((node, class_name, parent_classes, base_targets))
+        return short_class_name_to_qname, module_bindings, class_nodes, base_counts, local_bases
+
+    def get_base_target(self, base_string, lineno, nested, module_bindings, short_class_name_to_qname):
+        """
+        父类表达式引用的当前模块之外的名称，增量更新时据此判断父类是否需要重新推断（见find_affected_bases）
+
+        Args:
+            base_string: str, 父类表达式
+            lineno: int, 类定义所在的行号
+            nested: bool, 类是否定义在其它类或函数中
+            module_bindings: ModuleBindings, 当前模块中名称的绑定
+            short_class_name_to_qname: dict[str, str], 导入别名到完整名称的映射
+
+        Returns:
+            str: 第一个名称来自导入时为导入后的完整名称，只取决于当前模块（同一模块中定义的类、内置名称）时为空字符串，
+                无法确定时为None
+        """
+        if not DOTTED_NAME.fullmatch(base_string):
+            return None
+        head, dot, tail = base_string.partition(".")
+        binding = module_bindings.lookup(head, lineno, nested)
+        if binding == "import" and head in short_class_name_to_qname:
+            return short_class_name_to_qname[head] + dot + tail
+        if binding in ("class", "unbound"):
+            return ""
+        return None
+
+    def resolve_base_class_name(
+        self, base, lineno, nested, module_qname, module_bindings, short_class_name_to_qname, repo_path
+    ):
+        """
+        不经推断，直接确定父类的完整名称
+
+        Args:
+            base: ast.expr, ClassDef.bases中的节点
+            lineno: int, 类定义所在的行号
+            nested: bool, 类是否定义在其它类或函数中
+            module_qname: str, 当前模块的完整名称
+            module_bindings: ModuleBindings, 当前模块中名称的绑定
+            short_class_name_to_qname: dict[str, str], 导入别名到完整名称的映射
+            repo_path: str, 仓库根路径
+
+        Returns:
+            tuple: (父类的完整名称, 是否为由导入确定的仓库本地名称)，无法直接确定时返回None
+        """
+        # 将a.b.C拆分为a和.b.C
+        attributes = []
+        while isinstance(base, ast.Attribute):
+            attributes.append(base.attr)
+            base = base.value
+        if not isinstance(base, ast.Name):
+            return None
+        suffix = "".join(f".{attribute}" for attribute in reversed(attributes))
+        binding = module_bindings.lookup(base.id, lineno, nested)
+        if binding == "class":
+            if suffix:
+                return None
+            return self.convert_qname_to_class_name(f"{module_qname}.{base.id}", repo_path), False
+        if binding == "import" and base.id in short_class_name_to_qname:
+            import_target = short_class_name_to_qname[base.id]
+            base_class_name = import_target + suffix
+            if not self.module_resolver.is_external(base_class_name):
+                if self.module_resolver.is_local_module(import_target) or self.module_resolver.is_local_module(
+                    import_target.rpartition(".")[0]
+                ):
+                    return base_class_name, True
+                # 导入的模块既不是外部库也不在仓库中（如未安装的第三方库），不可能是仓库中的类，
+                # astroid同样无法推断，与推断失败时一样按导入别名替换
+                return self.replace_short_class_name(base.id + suffix, short_class_name_to_qname), False
+            # 外部库的导入名称可能是转而导出的，如json.JSONDecoder定义在json.decoder中，
+            # 与astroid推断一样取定义所在的位置
+            base_qname = self.infer_external_qname(base_class_name)
+            if base_qname is INFERENCE_FAILED:
+                return self.replace_short_class_name(base.id + suffix, short_class_name_to_qname), False
+            return self.convert_qname_to_class_name(base_qname, repo_path), False
+        if binding == "unbound" and not suffix and isinstance(getattr(builtins, base.id, None), type):
+            return f"builtins.{base.id}", False
+        return None
+
+    def infer_external_qname(self, target):
+        """
+        确定外部库中名称的定义位置，结果存入父类推断缓存（与infer_base_class_name使用相同的键），在文件和仓库之间共享
+
+        Args:
+            target: str, 导入的完整名称，如json.JSONDecoder
+
+        Returns:
+            str: 名称定义处的qname，无法确定时返回INFERENCE_FAILED
+        """
+        key = ("", target)
+        if self.inference_cache is not None:
+            hit, base_qname = self.inference_cache.get(key)
+            if hit:
+                return base_qname
+        base_qname = INFERENCE_FAILED
+        parts = target.split(".")
+        # 从最长的前缀开始查找模块，剩余部分为模块中的属性
+        for end in range(len(parts), 0, -1):
+            try:
+                with self.profiler.phase("infer"):
+                    node = MANAGER.ast_from_module_name(".".join(parts[:end]))
+                    for attribute in parts[end:]:
+                        node = next(node.igetattr(attribute))
+                    qname = node.qname()
             except Exception as e:
-                print(f"处理文件 {py_file} 时出错: {str(e)}")
                 continue
+            # 无法推断时astroid返回Uninferable而不是字符串
+            if isinstance(qname, str):
+                base_qname = qname
+            break
+        if self.inference_cache is not None:
+            self.inference_cache.put(key, base_qname)
+        return base_qname
+
+    def parse_files(self, py_files, repo_path, fast=None):
+        """
+        解析一组py文件，workers大于1时使用多进程
+
+        Args:
+            py_files: list[str], py文件路径
+            repo_path: str, 仓库根路径
+            fast: bool, 是否使用快速模式，为None时由self.fast决定
+
+        Returns:
+            list[dict]: 与py_files一一对应的parse_file解析结果
+        """
+        if self.workers > 1 and len(py_files) > 1:
+            # 多进程模式：按文件分片交给子进程解析，每个子进程返回可pickle的解析片段
+            # executor.map按输入顺序返回结果，保证合并顺序与串行模式一致
+            # 子进程同时返回新增的父类推断缓存和命中统计，开启性能分析时还返回其中记录的统计，由父进程合并
+            chunksize = max(1, len(py_files) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(
+                    executor.map(
+                        self.parse_file_in_worker,
+                        py_files,
+                        [repo_path] * len(py_files),
+                        [fast] * len(py_files),
+                        chunksize=chunksize,
+                    )
+                )
+            for _, inference_snapshot, profiler_snapshot in results:
+                self.inference_cache.merge(inference_snapshot)
+                if profiler_snapshot is not None:
+                    self.profiler.merge(profiler_snapshot)
+            return [result for result, _, _ in results]
+        results = []
+        for py_file in py_files:
+            results.append(self.parse_file(py_file, repo_path, fast))
+            # 在两个文件之间淘汰astroid缓存中的外部模块
+            if self.astroid_cache is not None:
+                self.astroid_cache.trim()
+        return results
+
+    def parse_files_deduplicated(self, py_files, file_results, indices, repo_path, store_candidates, duplicate_of):
+        """
+        借助content_store解析py_files中下标为indices的文件，内容相同且可复用的文件只解析一次，结果写入file_results的对应位置
+
+        先暂时采用content_store中已有的结果，再解析每种内容的第一个文件，
+        其余文件暂时采用本次新解析的结果，仍无法复用的文件（位置相关且路径不同）单独解析。
+        暂时采用的结果还取决于文件导入的本地模块，由调用者在得到依赖指纹之后确认（见collect_file_results）。
+
+        Args:
+            py_files: list[str], py文件路径
+            file_results: list[dict], 与py_files一一对应的解析结果
+            indices: list[int], 需要解析的文件下标
+            repo_path: str, 仓库根路径
+            store_candidates: dict[int, list[tuple]], 写入采用content_store中结果的文件下标到ContentStore.lookup的结果
+            duplicate_of: dict[int, int], 写入采用本次新解析结果的文件下标到被复用的文件下标
+        """
+        variant = "fast" if self.fast else ""
+        file_digests = self.get_file_digests([py_files[index] for index in indices])
+        digests = {index: ContentStore.make_digest(file_digests[py_files[index]], variant) for index in indices}
+
+        def lookup_pending(indices):
+            # 复用content_store中的结果，返回仍需解析的文件下标
+            pending_indices = []
+            for index in indices:
+                candidates = []
+                if digests[index] is not None:
+                    candidates = self.content_store.lookup(
+                        digests[index],
+                        self.get_module_class_name(py_files[index], repo_path),
+                        os.path.relpath(py_files[index], repo_path),
+                        py_files[index],
+                        self.module_resolver,
+                    )
+                if candidates:
+                    file_results[index] = candidates[0][0]
+                    store_candidates[index] = candidates
+                else:
+                    pending_indices.append(index)
+            return pending_indices
+
+        def parse(indices):
+            for index, result in zip(indices, self.parse_files([py_files[index] for index in indices], repo_path)):
+                file_results[index] = result
+
+        # 先复用之前仓库中的解析结果
+        pending_indices = lookup_pending(indices)
+        # 每种内容只解析第一个文件，其余文件复用它的结果
+        representative_indices = {}
+        duplicate_indices = []
+        for index in pending_indices:
+            if digests[index] is not None and digests[index] in representative_indices:
+                duplicate_indices.append(index)
+            else:
+                representative_indices[digests[index]] = index
+        parse(list(representative_indices.values()))
+        # 与位置相关且路径不同的文件无法复用，单独解析
+        unresolved_indices = []
+        for index in duplicate_indices:
+            representative_index = representative_indices[digests[index]]
+            result = file_results[representative_index]
+            if result is not None and (
+                os.path.relpath(py_files[index], repo_path) == os.path.relpath(py_files[representative_index], repo_path)
+                or all(self.module_resolver.is_external(target) for target in result["imports"].values())
+            ):
+                file_results[index] = rewrite_module_class_name(
+                    result,
+                    self.get_module_class_name(py_files[representative_index], repo_path),
+                    self.get_module_class_name(py_files[index], repo_path),
+                    py_files[index],
+                )
+                duplicate_of[index] = representative_index
+            else:
+                unresolved_indices.append(index)
+        parse(unresolved_indices)
+
+    def build_class_inheritance_graph(self, repo_path):
+        with self.profiler.phase("discover"):
+            # 遍历repo_path下的所有py文件
+            self.py_files = glob.glob(os.path.join(repo_path, "**/*.py"), recursive=True)
+            # 建立仓库本地模块索引，用于区分外部库与本地模块
+            self.module_resolver = ModuleResolver.from_files(repo_path, self.py_files)
+        # 每个文件中定义的类和导入，监视模式下只替换改变的文件的部分
+        self.file_class_infos: dict[str, list[ClassInfo]] = {}
+        self.file_imports: dict[str, dict[str, str]] = {}
+        # 每个文件顶层名称的绑定和父类引用的名称，监视模式下据此找到需要重新推断的父类
+        self.file_exports: dict[str, dict[str, str] | None] = {}
+        self.file_base_targets: dict[str, list[list[str | None]]] = {}
+        # 文件之间的导入依赖图，计算依赖指纹或增量更新时建立，之后随文件的改变增量更新
+        self.dependency_graph: DependencyGraph | None = None
+        self.base_counts = {"fast": 0, "fallback": 0}
+        self.add_file_results(self.py_files, self.collect_file_results(self.py_files, repo_path))
+        with self.profiler.phase("link"):
+            return self.link_class_infos()
+
+    def collect_file_results(self, py_files, repo_path):
+        """
+        获取一组py文件的解析结果，优先使用解析缓存和content_store，其余文件解析后写入缓存和content_store
+
+        缓存和content_store中的结果还取决于文件导入的本地模块，因此在得到所有文件的导入别名表之后，
+        比较结果写入时与当前的依赖指纹，依赖的文件改变过（或与来源文件的依赖不同）的结果重新解析。
+
+        Args:
+            py_files: list[str], py文件路径
+            repo_path: str, 仓库根路径
+
+        Returns:
+            list[dict]: 与py_files一一对应的parse_file解析结果
+        """
+        file_results = [None] * len(py_files)
+        cache_keys = [None] * len(py_files)
+        cached_fingerprints = {}
+        # 先查询解析缓存，内容未改变的文件不再解析
+        if self.cache is not None:
+            with self.profiler.phase("parse_cache"):
+                file_digests = self.get_file_digests(py_files)
+                for index, py_file in enumerate(py_files):
+                    cache_keys[index] = self.cache.make_key(
+                        py_file,
+                        repo_path,
+                        file_digests[py_file],
+                        variant="fast" if self.fast else "",
+                        local_top_level_names=self.module_resolver.local_top_level_names,
+                    )
+                    entry = self.cache.get(cache_keys[index])
+                    if entry is not None:
+                        file_results[index], cached_fingerprints[index] = entry
+        missing_indices = [index for index, result in enumerate(file_results) if result is None]
+        store_candidates, duplicate_of = {}, {}
+        with self.profiler.phase("parse_files"):
+            if self.content_store is not None:
+                self.parse_files_deduplicated(
+                    py_files, file_results, missing_indices, repo_path, store_candidates, duplicate_of
+                )
+            else:
+                self.parse_missing_files(py_files, file_results, missing_indices, repo_path)
+
+        stale_indices = []
+        if self.cache is not None or self.content_store is not None:
+            with self.profiler.phase("fingerprint"):
+                fingerprints = self.get_fingerprints(py_files, file_results, repo_path)
+            stale_indices = [
+                index for index, fingerprint in cached_fingerprints.items() if fingerprint != fingerprints[index]
+            ]
+            if self.cache is not None:
+                self.cache.stale += len(stale_indices)
+            for index, candidates in store_candidates.items():
+                file_results[index] = ContentStore.match_fingerprint(candidates, fingerprints[index])
+                if file_results[index] is None:
+                    stale_indices.append(index)
+            for index, representative_index in duplicate_of.items():
+                if fingerprints[index] != fingerprints[representative_index]:
+                    stale_indices.append(index)
+            # 文件内容没有改变，导入别名表也不变，重新解析后依赖指纹仍然有效
+            with self.profiler.phase("parse_files"):
+                self.parse_missing_files(py_files, file_results, stale_indices, repo_path)
+        verified_indices = self.verify_local_bases(py_files, file_results, repo_path) if self.fast else []
+
+        # 本次解析（而不是复用）得到的结果
+        reused_indices = (set(store_candidates) | set(duplicate_of)) - set(stale_indices)
+        parsed_indices = sorted((set(missing_indices) - reused_indices) | set(stale_indices) | set(verified_indices))
+        if self.content_store is not None:
+            with self.profiler.phase("content_store"):
+                for index in parsed_indices:
+                    py_file = py_files[index]
+                    self.content_store.add(
+                        ContentStore.make_digest(self.file_digests[py_file], "fast" if self.fast else ""),
+                        file_results[index],
+                        self.get_module_class_name(py_file, repo_path),
+                        os.path.relpath(py_file, repo_path),
+                        fingerprints[index],
+                    )
+                self.content_store.commit()
+                self.content_store.count(len(missing_indices), len(reused_indices))
+        if self.cache is not None:
+            with self.profiler.phase("parse_cache"):
+                for index in sorted(set(missing_indices) | set(parsed_indices)):
+                    # 解析失败的文件不写入缓存，下次运行时重新报告错误
+                    if file_results[index] is not None:
+                        self.cache.put(cache_keys[index], file_results[index], fingerprints[index])
+                self.cache.commit()
+        return file_results
+
+    def parse_missing_files(self, py_files, file_results, indices, repo_path):
+        """
+        解析py_files中下标为indices的文件，结果写入file_results的对应位置
+        """
+        for index, result in zip(indices, self.parse_files([py_files[index] for index in indices], repo_path)):
+            file_results[index] = result
+
+    def verify_local_bases(self, py_files, file_results, repo_path):
+        """
+        快速模式下，确认由导入直接确定的仓库本地父类都是仓库中定义的类
+
+        导入的名称可能由包的__init__.py等转而导出，此时导入的完整名称不是类定义所在的位置，
+        其它无法对应到类定义的情况也一样。这些文件改用astroid推断所有父类重新解析，结果写入file_results的对应位置。
+
+        Returns:
+            list[int]: 重新解析的文件在py_files中的下标
+        """
+        with self.profiler.phase("verify_local_bases"):
+            class_names = set()
+            py_file_set = set(py_files)
+            for py_file in self.py_files:
+                if py_file not in py_file_set:
+                    class_names.update(class_info.class_name for class_info in self.file_class_infos.get(py_file, ()))
+            for result in file_results:
+                if result is not None:
+                    class_names.update(class_info["class_name"] for class_info in result["classes"])
+            indices = [
+                index
+                for index, result in enumerate(file_results)
+                if result is not None
+                and any(base_class_name not in class_names for base_class_name in result["local_bases"])
+            ]
+        if not indices:
+            return indices
+        # 不经过content_store，避免复用快速模式的结果
+        with self.profiler.phase("parse_files"):
+            results = self.parse_files([py_files[index] for index in indices], repo_path, fast=False)
+        for index, result in zip(indices, results):
+            if result is not None:
+                result["base_counts"] = {
+                    "fast": 0,
+                    "fallback": sum(len(class_info["parent_classes"]) for class_info in result["classes"]),
+                }
+            file_results[index] = result
+        return indices
+
+    def get_file_digests(self, py_files):
+        """
+        计算文件内容的哈希，已计算过的文件不再读取
+
+        Returns:
+            dict[str, str]: 所有已计算的文件路径到内容哈希的映射
+        """
+        for py_file in py_files:
+            if py_file not in self.file_digests:
+                self.file_digests[py_file] = get_file_digest(py_file)
+        return self.file_digests
+
+    def get_fingerprints(self, py_files, file_results, repo_path):
+        """
+        按仓库中所有文件当前的导入别名表计算py_files的依赖指纹
+
+        py_files的导入别名表取自file_results，其余文件取自之前的结果。
+
+        Returns:
+            list[str]: 与py_files一一对应的依赖指纹
+        """
+        dependency_graph = self.get_dependency_graph()
+        for py_file, result in zip(py_files, file_results):
+            dependency_graph.update_imports(py_file, result["imports"] if result is not None else {})
+        fingerprints = dependency_graph.fingerprints(self.get_file_digests(self.py_files), py_files)
+        return [fingerprints[py_file] for py_file in py_files]
+
+    def get_dependency_graph(self):
+        """
+        Returns:
+            DependencyGraph: 按各文件当前的导入别名表建立的依赖图，第一次调用时建立
+        """
+        if self.dependency_graph is None:
+            self.dependency_graph = DependencyGraph(
+                self.repo_path, self.py_files, self.file_imports, self.module_resolver
+            )
+        return self.dependency_graph
+
+    def add_file_results(self, py_files, file_results):
+        """
+        将解析结果转换为ClassInfo，按文件记录，替换这些文件之前的结果
+        """
+        for py_file, result in zip(py_files, file_results):
+            if result is None:
+                self.file_class_infos[py_file] = []
+                self.file_imports[py_file] = {}
+                self.file_exports[py_file] = None
+                self.file_base_targets[py_file] = []
+            else:
+                for tier, count in result["base_counts"].items():
+                    self.base_counts[tier] += count
+                self.file_class_infos[py_file] = [
+                    ClassInfo.from_dict(class_info, lazy_code=self.lazy_code) for class_info in result["classes"]
+                ]
+                self.file_imports[py_file] = result["imports"]
+                self.file_exports[py_file] = result["exports"]
+                self.file_base_targets[py_file] = result["base_targets"]
+            if self.dependency_graph is not None:
+                self.dependency_graph.update_imports(py_file, self.file_imports[py_file])
+
+    def link_class_infos(self):
+        """
+        按文件顺序合并各文件的ClassInfo并建立children_classes，不需要解析文件
+
+        Returns:
+            dict[str, ClassInfo]: key为class_name，value为class_info
+        """
+        # 合并各文件的片段，建立一个字典，key为class_name，value为class_info
+        class_info_dict: dict[str, ClassInfo] = {}
+        for py_file in self.py_files:
+            for class_info in self.file_class_infos[py_file]:
+                class_info.children_classes = []
+                class_info_dict[class_info.class_name] = class_info
         # 找到每个ClassInfo的children_classes
         for class_name, class_info in class_info_dict.items():
             for parent_class in class_info.parent_classes:
@@ -207,53 +1113,375 @@ class Class_Inheritance_Graph:
 
         return class_info_dict
 
+    def update_files(self, changed_files=(), removed_files=()):
+        """
+        增量更新类继承图：只重新解析新增和修改的文件，其余文件沿用之前的结果
+
+        文件列表和依赖图只更新改变的文件（新增文件时按glob的顺序插入文件列表，与重新构建时的顺序一致）。
+        只修改文件时，导入了它们的文件中只有经由改变的名称绑定推断的父类重新推断（见find_affected_bases）；
+        新增或删除文件时模块的查找路径随之改变，直接或间接导入了改变的模块的文件都重新解析。
+
+        改变的模块会从astroid的缓存中移除，astroid和父类推断缓存中与仓库本地模块相关的结果会被清空。
+        children_classes和nn_moudles_subclass随后按全部文件重新建立（不需要解析），
+        因此更新后的结果与重新构建整个仓库相同。
+
+        Args:
+            changed_files: Iterable[str], 新增或修改的py文件，路径形式与glob的结果一致
+            removed_files: Iterable[str], 删除的py文件
+
+        Returns:
+            dict: 本次更新的统计，包括重新解析的文件数、重新推断的父类数和耗时（秒）
+        """
+        start_time = time.perf_counter()
+        repo_path = self.repo_path
+        changed_files = set(changed_files)
+        removed_files = {py_file for py_file in removed_files if py_file in self.file_class_infos}
+        for py_file in changed_files | removed_files:
+            self.file_digests.pop(py_file, None)
+        dependency_graph = self.get_dependency_graph()
+        added_files = {py_file for py_file in changed_files if py_file not in self.file_class_infos}
+        file_set_changed = bool(added_files or removed_files)
+        reparse_files = set(changed_files)
+        if file_set_changed:
+            # 直接或间接导入了改变的模块的文件，包括导入之前不存在的模块的文件
+            reparse_files |= dependency_graph.transitive_dependents(changed_files | removed_files) - removed_files
+            if added_files:
+                self.py_files = glob.glob(os.path.join(repo_path, "**/*.py"), recursive=True)
+            else:
+                self.py_files = [py_file for py_file in self.py_files if py_file not in removed_files]
+            self.module_resolver = ModuleResolver.from_files(repo_path, self.py_files)
+            dependency_graph.update_files(added_files, removed_files, self.module_resolver)
+            reparse_files |= dependency_graph.transitive_dependents(added_files)
+        reparse_files = [py_file for py_file in self.py_files if py_file in reparse_files]
+
+        invalidate_modules(
+            [self.get_file_module_qname(py_file) for py_file in changed_files | removed_files],
+            file_set_changed=file_set_changed,
+        )
+        self.inference_cache.discard_repo(repo_path)
+        for py_file in removed_files:
+            self.file_class_infos.pop(py_file, None)
+            self.file_imports.pop(py_file, None)
+            self.file_exports.pop(py_file, None)
+            self.file_base_targets.pop(py_file, None)
+
+        previous_exports = {py_file: self.file_exports.get(py_file) for py_file in changed_files}
+        previous_imports = {py_file: self.file_imports.get(py_file, {}) for py_file in changed_files}
+        if self.astroid_cache is not None:
+            self.astroid_cache.begin_repo(repo_path)
+        self.add_file_results(reparse_files, self.collect_file_results(reparse_files, repo_path))
+        reinferred_bases = 0
+        if not file_set_changed:
+            affected_bases = self.find_affected_bases(changed_files, previous_exports, previous_imports)
+            # 快速模式下父类的结果还取决于本地父类能否确认（见verify_local_bases），这些文件重新解析
+            reinfer_files = [] if self.fast else [
+                py_file for py_file in affected_bases if self.reinfer_bases(py_file, affected_bases[py_file])
+            ]
+            dependent_files = [
+                py_file for py_file in self.py_files if py_file in affected_bases and py_file not in reinfer_files
+            ]
+            self.add_file_results(dependent_files, self.collect_file_results(dependent_files, repo_path))
+            reparse_files += dependent_files
+            reinferred_bases = sum(len(affected_bases[py_file]) for py_file in reinfer_files)
+        if self.astroid_cache is not None:
+            self.astroid_cache_report = self.astroid_cache.finish_repo()
+
+        with self.profiler.phase("link"):
+            self.class_info_dict = self.link_class_infos()
+        self.nn_moudles_subclass = self.find_nn_modules(self.class_info_dict)
+        return {
+            "changed_files": len(changed_files),
+            "removed_files": len(removed_files),
+            "reparsed_files": len(reparse_files),
+            "reinferred_bases": reinferred_bases,
+            "elapsed": time.perf_counter() - start_time,
+        }
+
+    def find_affected_bases(self, changed_files, previous_exports, previous_imports):
+        """
+        修改文件（文件集合不变）后，找到推断结果可能随之改变的父类
+
+        父类引用的名称（见get_base_target）从导入它的模块开始，沿着各模块顶层名称的绑定
+        （转而导出的导入）找到定义它的模块：绑定为类定义且所在的模块没有改变、或者改变前后都是同一个类定义时，
+        推断结果不变；名称经由的模块没有改变、也没有导入改变的模块时同样不变。
+        其余情况（如赋值、星号导入、无法确定模块文件、绑定改变）保守地重新推断。
+
+        Args:
+            changed_files: set[str], 修改的文件，解析结果已经更新
+            previous_exports: dict[str, dict[str, str]], 修改的文件之前顶层名称的绑定
+            previous_imports: dict[str, dict[str, str]], 修改的文件之前的导入别名表
+
+        Returns:
+            dict[str, list[tuple[int, int]]]: 文件到需要重新推断的父类（类的下标, 父类的下标）的映射，不包括修改的文件
+        """
+        dependency_graph = self.get_dependency_graph()
+        affected_files = changed_files | dependency_graph.transitive_dependents(changed_files)
+        touched = {}
+
+        def binding_changed(module_file, name):
+            previous = previous_exports[module_file]
+            current = self.file_exports[module_file]
+            if previous is None or current is None or previous.get(name) != current.get(name):
+                return True
+            return previous_imports[module_file].get(name) != self.file_imports[module_file].get(name)
+
+        def touches(target):
+            if target in touched:
+                return touched[target]
+            # 循环导入时保守地认为受影响
+            touched[target] = True
+            result = True
+            if not dependency_graph.find_target_files(target) & affected_files:
+                result = False
+            else:
+                found = dependency_graph.find_module_file(target)
+                if found is not None and found[1]:
+                    module_file, (name, *suffix) = found
+                    exports = self.file_exports.get(module_file)
+                    binding = exports.get(name) if exports is not None else None
+                    if module_file in changed_files and binding_changed(module_file, name):
+                        binding = None
+                    if binding == "class":
+                        # 类的属性取决于类体
+                        result = bool(suffix) and module_file in changed_files
+                    elif binding == "import" and name in self.file_imports[module_file]:
+                        result = touches(".".join([self.file_imports[module_file][name]] + suffix))
+            touched[target] = result
+            return result
+
+        affected_bases = {}
+        for py_file in self.py_files:
+            if py_file not in affected_files or py_file in changed_files:
+                continue
+            bases = [
+                (class_index, base_index)
+                for class_index, base_targets in enumerate(self.file_base_targets[py_file])
+                for base_index, target in enumerate(base_targets)
+                if target is None or (target and touches(target))
+            ]
+            if bases:
+                affected_bases[py_file] = bases
+        return affected_bases
+
+    def reinfer_bases(self, py_file, bases):
+        """
+        使用astroid重新推断文件中的部分父类，文件本身没有改变，其余父类沿用之前的结果
+
+        Args:
+            py_file: str, py文件路径
+            bases: list[tuple[int, int]], (类的下标, 父类的下标)列表
+
+        Returns:
+            bool: 是否成功，类定义与之前的结果对应不上时返回False，由调用者重新解析文件
+        """
+        class_infos = self.file_class_infos[py_file]
+        try:
+            with self.profiler.phase("read"):
+                with open(py_file, "rb") as f:
+                    source = f.read()
+            module_bindings = self.collect_module_bindings(py_file, source)
+            with self.profiler.phase("astroid_parse"):
+                module = MANAGER.ast_from_file(py_file)
+        except Exception:
+            return False
+        class_def_nodes = []
+        visitor = ModuleVisitor()
+        visitor.register(astroid.nodes.ClassDef, lambda node, scope: class_def_nodes.append(node))
+        visitor.visit(module)
+        if len(class_def_nodes) != len(class_infos):
+            return False
+        for class_index, base_index in bases:
+            class_info = class_infos[class_index]
+            parent_classes = list(class_info.parent_classes)
+            parent_classes[base_index] = self.infer_base_class_name(
+                class_def_nodes[class_index].bases[base_index],
+                module_bindings,
+                self.file_imports[py_file],
+                self.repo_path,
+            )
+            class_info.parent_classes = parent_classes
+        return True
+
     def find_nn_modules(self, class_info_dict: dict[str, ClassInfo]):
-        # 此时class_info_dict中已经包含了所有类的继承关系
-        nn_moudles_subclass = {}
-        # 使用bfs的方法，找到所有is_nn_modules为True的类
-        for class_name, class_info in class_info_dict.items():
-            flag = False
-            for parent_class in class_info.parent_classes:
-                if parent_class in [
-                    "torch.nn.Module",
-                    "torch.nn.modules.module.Module",
-                ]:
-                    flag = True
-                    break
-            if flag:
-                # 使用bfs的方法，找到所有is_nn_modules为True的类
-                nn_moudles_subclass[class_name] = class_info
-                queue = [class_name]
-                while queue:
-                    current_class_name = queue.pop(0)
-                    for child_class_name in class_info_dict[
-                        current_class_name
-                    ].children_classes:
-                        if child_class_name not in nn_moudles_subclass:
-                            queue.append(child_class_name)
-                            nn_moudles_subclass[child_class_name] = class_info_dict[
-                                child_class_name
-                            ]
-        return nn_moudles_subclass
+        # 此时class_info_dict中已经包含了所有类的继承关系，建立继承索引后一次查询即可
+        with self.profiler.phase("nn_modules"):
+            self.ancestry_index = AncestryIndex(class_info_dict)
+            return {
+                class_name: class_info_dict[class_name]
+                for class_name in self.ancestry_index.descendants(NN_MODULE_ROOTS)
+            }
+
+    def find_subclasses(self, root_class_names):
+        """
+        找到继承自任意一个根类的所有类
+
+        Args:
+            root_class_names: Iterable[str], 根类的完整名称，如NN_MODULE_ROOTS
+
+        Returns:
+            dict[str, ClassInfo]: key为class_name，value为class_info
+        """
+        return {
+            class_name: self.class_info_dict[class_name]
+            for class_name in self.ancestry_index.descendants(root_class_names)
+        }
 
 
 if __name__ == "__main__":
-    import time
-    if len(sys.argv) == 1:
-        repo_path = "test_cases/resnet"
-        save_path = "module_info.json"
-    elif len(sys.argv) == 2:
-        repo_path = sys.argv[1]
-        save_path = "module_info.json"
-    else:
-        repo_path = sys.argv[1]
-        save_path = sys.argv[2]
+    arg_parser = argparse.ArgumentParser(description="构建仓库的类继承图")
+    arg_parser.add_argument("repo_path", nargs="?", default="test_cases/resnet")
+    arg_parser.add_argument("save_path", nargs="?", default="module_info.json")
+    arg_parser.add_argument(
+        "--format",
+        choices=["json", "jsonl", "store"],
+        default="json",
+        help="输出格式，jsonl为每行一个类的流式格式，nn模块只以类名引用；store为ClassGraphStore目录，可内存映射读取",
+    )
+    arg_parser.add_argument(
+        "--workers", type=int, default=1, help="并行解析文件的进程数，1表示串行"
+    )
+    arg_parser.add_argument(
+        "--cache-dir", default=None, help="解析缓存目录，不指定时不使用缓存"
+    )
+    arg_parser.add_argument(
+        "--cache-size", type=int, default=1 << 30, help="解析缓存的大小上限（字节）"
+    )
+    arg_parser.add_argument(
+        "--clear-cache", action="store_true", help="运行前清空解析缓存"
+    )
+    arg_parser.add_argument(
+        "--astroid-cache-size",
+        type=int,
+        default=None,
+        help="astroid缓存中外部模块的数量上限，指定时解析完成后释放仓库本地模块并报告缓存统计",
+    )
+    arg_parser.add_argument(
+        "--fast", action="store_true", help="使用ast直接确定父类，只有无法确定的父类才使用astroid推断"
+    )
+    arg_parser.add_argument(
+        "--lazy-code", action="store_true", help="只记录类代码的位置，导出时再读取代码"
+    )
+    arg_parser.add_argument(
+        "--dedup", action="store_true", help="按文件内容去重，内容相同的文件（如仓库中拷贝的第三方代码）只解析一次"
+    )
+    arg_parser.add_argument(
+        "--dedup-dir",
+        default=None,
+        help="内容去重的持久化目录，多次运行（如批量构建中的各个仓库）共用同一个目录即可在整个语料库中去重，指定时隐含--dedup",
+    )
+    arg_parser.add_argument(
+        "--watch", action="store_true", help="构建完成后持续监视仓库，文件改变时增量更新并重新写出结果，Ctrl+C退出"
+    )
+    arg_parser.add_argument(
+        "--watch-interval", type=float, default=0.5, help="监视模式下轮询文件的间隔（秒）"
+    )
+    arg_parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PROFILE_PATH",
+        help="记录各阶段耗时、每个文件的耗时、最慢的文件、解析失败的文件和峰值内存，"
+        "以JSON写出到PROFILE_PATH，不指定路径时为<save_path>.profile.json",
+    )
+    arg_parser.add_argument(
+        "--profile-slowest", type=int, default=20, help="性能报告中列出的最慢文件数量"
+    )
+    args = arg_parser.parse_args()
+    repo_path = args.repo_path
+    save_path = args.save_path
+    cache = None
+    if args.cache_dir is not None:
+        cache = ParseCache(args.cache_dir, PARSER_VERSION, max_size=args.cache_size)
+        if args.clear_cache:
+            cache.clear()
+    astroid_cache = None
+    if args.astroid_cache_size is not None:
+        astroid_cache = BoundedAstroidCache.install(max_external_modules=args.astroid_cache_size)
+    content_store = None
+    if args.dedup_dir is not None:
+        content_store = ContentStore(args.dedup_dir, PARSER_VERSION)
+    elif args.dedup:
+        content_store = ContentStore()
+    profiler = None
+    profile_path = None
+    if args.profile is not None:
+        profiler = PhaseProfiler(slowest=args.profile_slowest)
+        profile_path = args.profile or f"{save_path.rstrip(os.sep)}.profile.json"
+        profiler.start()
     t0 = time.time()
-    class_inheritance_graph = Class_Inheritance_Graph(repo_path)
+    class_inheritance_graph = Class_Inheritance_Graph(
+        repo_path,
+        workers=args.workers,
+        cache=cache,
+        lazy_code=args.lazy_code,
+        fast=args.fast,
+        astroid_cache=astroid_cache,
+        content_store=content_store,
+        profiler=profiler,
+    )
+    if content_store is not None:
+        print(
+            f"内容去重复用的文件: {content_store.files_reused}/{content_store.files_seen} ({content_store.dedup_ratio:.2%})"
+        )
+    if args.fast:
+        base_counts = class_inheritance_graph.base_counts
+        print(
+            f"直接确定的父类: {base_counts['fast']}, 回退到astroid推断的父类: {base_counts['fallback']}"
+        )
+    if cache is not None:
+        print(f"解析缓存命中: {cache.hits}/{cache.hits + cache.misses}, 依赖的文件改变后重新解析: {cache.stale}")
+    inference_cache = class_inheritance_graph.inference_cache
+    print(f"父类推断缓存命中: {inference_cache.hits}/{inference_cache.hits + inference_cache.misses}")
+    if astroid_cache is not None:
+        report = class_inheritance_graph.astroid_cache_report
+        print(
+            f"astroid缓存命中率: {report['hit_rate']:.2%} ({report['hits']}/{report['hits'] + report['misses']}), "
+            f"淘汰: {report['evictions']}, 释放: {report['released_modules']}, "
+            f"RSS: {report['rss_before'] / 2**20:.1f}MiB -> {report['rss_after'] / 2**20:.1f}MiB"
+        )
     # nn_moudles_subclass = class_inheritance_graph.nn_moudles_subclass
-    module_info_json = json.dumps(class_inheritance_graph.convert_to_dict(), indent=4)
-    with open(save_path, "w", encoding="utf-8") as f:
-        f.write(module_info_json)
+    profile_phase = class_inheritance_graph.profiler.phase
+
+    def save_class_inheritance_graph():
+        with profile_phase("write_output"):
+            if args.format == "jsonl":
+                class_inheritance_graph.write_jsonl(save_path)
+            elif args.format == "store":
+                class_inheritance_graph.to_store().save(save_path)
+            else:
+                with profile_phase("json_encode"):
+                    module_info_json = json.dumps(class_inheritance_graph.convert_to_dict(), indent=4)
+                with open(save_path, "w", encoding="utf-8") as f:
+                    f.write(module_info_json)
+        if profiler is not None:
+            profiler.write_report(profile_path)
+
+    save_class_inheritance_graph()
+    print(f"总耗时: {time.time() - t0:.2f}s")
+    if profiler is not None:
+        failures = profiler.failures
+        print(f"解析失败的文件: {len(failures)}, 性能报告: {profile_path}")
+
+    if args.watch:
+        def on_update(report):
+            save_class_inheritance_graph()
+            print(
+                f"更新: 修改 {report['changed_files']}, 删除 {report['removed_files']}, "
+                f"重新解析 {report['reparsed_files']}, 耗时 {report['elapsed'] * 1000:.1f}ms, "
+                f"nn模块 {len(class_inheritance_graph.nn_moudles_subclass)}",
+                flush=True,
+            )
+
+        print(f"正在监视 {repo_path}，Ctrl+C退出", flush=True)
+        RepoWatcher(repo_path, interval=args.watch_interval).watch(class_inheritance_graph, on_update)
+    if cache is not None:
+        cache.close()
+    if content_store is not None:
+        content_store.close()
+    if profiler is not None:
+        profiler.stop()
+        profiler.write_report(profile_path)
 
     class_info_dict = class_inheritance_graph.class_info_dict
     nn_moudles_subclass = class_inheritance_graph.nn_moudles_subclass
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+
+
+class ParseCache:
+    """
+    基于文件内容哈希的持久化解析缓存
+
+    每个条目保存单个py文件的解析结果（类列表、父类完整名称、导入别名表），
+    key由解析器版本、文件路径、仓库路径、仓库的本地顶层模块和文件内容的哈希共同决定，
+    因此文件内容不变时再次运行只需计算哈希。
+    缓存总大小超过max_size字节时，按最近访问时间淘汰最旧的条目。
+
+    父类名称可能经由astroid跨文件推断得到，因此每个条目同时保存写入时文件的依赖指纹
+    （见DependencyGraph.fingerprint），读取后由调用者与当前的依赖指纹比较，不一致时重新解析。
+
+    读取和写入在调用commit之前只保存在当前事务中，调用者每处理完一批文件调用一次commit；
+    多个进程可以共用同一个缓存目录，等待其它进程的写事务最多busy_timeout秒。
+    """
+
+    def __init__(self, cache_dir, version, max_size=1 << 30, busy_timeout=60.0):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # 命中但依赖指纹已改变、需要重新解析的条目数量
+        self.stale = 0
+        self.accessed_keys: list[str] = []
+        os.makedirs(cache_dir, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(cache_dir, "parse_cache.sqlite3"), timeout=busy_timeout)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.connection.commit()
+        self.total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def make_key(self, py_file, repo_path, content_digest, variant="", local_top_level_names=()):
+        """
+        计算py文件对应的缓存key
+
+        Args:
+            py_file: str, py文件路径
+            repo_path: str, 仓库根路径
+            content_digest: str, 文件内容的哈希，文件无法读取时为None
+            variant: str, 解析方式，不同解析方式的结果分别缓存
+            local_top_level_names: Iterable[str], 仓库的本地顶层模块，决定导入属于外部库还是本地模块
+
+        Returns:
+            str: 缓存key，文件无法读取时返回None
+        """
+        if content_digest is None:
+            return None
+        digest = hashlib.sha256()
+        for part in (
+            self.version,
+            variant,
+            os.path.abspath(py_file),
+            os.path.abspath(repo_path),
+            content_digest,
+            ".".join(sorted(local_top_level_names)),
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        读取缓存条目
+
+        Args:
+            key: str, 由make_key得到的缓存key
+
+        Returns:
+            tuple: (缓存的解析结果, 写入时的依赖指纹)，未命中时返回None
+        """
+        if key is None:
+            self.misses += 1
+            return None
+        row = self.connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # 访问时间在commit时一并更新，读取时不开启写事务
+        self.accessed_keys.append(key)
+        entry = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+        return entry["result"], entry["fingerprint"]
+
+    def put(self, key, value, fingerprint):
+        """
+        写入缓存条目，写入后按需淘汰
+
+        Args:
+            key: str, 由make_key得到的缓存key
+            value: dict, 可json序列化的解析结果
+            fingerprint: str, 文件当前的依赖指纹
+        """
+        if key is None:
+            return
+        blob = zlib.compress(json.dumps({"result": value, "fingerprint": fingerprint}).encode("utf-8"))
+        row = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self.total_size += len(blob) - (row[0] if row is not None else 0)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+            (key, blob, len(blob), time.time()),
+        )
+        self.evict()
+
+    def commit(self):
+        """
+        提交一批读取和写入：更新读取过的条目的访问时间并提交事务
+        """
+        if self.accessed_keys:
+            accessed = time.time()
+            self.connection.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?", [(accessed, key) for key in self.accessed_keys]
+            )
+            self.accessed_keys = []
+        self.connection.commit()
+
+    def evict(self):
+        """
+        缓存总大小超过max_size时，删除最久未访问的条目直到低于上限
+        """
+        if self.total_size <= self.max_size:
+            return
+        evicted_keys = []
+        for key, size in self.connection.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if self.total_size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            self.total_size -= size
+        self.connection.executemany("DELETE FROM entries WHERE key = ?", evicted_keys)
+
+    def clear(self):
+        """
+        使全部缓存失效
+        """
+        self.connection.execute("DELETE FROM entries")
+        self.connection.commit()
+        self.accessed_keys = []
+        self.total_size = 0
+        self.connection.execute("VACUUM")
+
+    def close(self):
+        self.commit()
+        self.connection.close()
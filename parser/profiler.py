@@ -0,0 +1,211 @@
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+# 单个文件解析耗时直方图的桶，(标签, 上界秒数)
+FILE_COST_BUCKETS = (
+    ("<1ms", 0.001),
+    ("<10ms", 0.01),
+    ("<100ms", 0.1),
+    ("<1s", 1.0),
+    ("<10s", 10.0),
+    (">=10s", float("inf")),
+)
+
+
+class NullProfiler:
+    """
+    不记录任何信息的分析器，未开启性能分析时使用，各个埋点的开销只有一次函数调用
+    """
+
+    enabled = False
+
+    def phase(self, name):
+        return nullcontext()
+
+    def file(self, py_file):
+        return nullcontext()
+
+    def record_failure(self, py_file, error):
+        pass
+
+    def for_worker(self):
+        return self
+
+
+class PhaseProfiler:
+    """
+    记录类继承图构建过程中各阶段的耗时与调用次数、每个文件的解析耗时、解析失败的文件以及峰值内存
+
+    - 阶段（phase）按名称累计墙钟时间和调用次数，阶段可以嵌套，外层阶段的时间包含内层阶段；
+    - 多进程模式下子进程中记录的阶段和文件耗时会合并到父进程，此时阶段时间是各进程时间之和，可能超过总耗时；
+    - 峰值内存由后台线程每隔sample_interval秒采样当前进程及其子进程的RSS之和，只在调用start之后采样。
+
+    用法:
+        profiler = PhaseProfiler()
+        with profiler:
+            graph = Class_Inheritance_Graph(repo_path, profiler=profiler)
+        profiler.write_report("module_info.json.profile.json")
+    """
+
+    enabled = True
+
+    def __init__(self, slowest=20, sample_interval=0.05):
+        """
+        Args:
+            slowest: int, 报告中列出的最慢文件数量
+            sample_interval: float, RSS采样间隔（秒）
+        """
+        self.slowest = slowest
+        self.sample_interval = sample_interval
+        # 阶段名称 -> [调用次数, 累计秒数]
+        self.phases: dict[str, list] = {}
+        # 文件路径 -> 累计解析秒数
+        self.file_costs: dict[str, float] = {}
+        self.failures: list[dict] = []
+        self.peak_rss = 0
+        self.peak_self_rss = 0
+        self.start_time = None
+        self.stop_time = None
+        self.sampler = None
+        self.stop_event = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def for_worker(self):
+        """
+        创建在子进程中使用的分析器，只记录阶段、文件耗时和失败，不采样内存（采样线程不能pickle）
+        """
+        return PhaseProfiler(slowest=self.slowest, sample_interval=self.sample_interval)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.stop_time = None
+        self.sample_rss()
+        self.stop_event = threading.Event()
+        self.sampler = threading.Thread(target=self.run_sampler, name="rss-sampler", daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        if self.sampler is not None:
+            self.stop_event.set()
+            self.sampler.join()
+            self.sampler = None
+        self.sample_rss()
+        self.stop_time = time.perf_counter()
+
+    def run_sampler(self):
+        while not self.stop_event.wait(self.sample_interval):
+            self.sample_rss()
+
+    def sample_rss(self):
+        # 只有记录峰值内存时才需要psutil
+        import psutil
+
+        process = psutil.Process()
+        self_rss = process.memory_info().rss
+        rss = self_rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                # 子进程可能在采样时已经退出
+                pass
+        self.peak_self_rss = max(self.peak_self_rss, self_rss)
+        self.peak_rss = max(self.peak_rss, rss)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stat = self.phases.get(name)
+            if stat is None:
+                stat = self.phases[name] = [0, 0.0]
+            stat[0] += 1
+            stat[1] += time.perf_counter() - start
+
+    @contextmanager
+    def file(self, py_file):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.file_costs[py_file] = self.file_costs.get(py_file, 0.0) + time.perf_counter() - start
+
+    def record_failure(self, py_file, error):
+        self.failures.append({"file": py_file, "error": type(error).__name__, "message": str(error)})
+
+    def drain(self):
+        """
+        取出并清空已记录的阶段、文件耗时和失败，子进程用它把统计交给父进程
+
+        Returns:
+            dict: 可pickle的统计，交给merge合并
+        """
+        snapshot = {"phases": self.phases, "file_costs": self.file_costs, "failures": self.failures}
+        self.phases, self.file_costs, self.failures = {}, {}, []
+        return snapshot
+
+    def merge(self, snapshot):
+        for name, (calls, seconds) in snapshot["phases"].items():
+            stat = self.phases.get(name)
+            if stat is None:
+                stat = self.phases[name] = [0, 0.0]
+            stat[0] += calls
+            stat[1] += seconds
+        for py_file, seconds in snapshot["file_costs"].items():
+            self.file_costs[py_file] = self.file_costs.get(py_file, 0.0) + seconds
+        self.failures.extend(snapshot["failures"])
+
+    def report(self):
+        """
+        生成可json序列化的性能报告
+
+        Returns:
+            dict:
+                wall_time: float, 从start到stop（未stop时到现在）的秒数
+                phases: dict[str, dict], 各阶段的calls和seconds，按seconds降序
+                files: dict, 解析的文件数、总耗时、耗时直方图和最慢的slowest个文件
+                failures: list[dict], 解析失败的文件、异常类型和信息
+                peak_rss / peak_self_rss: int, 当前进程及子进程 / 当前进程的峰值RSS（字节）
+        """
+        if self.sampler is not None:
+            self.sample_rss()
+        wall_time = None
+        if self.start_time is not None:
+            wall_time = (self.stop_time if self.stop_time is not None else time.perf_counter()) - self.start_time
+        histogram = {label: 0 for label, _ in FILE_COST_BUCKETS}
+        for seconds in self.file_costs.values():
+            for label, upper in FILE_COST_BUCKETS:
+                if seconds < upper:
+                    histogram[label] += 1
+                    break
+        slowest_files = sorted(self.file_costs.items(), key=lambda item: item[1], reverse=True)[: self.slowest]
+        return {
+            "wall_time": wall_time,
+            "phases": {
+                name: {"calls": calls, "seconds": seconds}
+                for name, (calls, seconds) in sorted(self.phases.items(), key=lambda item: item[1][1], reverse=True)
+            },
+            "files": {
+                "parsed": len(self.file_costs),
+                "seconds": sum(self.file_costs.values()),
+                "histogram": histogram,
+                "slowest": [{"file": py_file, "seconds": seconds} for py_file, seconds in slowest_files],
+            },
+            "failures": self.failures,
+            "peak_rss": self.peak_rss,
+            "peak_self_rss": self.peak_self_rss,
+        }
+
+    def write_report(self, report_path):
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
@@ -0,0 +1,218 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from parse import Class_Inheritance_Graph, PARSER_VERSION
+from parse_cache import ParseCache
+
+
+class ClassGraphQueryHandler(BaseHTTPRequestHandler):
+    """
+    GET /graphs: 返回常驻的图的名称和类数量
+    POST /query: 请求体为{"queries": [query, ...]}，返回{"results": [result, ...]}，与queries一一对应
+
+    query为{"graph": 图名称, "op": 操作, ...}，图名称只有一个图时可以省略，op为:
+    - parents / children: 直接父类、子类，参数class_name；
+    - ancestors / descendants: 所有祖先、后代，参数class_name（descendants也可以用class_names指定多个根类）；
+    - is_subclass: 参数class_name和base_name；
+    - source: 类的源代码，参数class_name；
+    - nn_modules: 所有nn模块的类名。
+    result为{"result": ...}，出错时为{"error": 错误信息}。
+    """
+
+    server_version = "ClassGraphQuery/1"
+
+    def do_GET(self):
+        if self.path != "/graphs":
+            self.send_json(404, {"error": f"未知路径: {self.path}"})
+            return
+        self.send_json(
+            200,
+            {name: {"num_classes": len(graph.class_info_dict)} for name, graph in self.server.graphs.items()},
+        )
+
+    def do_POST(self):
+        if self.path != "/query":
+            self.send_json(404, {"error": f"未知路径: {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            queries = request["queries"]
+            if not isinstance(queries, list):
+                raise TypeError("queries必须是列表")
+        except (ValueError, KeyError, TypeError) as error:
+            self.send_json(400, {"error": f"无效的请求: {error}"})
+            return
+        self.send_json(200, {"results": [self.server.answer(query) for query in queries]})
+
+    def send_json(self, status, body):
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def address_string(self):
+        # Unix socket的client_address为空字符串
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ClassGraphQueryMixIn:
+    """
+    常驻内存的类继承图，以及对单个查询的应答
+
+    图在启动后只读，每个请求在独立的线程中处理，多个客户端可以并发查询。
+    """
+
+    graphs: dict[str, Class_Inheritance_Graph]
+    verbose = False
+
+    def answer(self, query):
+        if not isinstance(query, dict):
+            return {"error": f"查询必须是JSON对象: {query!r}"}
+        try:
+            graph_name = query.get("graph")
+            if graph_name is None and len(self.graphs) == 1:
+                graph_name = next(iter(self.graphs))
+            graph = self.graphs[graph_name]
+            return {"result": answer_query(graph, query)}
+        except KeyError as error:
+            return {"error": f"未找到: {error}"}
+        except (ValueError, TypeError) as error:
+            return {"error": str(error)}
+
+
+def answer_query(graph, query):
+    """
+    Args:
+        graph: Class_Inheritance_Graph
+        query: dict, 见ClassGraphQueryHandler
+
+    Returns:
+        查询结果，可以直接转换为JSON
+    """
+    op = query["op"]
+    if op == "nn_modules":
+        return list(graph.nn_moudles_subclass)
+    if op == "descendants":
+        return graph.ancestry_index.descendants(query.get("class_names") or [query["class_name"]])
+    if op == "ancestors":
+        return graph.ancestry_index.ancestors(query["class_name"])
+    if op == "is_subclass":
+        return graph.ancestry_index.is_subclass(query["class_name"], query["base_name"])
+    class_info = graph.class_info_dict[query["class_name"]]
+    if op == "parents":
+        return class_info.parent_classes
+    if op == "children":
+        return class_info.children_classes
+    if op == "source":
+        return class_info.code
+    raise ValueError(f"未知操作: {op}")
+
+
+class ClassGraphQueryServer(ClassGraphQueryMixIn, ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, graphs, host="127.0.0.1", port=8765):
+        self.graphs = graphs
+        super().__init__((host, port), ClassGraphQueryHandler)
+
+
+class UnixClassGraphQueryServer(ClassGraphQueryMixIn, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, graphs, socket_path):
+        self.graphs = graphs
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, ClassGraphQueryHandler)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=60):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def send_queries(queries, host="127.0.0.1", port=8765, socket_path=None):
+    """
+    向查询服务发送一批查询
+
+    Args:
+        queries: list[dict], 见ClassGraphQueryHandler
+        host: str, 服务地址
+        port: int, 服务端口
+        socket_path: str, Unix socket路径，指定时忽略host和port
+
+    Returns:
+        list[dict]: 与queries一一对应的结果
+    """
+    if socket_path is not None:
+        connection = UnixHTTPConnection(socket_path)
+    else:
+        connection = http.client.HTTPConnection(host, port)
+    try:
+        connection.request("POST", "/query", json.dumps({"queries": queries}), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        body = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(body.get("error", f"HTTP {response.status}"))
+    return body["results"]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="常驻内存的类继承图查询服务")
+    arg_parser.add_argument("repo_paths", nargs="+", help="仓库路径，可以用name=path指定图的名称，默认为目录名")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="HTTP服务地址，只应监听本机地址")
+    arg_parser.add_argument("--port", type=int, default=8765, help="HTTP服务端口")
+    arg_parser.add_argument("--unix-socket", default=None, help="Unix socket路径，指定时不监听HTTP端口")
+    arg_parser.add_argument("--workers", type=int, default=1, help="并行解析文件的进程数")
+    arg_parser.add_argument("--cache-dir", default=None, help="解析缓存目录")
+    arg_parser.add_argument("--fast", action="store_true", help="使用ast直接确定父类")
+    arg_parser.add_argument("--lazy-code", action="store_true", help="只记录类代码的位置，查询source时再读取")
+    arg_parser.add_argument("--verbose", action="store_true", help="打印每个请求")
+    args = arg_parser.parse_args()
+
+    cache = ParseCache(args.cache_dir, PARSER_VERSION) if args.cache_dir is not None else None
+    graphs = {}
+    for repo_path in args.repo_paths:
+        name, _, path = repo_path.rpartition("=")
+        name = name or os.path.basename(os.path.normpath(path))
+        graphs[name] = Class_Inheritance_Graph(
+            path, workers=args.workers, cache=cache, lazy_code=args.lazy_code, fast=args.fast
+        )
+        print(f"已加载 {name}: {len(graphs[name].class_info_dict)} 个类, {len(graphs[name].nn_moudles_subclass)} 个nn模块")
+    if cache is not None:
+        cache.close()
+
+    if args.unix_socket is not None:
+        server = UnixClassGraphQueryServer(graphs, args.unix_socket)
+        print(f"监听 {args.unix_socket}", flush=True)
+    else:
+        server = ClassGraphQueryServer(graphs, args.host, args.port)
+        print(f"监听 http://{args.host}:{args.port}", flush=True)
+    server.verbose = args.verbose
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket is not None and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
@@ -0,0 +1,65 @@
+import glob
+import os
+import time
+
+
+class RepoWatcher:
+    """
+    轮询仓库中py文件的修改时间和大小，找出新增、修改和删除的文件
+
+    只依赖os.stat，不需要inotify等平台相关的接口；每次轮询的开销与文件数量成线性关系。
+    """
+
+    def __init__(self, repo_path, interval=0.5):
+        self.repo_path = repo_path
+        self.interval = interval
+        self.signatures = self.snapshot()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict[str, tuple[int, int]]: py文件路径到(修改时间, 大小)的映射，路径形式与glob的结果一致
+        """
+        signatures = {}
+        for py_file in glob.glob(os.path.join(self.repo_path, "**/*.py"), recursive=True):
+            try:
+                stat_result = os.stat(py_file)
+            except OSError:
+                continue
+            signatures[py_file] = (stat_result.st_mtime_ns, stat_result.st_size)
+        return signatures
+
+    def poll(self):
+        """
+        与上一次轮询比较
+
+        Returns:
+            tuple[list[str], list[str]]: (新增或修改的文件, 删除的文件)
+        """
+        signatures = self.snapshot()
+        changed_files = [
+            py_file for py_file, signature in signatures.items() if self.signatures.get(py_file) != signature
+        ]
+        removed_files = [py_file for py_file in self.signatures if py_file not in signatures]
+        self.signatures = signatures
+        return changed_files, removed_files
+
+    def watch(self, class_inheritance_graph, on_update=None):
+        """
+        持续轮询，文件改变时增量更新类继承图，直到被KeyboardInterrupt中断
+
+        Args:
+            class_inheritance_graph: Class_Inheritance_Graph, 已构建的类继承图
+            on_update: Callable[[dict], None], 每次更新后以update_files的统计调用
+        """
+        try:
+            while True:
+                time.sleep(self.interval)
+                changed_files, removed_files = self.poll()
+                if not changed_files and not removed_files:
+                    continue
+                report = class_inheritance_graph.update_files(changed_files, removed_files)
+                if on_update is not None:
+                    on_update(report)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,47 @@
+import io
+
+
+def read_source_lines(source):
+    """
+    将源文件的字节内容按通用换行模式切分为行，与文本模式下的readlines()一致
+
+    Args:
+        source: bytes, 源文件内容
+
+    Returns:
+        list[str]: 保留换行符的行列表
+    """
+    return io.StringIO(source.decode("utf-8"), newline=None).readlines()
+
+
+def slice_source_lines(lines, start_line, start_col, end_line, end_col):
+    """
+    从行列表中截取[start_line:start_col, end_line:end_col]之间的源代码片段
+    """
+    if start_line == end_line:
+        return lines[start_line][start_col:end_col]
+    else:
+        # 获取多行代码
+        code_lines = [lines[start_line][start_col:]]
+        for i in range(start_line + 1, end_line):
+            code_lines.append(lines[i].rstrip("\n"))
+        code_lines.append(lines[end_line][:end_col])
+        return "\n".join(code_lines)
+
+
+def load_source_span(code_span):
+    """
+    按code_span读取源代码片段
+
+    Args:
+        code_span: tuple, (file_path, start_byte, end_byte, start_col, end_col)
+            start_byte和end_byte为片段所在行在文件中的字节范围
+
+    Returns:
+        str: 片段对应的源代码
+    """
+    file_path, start_byte, end_byte, start_col, end_col = code_span
+    with open(file_path, "rb") as f:
+        f.seek(start_byte)
+        lines = read_source_lines(f.read(end_byte - start_byte))
+    return slice_source_lines(lines, 0, start_col, len(lines) - 1, end_col)
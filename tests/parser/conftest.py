@@ -0,0 +1,62 @@
+import os
+import sys
+import shutil
+import tempfile
+
+import pytest
+
+
+PARSER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "parser")
+# 以脚本方式运行parse.py时parser目录位于sys.path[0]，parser中的模块以扁平的方式互相导入
+sys.path.insert(0, PARSER_DIR)
+
+# 测试仓库必须位于parser目录下，类名才与以脚本方式运行parse.py时一致（见convert_qname_to_class_name）
+TEST_REPOS_DIR = os.path.join(PARSER_DIR, "test_repos")
+
+
+def write_repo_files(repo_path, files):
+    """
+    按{相对路径: 源代码}写入仓库中的文件，源代码为None时删除文件
+    """
+    for rel_path, source in files.items():
+        file_path = os.path.join(repo_path, rel_path)
+        if source is None:
+            os.remove(file_path)
+            continue
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(source)
+
+
+@pytest.fixture
+def build_graph():
+    """
+    清空astroid的全局缓存后构建类继承图，与在新的进程中运行parse.py相同
+    """
+    from astroid import MANAGER
+    from parse import Class_Inheritance_Graph
+
+    def build(repo_path, **kwargs):
+        MANAGER.clear_cache()
+        return Class_Inheritance_Graph(repo_path, **kwargs)
+
+    return build
+
+
+@pytest.fixture
+def make_repo():
+    """
+    创建临时仓库，返回仓库根路径，测试结束后删除
+    """
+    repo_paths = []
+
+    def make(files):
+        os.makedirs(TEST_REPOS_DIR, exist_ok=True)
+        repo_path = tempfile.mkdtemp(prefix="repo_", dir=TEST_REPOS_DIR)
+        write_repo_files(repo_path, files)
+        repo_paths.append(repo_path)
+        return repo_path
+
+    yield make
+    for repo_path in repo_paths:
+        shutil.rmtree(repo_path, ignore_errors=True)
@@ -0,0 +1,43 @@
+import astroid
+from astroid import MANAGER
+from astroid.manager import AstroidManager
+
+import astroid_cache
+from astroid_cache import BoundedAstroidCache, clear_inference_caches, invalidate_modules
+
+
+def record_clear_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(MANAGER, "clear_cache", lambda: calls.append(True))
+    return calls
+
+
+def test_private_caches_found():
+    assert astroid_cache.get_inference_cache_clearers() is not None
+    assert astroid_cache.get_module_path_cache_clearers() is not None
+
+
+def test_missing_private_caches_fall_back_to_clear_cache(monkeypatch):
+    # 模拟astroid改变了内部实现
+    monkeypatch.delattr(astroid.context, "_invalidate_cache")
+    monkeypatch.delattr(astroid.modutils, "cached_os_path_isfile")
+    calls = record_clear_cache(monkeypatch)
+    clear_inference_caches()
+    assert calls == [True]
+    invalidate_modules(["pkg.mod"], file_set_changed=True)
+    assert calls == [True, True, True]
+
+
+def test_install_without_brain(monkeypatch):
+    monkeypatch.setattr(MANAGER, "astroid_cache", MANAGER.astroid_cache)
+    monkeypatch.setattr(AstroidManager, "brain", None, raising=False)
+    cache = BoundedAstroidCache.install(max_external_modules=8)
+    assert MANAGER.astroid_cache is cache
+
+
+def test_install_with_brain(monkeypatch):
+    monkeypatch.setattr(MANAGER, "astroid_cache", MANAGER.astroid_cache)
+    monkeypatch.setitem(AstroidManager.brain, "astroid_cache", AstroidManager.brain["astroid_cache"])
+    cache = BoundedAstroidCache.install(max_external_modules=8)
+    assert MANAGER.astroid_cache is cache
+    assert AstroidManager.brain["astroid_cache"] is cache
@@ -0,0 +1,61 @@
+import os
+import shutil
+
+from content_store import ContentStore
+from parse import PARSER_VERSION
+
+
+EXTERNAL_SOURCE = "from collections import OrderedDict\n\n\nclass Config(OrderedDict):\n    pass\n"
+
+REEXPORT_REPO = {
+    "pkg/__init__.py": "",
+    "pkg/a.py": "from .b import Base\n\n\nclass Child(Base):\n    pass\n",
+    "pkg/b.py": "from .c import Base\n",
+    "pkg/c.py": "class Base:\n    pass\n",
+    "pkg/d.py": "class Base:\n    pass\n",
+}
+
+
+def test_reused_code_span_points_to_target_file(make_repo, build_graph):
+    # 只导入外部库的文件在不同的位置复用，代码位置改写为目标文件
+    content_store = ContentStore()
+    source_repo_path = make_repo({"vendor/config.py": EXTERNAL_SOURCE})
+    build_graph(source_repo_path, content_store=content_store)
+    repo_path = make_repo({"third_party/config.py": EXTERNAL_SOURCE})
+    graph = build_graph(repo_path, lazy_code=True, content_store=content_store)
+    assert content_store.files_reused == 1
+    shutil.rmtree(source_repo_path)
+
+    class_info = graph.class_info_dict["third_party.config.Config"]
+    assert class_info.code_span[0] == os.path.join(repo_path, "third_party/config.py")
+    assert class_info.code == build_graph(repo_path).class_info_dict["third_party.config.Config"].code
+
+
+def test_persistent_store_shared_between_processes(make_repo, build_graph, tmp_path):
+    # 两个实例（两个parse.py进程）共用同一个目录
+    repo_path = make_repo(REEXPORT_REPO)
+    content_store = ContentStore(str(tmp_path), PARSER_VERSION)
+    expected = build_graph(repo_path, content_store=content_store).convert_to_dict()
+    content_store.close()
+
+    other_repo_path = make_repo(REEXPORT_REPO)
+    content_store = ContentStore(str(tmp_path), PARSER_VERSION, busy_timeout=0.1)
+    graph = build_graph(other_repo_path, content_store=content_store)
+    assert content_store.files_reused == len(REEXPORT_REPO)
+    assert graph.convert_to_dict() == build_graph(other_repo_path).convert_to_dict()
+    assert graph.class_info_dict["pkg.a.Child"].parent_classes == expected["class_info_dict"]["pkg.a.Child"][
+        "parent_classes"
+    ]
+    content_store.close()
+
+
+def test_reuse_validated_by_dependency_fingerprint(make_repo, build_graph):
+    # a.py和b.py的内容与路径都相同，但b.py转而导出的c.py不同，a.py不能复用之前的结果
+    content_store = ContentStore()
+    build_graph(make_repo(REEXPORT_REPO), content_store=content_store)
+    repo_path = make_repo(dict(REEXPORT_REPO, **{"pkg/c.py": "from .d import Base\n"}))
+    graph = build_graph(repo_path, content_store=content_store)
+    assert graph.class_info_dict["pkg.a.Child"].parent_classes == ["pkg.d.Base"]
+    assert graph.convert_to_dict() == build_graph(repo_path).convert_to_dict()
+    # __init__.py、b.py和d.py复用，a.py和c.py重新解析
+    assert content_store.files_reused == 3
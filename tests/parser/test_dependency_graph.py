@@ -0,0 +1,84 @@
+import os
+
+from dependency_graph import DependencyGraph
+from module_resolver import ModuleResolver
+
+
+# a -> b -> c，d与e相互导入且导入c，f不导入任何文件
+FILE_IMPORTS = {
+    "pkg/a.py": {"B": "pkg.b.B"},
+    "pkg/b.py": {"C": "pkg.c.C"},
+    "pkg/c.py": {"OrderedDict": "collections.OrderedDict"},
+    "pkg/d.py": {"E": "pkg.e.E", "C": "pkg.c.C"},
+    "pkg/e.py": {"D": "pkg.d.D"},
+    "pkg/f.py": {},
+}
+
+
+def get_fingerprints(repo_path, file_digests):
+    py_files = [os.path.join(repo_path, rel_path) for rel_path in FILE_IMPORTS]
+    file_imports = {os.path.join(repo_path, rel_path): imports for rel_path, imports in FILE_IMPORTS.items()}
+    module_resolver = ModuleResolver.from_files(repo_path, py_files)
+    dependency_graph = DependencyGraph(repo_path, py_files, file_imports, module_resolver)
+    fingerprints = dependency_graph.fingerprints(
+        {os.path.join(repo_path, rel_path): digest for rel_path, digest in file_digests.items()}
+    )
+    return {os.path.relpath(py_file, repo_path): fingerprint for py_file, fingerprint in fingerprints.items()}
+
+
+def test_fingerprints_follow_transitive_dependencies(tmp_path):
+    file_digests = {rel_path: rel_path for rel_path in FILE_IMPORTS}
+    before = get_fingerprints(str(tmp_path), file_digests)
+    # 与仓库所在的位置无关
+    assert get_fingerprints(str(tmp_path.joinpath("moved")), file_digests) == before
+    # 没有依赖的文件指纹相同，文件自身的内容不影响自己的指纹
+    assert before["pkg/c.py"] == before["pkg/f.py"]
+
+    file_digests["pkg/c.py"] = "changed"
+    after = get_fingerprints(str(tmp_path), file_digests)
+    changed = {rel_path for rel_path in FILE_IMPORTS if before[rel_path] != after[rel_path]}
+    assert changed == {"pkg/a.py", "pkg/b.py", "pkg/d.py", "pkg/e.py"}
+
+    # 相互导入的文件依赖彼此，包括自身
+    file_digests["pkg/d.py"] = "changed"
+    assert get_fingerprints(str(tmp_path), file_digests)["pkg/d.py"] != after["pkg/d.py"]
+
+
+def test_long_import_chain(tmp_path):
+    # 依赖链的长度超过递归深度时也能计算
+    repo_path = str(tmp_path)
+    num_files = 3000
+    py_files = [os.path.join(repo_path, "pkg", f"mod{index}.py") for index in range(num_files)]
+    file_imports = {py_files[index]: {"X": f"pkg.mod{index + 1}.X"} for index in range(num_files - 1)}
+    module_resolver = ModuleResolver.from_files(repo_path, py_files)
+    dependency_graph = DependencyGraph(repo_path, py_files, file_imports, module_resolver)
+    fingerprints = dependency_graph.fingerprints({py_file: "" for py_file in py_files})
+    assert len(set(fingerprints.values())) == num_files
+
+
+def test_incremental_update_matches_rebuild(tmp_path):
+    repo_path = str(tmp_path)
+    file_imports = {os.path.join(repo_path, rel_path): imports for rel_path, imports in FILE_IMPORTS.items()}
+    py_files = list(file_imports)
+    dependency_graph = DependencyGraph(repo_path, py_files, file_imports, ModuleResolver.from_files(repo_path, py_files))
+
+    # b.py不再导入c.py，f.py导入还不存在的g.py，删除e.py，新增g.py且a.py导入它
+    file_imports[os.path.join(repo_path, "pkg/b.py")] = {}
+    dependency_graph.update_imports(os.path.join(repo_path, "pkg/b.py"), {})
+    file_imports[os.path.join(repo_path, "pkg/f.py")] = {"G": "pkg.g.G"}
+    dependency_graph.update_imports(os.path.join(repo_path, "pkg/f.py"), file_imports[os.path.join(repo_path, "pkg/f.py")])
+    assert not dependency_graph.dependencies[os.path.join(repo_path, "pkg/f.py")]
+    removed_file, added_file = os.path.join(repo_path, "pkg/e.py"), os.path.join(repo_path, "pkg/g.py")
+    del file_imports[removed_file]
+    py_files = [py_file for py_file in py_files if py_file != removed_file] + [added_file]
+    file_imports[added_file] = {"C": "pkg.c.C"}
+    module_resolver = ModuleResolver.from_files(repo_path, py_files)
+    dependency_graph.update_files([added_file], [removed_file], module_resolver)
+    dependency_graph.update_imports(added_file, file_imports[added_file])
+    file_imports[os.path.join(repo_path, "pkg/a.py")] = {"G": "pkg.g.G"}
+    dependency_graph.update_imports(os.path.join(repo_path, "pkg/a.py"), file_imports[os.path.join(repo_path, "pkg/a.py")])
+
+    rebuilt = DependencyGraph(repo_path, py_files, file_imports, module_resolver)
+    assert dependency_graph.dependencies == rebuilt.dependencies
+    assert dependency_graph.dependents == rebuilt.dependents
+    assert dependency_graph.fingerprints({}) == rebuilt.fingerprints({})
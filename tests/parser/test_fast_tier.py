@@ -0,0 +1,98 @@
+SHADOWING_REPO = {
+    # 包的__init__.py转而导出子模块中的类，包括星号导入
+    "models/backbones/__init__.py": "from .resnet import ResNet\nfrom .vit import *\n",
+    "models/backbones/resnet.py": "class ResNet:\n    pass\n",
+    "models/backbones/vit.py": "class ViT:\n    pass\n",
+    "models/__init__.py": "",
+    "models/base.py": "class Base:\n    pass\n",
+    "models/extra.py": "from .base import Base\n\n\nclass Extra(Base):\n    pass\n\n\nclass Error(Exception):\n    pass\n",
+    "models/net.py": (
+        "from .backbones import ResNet, ViT\n"
+        "from collections import OrderedDict\n"
+        "from .base import Base\n"
+        "\n"
+        "try:\n"
+        "    from json import JSONDecoder as Decoder\n"
+        "except ImportError:\n"
+        "    Decoder = object\n"
+        "\n"
+        "\n"
+        "class Net(ResNet):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class Vision(ViT):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class OrderedDict(OrderedDict):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class Child(Base):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class MyDecoder(Decoder):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class Error(Exception):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "def make():\n"
+        "    class Child:\n"
+        "        pass\n"
+        "\n"
+        "    class Inner(Child):\n"
+        "        pass\n"
+        "\n"
+        "    return Inner\n"
+    ),
+}
+
+
+def test_fast_tier_matches_astroid(make_repo, build_graph):
+    repo_path = make_repo(SHADOWING_REPO)
+    expected = build_graph(repo_path).convert_to_dict()
+    graph = build_graph(repo_path, fast=True)
+    assert graph.convert_to_dict() == expected
+    # 转而导出的类回退到astroid推断，得到类定义所在的模块
+    assert graph.class_info_dict["models.net.Net"].parent_classes == ["models.backbones.resnet.ResNet"]
+    assert graph.class_info_dict["models.net.Vision"].parent_classes == ["models.backbones.vit.ViT"]
+    # 与导入同名的类不是自己的父类
+    assert graph.class_info_dict["models.net.OrderedDict"].parent_classes == ["collections.OrderedDict"]
+    assert graph.class_info_dict["models.net.make.Inner"].parent_classes == ["models.net.make.Child"]
+    # 其余文件的父类由导入和内置名称直接确定
+    assert graph.base_counts == {"fast": 2, "fallback": 7}
+
+
+UNINSTALLED_REPO = {
+    # 未安装的第三方库既不是外部库也不在仓库中，其中的父类不可能是仓库中的类
+    "models/__init__.py": "",
+    "models/net.py": (
+        "import mmcv.cnn as cnn\n"
+        "from mmdet.models import Head\n"
+        "\n"
+        "\n"
+        "class Conv(cnn.ConvModule):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class Det(Head):\n"
+        "    pass\n"
+    ),
+    "train.py": "from mmdet.models import Head\n\n\nclass Det(Head):\n    pass\n",
+}
+
+
+def test_fast_tier_uninstalled_package(make_repo, build_graph):
+    repo_path = make_repo(UNINSTALLED_REPO)
+    expected = build_graph(repo_path).convert_to_dict()
+    graph = build_graph(repo_path, fast=True)
+    assert graph.convert_to_dict() == expected
+    assert graph.class_info_dict["models.net.Conv"].parent_classes == ["models.mmcv.cnn.ConvModule"]
+    assert graph.class_info_dict["train.Det"].parent_classes == ["mmdet.models.Head"]
+    # 不需要回退到astroid确认
+    assert graph.base_counts == {"fast": 3, "fallback": 0}
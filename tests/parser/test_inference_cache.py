@@ -0,0 +1,79 @@
+from inference_cache import BaseInferenceCache
+
+
+WORKERS_REPO = {
+    "pkg/__init__.py": "",
+    "pkg/base.py": "from collections import OrderedDict\n\n\nclass Base(OrderedDict):\n    pass\n",
+    "pkg/a.py": "from collections import OrderedDict\n\n\nclass A(OrderedDict):\n    pass\n",
+    "pkg/b.py": "from collections import OrderedDict\n\n\nclass B(OrderedDict):\n    pass\n",
+}
+
+
+def test_worker_inference_cache_merged(make_repo, build_graph):
+    # 子进程中的命中统计和新增的缓存合并到父进程的缓存中
+    repo_path = make_repo(WORKERS_REPO)
+    inference_cache = BaseInferenceCache()
+    expected = build_graph(repo_path).convert_to_dict()
+    assert build_graph(repo_path, workers=2, inference_cache=inference_cache).convert_to_dict() == expected
+    assert inference_cache.hits + inference_cache.misses == 3
+    assert inference_cache.entries == {("", "collections.OrderedDict"): "collections.OrderedDict"}
+    assert inference_cache.added is None
+
+
+REBOUND_REPO = {
+    "pkg/__init__.py": "",
+    "pkg/a.py": "from collections import OrderedDict\n\n\nclass A(OrderedDict):\n    pass\n",
+    "pkg/b.py": "from collections import OrderedDict\n\nOrderedDict = dict\n\n\nclass B(OrderedDict):\n    pass\n",
+    "pkg/c.py": (
+        "from collections import OrderedDict\n"
+        "\n"
+        "\n"
+        "def make(OrderedDict):\n"
+        "    class C(OrderedDict):\n"
+        "        pass\n"
+        "\n"
+        "    return C\n"
+    ),
+}
+
+
+def test_rebound_import_not_shared(make_repo, build_graph):
+    # 导入后又被重新绑定的名称不使用由导入决定的缓存，也不把推断结果共享给其它文件和仓库
+    repo_path = make_repo(REBOUND_REPO)
+    inference_cache = BaseInferenceCache()
+    for _ in range(2):
+        graph = build_graph(repo_path, inference_cache=inference_cache)
+        assert graph.class_info_dict["pkg.a.A"].parent_classes == ["collections.OrderedDict"]
+        assert graph.class_info_dict["pkg.b.B"].parent_classes == ["builtins.dict"]
+    assert inference_cache.entries == {("", "collections.OrderedDict"): "collections.OrderedDict"}
+
+
+SCOPED_REPO = {
+    "pkg/__init__.py": "",
+    "pkg/m.py": (
+        "class Base:\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "def f():\n"
+        "    class Base:\n"
+        "        pass\n"
+        "\n"
+        "    class C(Base):\n"
+        "        pass\n"
+        "\n"
+        "    return C\n"
+        "\n"
+        "\n"
+        "class D(Base):\n"
+        "    pass\n"
+    ),
+}
+
+
+def test_scoped_name_not_shared(make_repo, build_graph):
+    # 被内层作用域覆盖的名称不使用缓存，模块顶层的类定义不会得到内层作用域的推断结果
+    repo_path = make_repo(SCOPED_REPO)
+    graph = build_graph(repo_path, inference_cache=BaseInferenceCache())
+    assert graph.class_info_dict["pkg.m.f.C"].parent_classes == ["pkg.m.f.Base"]
+    assert graph.class_info_dict["pkg.m.D"].parent_classes == ["pkg.m.Base"]
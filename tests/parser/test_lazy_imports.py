@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+from conftest import PARSER_DIR
+
+
+def test_parse_does_not_import_optional_dependencies():
+    # numpy只在导出store时需要，psutil只在记录内存时需要
+    code = "import sys, parse; print(sorted({'numpy', 'psutil'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=PARSER_DIR, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
@@ -0,0 +1,71 @@
+import os
+
+from module_resolver import ModuleResolver
+from parse import Class_Inheritance_Graph
+
+
+def test_parser_modules_are_not_external():
+    # parser目录位于sys.path中，但其中的模块不是仓库导入的外部库
+    module_resolver = ModuleResolver()
+    for module_name in ("profiler", "benchmark", "parse_cache", "content_store", "ancestry", "test_repos"):
+        assert not module_resolver.is_external(module_name)
+    assert module_resolver.is_external("json")
+    assert module_resolver.is_external("os.path")
+
+
+def test_relative_imports_are_local():
+    assert not ModuleResolver().is_external("json", level=1)
+
+
+def test_local_module_named_like_parser_module(make_repo):
+    repo_path = make_repo(
+        {
+            "pkg/__init__.py": "",
+            "pkg/profiler.py": "class Base:\n    pass\n",
+            "pkg/model.py": "from .profiler import Base\n\n\nclass Model(Base):\n    pass\n",
+        }
+    )
+    for fast in (False, True):
+        graph = Class_Inheritance_Graph(repo_path, fast=fast)
+        assert graph.class_info_dict["pkg.model.Model"].parent_classes == ["pkg.profiler.Base"]
+        assert graph.class_info_dict["pkg.profiler.Base"].children_classes == ["pkg.model.Model"]
+
+
+def test_relative_import_not_hijacked_by_sys_path(make_repo, tmp_path, monkeypatch):
+    # sys.path中与相对导入的目标同名的顶层包不影响相对导入
+    tmp_path.joinpath("g1").mkdir()
+    tmp_path.joinpath("g1", "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(ModuleResolver, "external_cache", {})
+    repo_path = make_repo(
+        {
+            "pkg/__init__.py": "",
+            "pkg/g1/__init__.py": "",
+            "pkg/g1/mod.py": "class X:\n    pass\n",
+            "pkg/sub/__init__.py": "",
+            "pkg/sub/m.py": "from ..g1.mod import X\n\n\nclass Y(X):\n    pass\n",
+        }
+    )
+    for fast in (False, True):
+        graph = Class_Inheritance_Graph(repo_path, fast=fast)
+        assert graph.class_info_dict["pkg.sub.m.Y"].parent_classes == ["pkg.g1.mod.X"]
+
+
+def test_local_module_index(make_repo):
+    repo_path = make_repo(
+        {
+            "pkg/__init__.py": "",
+            "pkg/sub/mod.py": "",
+            "train.py": "",
+        }
+    )
+    module_resolver = ModuleResolver.from_files(
+        repo_path, [os.path.join(repo_path, rel_path) for rel_path in ("pkg/__init__.py", "pkg/sub/mod.py", "train.py")]
+    )
+    for module_name in ("pkg", "pkg.sub", "pkg.sub.mod", "train"):
+        assert module_resolver.is_local_module(module_name)
+    # 不是外部库的模块不一定在仓库中，如未安装的第三方库
+    assert not module_resolver.is_external("mmcv.cnn")
+    assert not module_resolver.is_local_module("mmcv.cnn")
+    # 没有建立索引时无法判断
+    assert ModuleResolver().is_local_module("mmcv.cnn")
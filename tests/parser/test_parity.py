@@ -0,0 +1,152 @@
+import os
+import pickle
+
+import pytest
+
+from conftest import write_repo_files
+from content_store import ContentStore
+from inference_cache import BaseInferenceCache
+from parse import PARSER_VERSION
+from parse_cache import ParseCache
+
+
+# 覆盖各层容易与串行astroid解析不一致的情况：转而导出、同名遮蔽、导入后重新绑定、被内层作用域覆盖的名称、
+# 未安装的第三方库、嵌套类、跨文件继承、内容重复的文件和语法错误
+PARITY_REPO = {
+    "models/__init__.py": "from .backbones import *\n",
+    "models/backbones/__init__.py": "from .resnet import ResNet\nfrom .vit import *\n",
+    "models/backbones/resnet.py": "from collections import OrderedDict\n\n\nclass ResNet(OrderedDict):\n    pass\n",
+    "models/backbones/vit.py": "from .resnet import ResNet\n\n\nclass ViT(ResNet):\n    class Block:\n        pass\n",
+    "models/heads.py": (
+        "from collections import OrderedDict\n"
+        "from .backbones import ResNet, ViT\n"
+        "\n"
+        "\n"
+        "class OrderedDict(OrderedDict):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class Head(ViT.Block, Exception):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class Early(Late):\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class Late(ResNet):\n"
+        "    pass\n"
+    ),
+    "models/rebound.py": "from collections import OrderedDict\n\nOrderedDict = dict\n\n\nclass Rebound(OrderedDict):\n    pass\n",
+    "models/scoped.py": (
+        "class Base:\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "def make():\n"
+        "    class Base:\n"
+        "        pass\n"
+        "\n"
+        "    class Inner(Base):\n"
+        "        pass\n"
+        "\n"
+        "    return Inner\n"
+        "\n"
+        "\n"
+        "class Outer(Base):\n"
+        "    pass\n"
+    ),
+    "models/contrib.py": "import mmcv.cnn as cnn\n\n\nclass Conv(cnn.ConvModule):\n    pass\n",
+    "vendor/a/util.py": "import json\n\n\nclass Decoder(json.JSONDecoder):\n    pass\n",
+    "vendor/b/util.py": "import json\n\n\nclass Decoder(json.JSONDecoder):\n    pass\n",
+    "broken.py": "class Broken(:\n",
+}
+
+TIERS = {
+    "workers": {"workers": 2},
+    "cache": {"cache": True},
+    "inference_cache": {"inference_cache": True},
+    "fast": {"fast": True},
+    "dedup": {"content_store": True},
+    "lazy_code": {"lazy_code": True},
+    "all": {"workers": 2, "cache": True, "inference_cache": True, "fast": True, "content_store": True, "lazy_code": True},
+}
+
+
+class NeverHitInferenceCache(BaseInferenceCache):
+    """
+    不缓存任何推断结果，用于构建作为基准的串行astroid解析结果
+    """
+
+    def get(self, key):
+        self.misses += 1
+        return False, None
+
+    def put(self, key, qname):
+        pass
+
+
+def build_reference(build_graph, repo_path):
+    return build_graph(repo_path, inference_cache=NeverHitInferenceCache()).convert_to_dict()
+
+
+def make_tier_kwargs(tier, tmp_path):
+    kwargs = dict(TIERS[tier])
+    if kwargs.pop("cache", False):
+        kwargs["cache"] = ParseCache(str(tmp_path), PARSER_VERSION)
+    if kwargs.pop("content_store", False):
+        kwargs["content_store"] = ContentStore()
+    # 在两次构建之间共享，第二次构建的所有推断都可能命中缓存
+    if kwargs.pop("inference_cache", False):
+        kwargs["inference_cache"] = BaseInferenceCache()
+    return kwargs
+
+
+@pytest.mark.parametrize("tier", TIERS)
+def test_tier_matches_serial_astroid(make_repo, build_graph, tmp_path, tier):
+    repo_path = make_repo(PARITY_REPO)
+    expected = build_reference(build_graph, repo_path)
+    kwargs = make_tier_kwargs(tier, tmp_path)
+    assert build_graph(repo_path, **kwargs).convert_to_dict() == expected
+    # 第二次构建复用解析缓存和content_store中的结果
+    assert build_graph(repo_path, **kwargs).convert_to_dict() == expected
+    if "cache" in kwargs:
+        kwargs["cache"].close()
+
+
+@pytest.mark.parametrize("tier", TIERS)
+def test_update_files_matches_serial_astroid(make_repo, build_graph, tmp_path, tier):
+    repo_path = make_repo(PARITY_REPO)
+    kwargs = make_tier_kwargs(tier, tmp_path)
+    graph = build_graph(repo_path, **kwargs)
+
+    # 修改转而导出的包、删除一个文件并新增一个文件
+    write_repo_files(
+        repo_path,
+        {
+            "models/backbones/__init__.py": "from .vit import ViT as ResNet\n",
+            "vendor/b/util.py": None,
+            "models/extra.py": "from .heads import Head\n\n\nclass Extra(Head):\n    pass\n",
+        },
+    )
+    graph.update_files(
+        changed_files=[
+            os.path.join(repo_path, "models/backbones/__init__.py"),
+            os.path.join(repo_path, "models/extra.py"),
+        ],
+        removed_files=[os.path.join(repo_path, "vendor/b/util.py")],
+    )
+    assert graph.convert_to_dict() == build_reference(build_graph, repo_path)
+    if "cache" in kwargs:
+        kwargs["cache"].close()
+
+
+def test_worker_state_excludes_graph(make_repo, build_graph):
+    # 子进程只得到解析文件用到的属性，类继承图和各文件的解析结果不随任务pickle
+    repo_path = make_repo(PARITY_REPO)
+    graph = build_graph(repo_path)
+    worker = pickle.loads(pickle.dumps(graph))
+    for name in ("class_info_dict", "nn_moudles_subclass", "file_class_infos", "file_imports", "py_files"):
+        assert not hasattr(worker, name)
+    py_file = os.path.join(repo_path, "models/heads.py")
+    assert worker.parse_file(py_file, repo_path) == graph.parse_file(py_file, repo_path)
@@ -0,0 +1,54 @@
+from conftest import write_repo_files
+from parse import PARSER_VERSION
+from parse_cache import ParseCache
+
+
+REEXPORT_REPO = {
+    "pkg/__init__.py": "",
+    "pkg/a.py": "from .b import Base\n\n\nclass Child(Base):\n    pass\n",
+    "pkg/b.py": "from .c import Base\n",
+    "pkg/c.py": "class Base:\n    pass\n",
+    "pkg/d.py": "class Base:\n    pass\n",
+}
+
+
+def test_cache_reuse(make_repo, build_graph, tmp_path):
+    repo_path = make_repo(REEXPORT_REPO)
+    cache = ParseCache(str(tmp_path), PARSER_VERSION)
+    expected = build_graph(repo_path, cache=cache).convert_to_dict()
+    cache.close()
+
+    cache = ParseCache(str(tmp_path), PARSER_VERSION)
+    assert build_graph(repo_path, cache=cache).convert_to_dict() == expected
+    assert (cache.hits, cache.misses, cache.stale) == (len(REEXPORT_REPO), 0, 0)
+    cache.close()
+
+
+def test_cache_invalidated_by_imported_file(make_repo, build_graph, tmp_path):
+    # a.py的内容不变，但它的父类经由b.py转而导出，b.py改变后a.py的缓存不能再使用
+    repo_path = make_repo(REEXPORT_REPO)
+    cache = ParseCache(str(tmp_path), PARSER_VERSION)
+    assert build_graph(repo_path, cache=cache).class_info_dict["pkg.a.Child"].parent_classes == ["pkg.c.Base"]
+    cache.close()
+
+    write_repo_files(repo_path, {"pkg/b.py": "from .d import Base\n"})
+    cache = ParseCache(str(tmp_path), PARSER_VERSION)
+    graph = build_graph(repo_path, cache=cache)
+    assert graph.class_info_dict["pkg.a.Child"].parent_classes == ["pkg.d.Base"]
+    assert graph.convert_to_dict() == build_graph(repo_path).convert_to_dict()
+    assert cache.stale == 1
+    cache.close()
+
+
+def test_cache_committed_for_other_processes(make_repo, build_graph, tmp_path):
+    # 每构建完一个仓库就提交，其它连接（其它进程）可以立即读到并写入，不会等待到close
+    repo_path = make_repo(REEXPORT_REPO)
+    cache = ParseCache(str(tmp_path), PARSER_VERSION)
+    build_graph(repo_path, cache=cache)
+
+    other_cache = ParseCache(str(tmp_path), PARSER_VERSION, busy_timeout=0.1)
+    assert other_cache.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == len(REEXPORT_REPO)
+    other_cache.put("key", {"classes": []}, "")
+    other_cache.commit()
+    other_cache.close()
+    cache.close()
@@ -0,0 +1,28 @@
+import os
+import threading
+
+import pytest
+
+from query_server import UnixClassGraphQueryServer, send_queries
+
+
+@pytest.fixture
+def serve(build_graph, make_repo, tmp_path):
+    repo_path = make_repo({"pkg/__init__.py": "", "pkg/a.py": "class A:\n    pass\n\n\nclass B(A):\n    pass\n"})
+    server = UnixClassGraphQueryServer({"repo": build_graph(repo_path)}, os.path.join(str(tmp_path), "query.sock"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def test_malformed_queries_answered_with_errors(serve):
+    results = send_queries([{"op": "parents", "class_name": "pkg.a.B"}, ["parents"], "parents"], socket_path=serve)
+    assert results[0] == {"result": ["pkg.a.A"]}
+    assert "error" in results[1] and "error" in results[2]
+
+
+def test_queries_must_be_a_list(serve):
+    with pytest.raises(RuntimeError, match="queries"):
+        send_queries({"op": "nn_modules"}, socket_path=serve)
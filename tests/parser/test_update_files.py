@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from conftest import write_repo_files
+from content_store import ContentStore
+from parse import PARSER_VERSION
+from parse_cache import ParseCache
+
+
+# a.py的父类经由b.py、c.py转而导出，定义在d.py或e.py中
+CHAIN_REPO = {
+    "pkg/__init__.py": "",
+    "pkg/a.py": "from .b import Base\n\n\nclass Child(Base):\n    pass\n",
+    "pkg/b.py": "from .c import Base\n",
+    "pkg/c.py": "from .d import Base\n",
+    "pkg/d.py": "class Base:\n    pass\n",
+    "pkg/e.py": "class Base:\n    pass\n",
+}
+
+
+@pytest.mark.parametrize("fast", [False, True])
+@pytest.mark.parametrize("reuse", ["none", "cache", "content_store"])
+def test_update_files_matches_rebuild(make_repo, build_graph, tmp_path, fast, reuse):
+    repo_path = make_repo(CHAIN_REPO)
+    kwargs = {"fast": fast}
+    if reuse == "cache":
+        kwargs["cache"] = ParseCache(str(tmp_path), PARSER_VERSION)
+    elif reuse == "content_store":
+        kwargs["content_store"] = ContentStore()
+    graph = build_graph(repo_path, **kwargs)
+    assert graph.class_info_dict["pkg.a.Child"].parent_classes == ["pkg.d.Base"]
+
+    # 只改变c.py，a.py间接依赖它
+    write_repo_files(repo_path, {"pkg/c.py": "from .e import Base\n"})
+    report = graph.update_files(changed_files=[os.path.join(repo_path, "pkg/c.py")])
+    # b.py只转而导出，a.py只重新推断父类（快速模式下重新解析）
+    assert (report["reparsed_files"], report["reinferred_bases"]) == ((2, 0) if fast else (1, 1))
+    assert graph.class_info_dict["pkg.a.Child"].parent_classes == ["pkg.e.Base"]
+    assert graph.convert_to_dict() == build_graph(repo_path, fast=fast).convert_to_dict()
+
+    # e.py中的Base仍是同一个类定义，导入它的文件不受影响
+    write_repo_files(repo_path, {"pkg/e.py": "class Base:\n    def forward(self):\n        pass\n"})
+    report = graph.update_files(changed_files=[os.path.join(repo_path, "pkg/e.py")])
+    assert (report["reparsed_files"], report["reinferred_bases"]) == (1, 0)
+    assert graph.convert_to_dict() == build_graph(repo_path, fast=fast).convert_to_dict()
+
+    # 删除e.py，a.py的父类无法再推断
+    write_repo_files(repo_path, {"pkg/e.py": None})
+    graph.update_files(removed_files=[os.path.join(repo_path, "pkg/e.py")])
+    assert graph.convert_to_dict() == build_graph(repo_path, fast=fast).convert_to_dict()
+    if reuse == "cache":
+        kwargs["cache"].close()
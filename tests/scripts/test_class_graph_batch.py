@@ -0,0 +1,43 @@
+import json
+import pathlib
+
+import pytest
+
+from younger_logics_core.scripts.create.class_graph_batch import DEFAULT_PARSE_SCRIPT, run_batch
+
+
+def read_ledger(output_dirpath: pathlib.Path) -> dict[str, dict]:
+    records = dict()
+    with open(output_dirpath.joinpath('ledger.jsonl'), 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            records[record['repo_path']] = record
+    return records
+
+
+def test_missing_repository_is_final(tmp_path):
+    repo_path = tmp_path.joinpath('repo')
+    repo_path.joinpath('models').mkdir(parents=True)
+    repo_path.joinpath('models', 'net.py').write_text('class Net(object):\n    pass\n', encoding='utf-8')
+    missing_path = tmp_path.joinpath('missing')
+    manifest_path = tmp_path.joinpath('manifest.txt')
+    manifest_path.write_text(f'{repo_path}\n{missing_path}\n', encoding='utf-8')
+    output_dirpath = tmp_path.joinpath('output')
+
+    run_batch(manifest_path, output_dirpath, jobs=2, poll_interval=0.1)
+    records = read_ledger(output_dirpath)
+    assert records[str(repo_path)]['status'] == 'done'
+    assert records[str(missing_path)]['status'] == 'missing'
+    assert records[str(missing_path)]['output'] is None
+
+    # A rerun does not try the missing repository again.
+    run_batch(manifest_path, output_dirpath, jobs=2, poll_interval=0.1)
+    with open(output_dirpath.joinpath('ledger.jsonl'), 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+
+
+def test_missing_parse_script(tmp_path):
+    manifest_path = tmp_path.joinpath('manifest.txt')
+    manifest_path.write_text('', encoding='utf-8')
+    with pytest.raises(FileNotFoundError, match='--parse-script'):
+        run_batch(manifest_path, tmp_path.joinpath('output'), parse_script=DEFAULT_PARSE_SCRIPT.with_name('missing.py'))
@@ -0,0 +1,102 @@
+import sys
+import json
+import pathlib
+import threading
+import subprocess
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+from younger_logics_core.scripts.create.general_spider import keep_previous_sink
+from younger_logics_core.scripts.update.response_cache import serve_cached_responses
+
+
+EVALUATION_IDS = ['imagenet', 'coco']
+
+ROOT_DIRPATH = pathlib.Path(__file__).resolve().parents[2]
+
+# The twisted reactor cannot be restarted, so every crawl runs in its own process.
+CRAWL_SCRIPT = '''
+import sys
+import json
+import pathlib
+
+from younger_logics_core.scripts.create.general_spider import crawl
+from younger_logics_core.scripts.update.response_cache import get_http_cache_settings
+
+data_dirpath, backup_dirpath, api_root, cache_dirpath, mode = json.loads(sys.argv[1])
+crawl(
+    pairs=[('evaluations', 'results')],
+    data_dirpath=pathlib.Path(data_dirpath),
+    backup_dirpath=pathlib.Path(backup_dirpath),
+    http_cache_settings=None if cache_dirpath is None else get_http_cache_settings(pathlib.Path(cache_dirpath), mode=mode),
+    api_root=api_root,
+)
+'''
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # /api/v1/evaluations/<id>/results/?format=json&page=1&...
+        evaluation_id = self.path.split('/')[4]
+        body = json.dumps(dict(count=1, results=[dict(id=f'{evaluation_id}-result')])).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(server: ThreadingHTTPServer) -> str:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}/api/v1'
+
+
+def run_crawl(tmp_path: pathlib.Path, name: str, api_root: str, cache_dirpath: pathlib.Path | None = None, mode: str = 'refresh') -> dict:
+    data_dirpath = tmp_path.joinpath(name)
+    data_dirpath.joinpath('id_file').mkdir(parents=True)
+    with open(data_dirpath.joinpath('id_file', 'evaluation_id_list.json'), 'w') as f:
+        json.dump(EVALUATION_IDS, f)
+    arguments = [str(data_dirpath), str(tmp_path.joinpath(f'{name}_backup')), api_root, None if cache_dirpath is None else str(cache_dirpath), mode]
+    subprocess.run([sys.executable, '-c', CRAWL_SCRIPT, json.dumps(arguments)], cwd=ROOT_DIRPATH, check=True, timeout=120)
+    with open(data_dirpath.joinpath('evaluations_to_results.json'), 'r') as f:
+        return json.load(f)
+
+
+def test_crawl_replays_recorded_responses(tmp_path):
+    cache_dirpath = tmp_path.joinpath('http_cache')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAPIHandler)
+    api_root = start_server(server)
+    recorded = run_crawl(tmp_path, 'recorded', api_root, cache_dirpath)
+    server.shutdown()
+    server.server_close()
+    assert sorted(recorded) == sorted(EVALUATION_IDS)
+
+    # The API is gone, the offline mode only replays the cache.
+    assert run_crawl(tmp_path, 'offline', api_root, cache_dirpath, mode='offline') == recorded
+
+    # The local stand-in serves the recorded responses over HTTP.
+    stand_in = serve_cached_responses(cache_dirpath, port=0)
+    try:
+        assert run_crawl(tmp_path, 'stand_in', start_server(stand_in)) == recorded
+    finally:
+        stand_in.shutdown()
+        stand_in.server_close()
+
+
+def test_keep_previous_sink_rotates(tmp_path):
+    sink_filepath = tmp_path.joinpath('evaluations_to_results.jsonl')
+    for run in range(3):
+        sink_filepath.write_text(str(run))
+        keep_previous_sink(sink_filepath)
+    assert not sink_filepath.exists()
+    assert tmp_path.joinpath('evaluations_to_results.jsonl.old').read_text() == '2'
+    rotated = sorted(tmp_path.glob('evaluations_to_results.jsonl.old.*'))
+    assert [filepath.read_text() for filepath in rotated] == ['0', '1']
@@ -6,7 +6,7 @@
 # Author: Jason Young (杨郑鑫).
 # E-Mail: AI.Jason.Young@outlook.com
 # Last Modified by: Jason Young (杨郑鑫)
-# Last Modified time: 2024-12-24 14:22:23
+# Last Modified time: 2026-10-18 21:04:36
 # Copyright (c) 2024 Yangs.AI
 # 
 # This source code is licensed under the Apache License 2.0 found in the
@@ -14,3 +14,82 @@
 ########################################################################
 
 
+
+import click
+import pathlib
+
+
+@click.group(name='create')
+def create():
+    pass
+
+
+@create.command(name='class-graphs')
+@click.option('--manifest-filepath', required=True, type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path), help='Text file listing one repository path per line.')
+@click.option('--output-dirpath', required=True, type=click.Path(file_okay=False, path_type=pathlib.Path), help='Directory for the class graphs, the per-repository logs and the resumable ledger.')
+@click.option('--jobs', type=int, default=4, help='Number of repositories parsed at the same time.')
+@click.option('--timeout', type=float, default=1800, help='Seconds after which a repository is killed.')
+@click.option('--rss-limit', type=int, default=8 << 30, help='RSS ceiling in bytes of one repository\'s parser processes.')
+@click.option('--retries', type=int, default=1, help='Times a killed or failed repository is restarted before it is skipped.')
+@click.option('--output-format', type=click.Choice(['json', 'jsonl']), default='json', help='Output format of parse.py.')
+@click.option('--fast', is_flag=True, help='Use the ast-only parsing tier of parse.py.')
+@click.option('--parse-workers', type=int, default=1, help='Processes used by parse.py inside one repository.')
+@click.option('--dedup', is_flag=True, help='Parse a file content only once across the whole manifest, through a content store shared by all repositories in the output directory.')
+@click.option('--parse-script', type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path), default=None, help='Path of parser/parse.py, defaults to the one in the source checkout; required when younger_logics_core is installed rather than run from a checkout.')
+def create_class_graphs(
+    manifest_filepath: pathlib.Path,
+    output_dirpath: pathlib.Path,
+    jobs: int,
+    timeout: float,
+    rss_limit: int,
+    retries: int,
+    output_format: str,
+    fast: bool,
+    parse_workers: int,
+    dedup: bool,
+    parse_script: pathlib.Path | None,
+):
+    from younger_logics_core.scripts.create import class_graph_batch
+    class_graph_batch.run_batch(
+        manifest_filepath,
+        output_dirpath,
+        jobs=jobs,
+        timeout=timeout,
+        rss_limit=rss_limit,
+        retries=retries,
+        output_format=output_format,
+        fast=fast,
+        parse_workers=parse_workers,
+        dedup=dedup,
+        parse_script=parse_script,
+    )
+
+
+@create.command(name='papers-with-code')
+@click.option('--pair', 'pairs', type=(click.Choice(['repositories', 'papers', 'areas', 'tasks', 'datasets', 'evaluations']), str), multiple=True, default=[('evaluations', 'results')], help='Entity and relation to crawl, e.g. `--pair tasks evaluations`; repeat it to crawl several pairs in one run.')
+@click.option('--data-dirpath', type=click.Path(file_okay=False, path_type=pathlib.Path), default=pathlib.Path('./data'), help='Directory holding id_file/, the outputs and spider_record/.')
+@click.option('--backup-dirpath', type=click.Path(file_okay=False, path_type=pathlib.Path), default=pathlib.Path('./data_backup'), help='Directory receiving copies of the outputs.')
+@click.option('--cache-dirpath', type=click.Path(file_okay=False, path_type=pathlib.Path), default=pathlib.Path('./data/http_cache'), help='Persistent HTTP response cache, later refreshed by `update papers-with-code`.')
+@click.option('--api-root', type=str, default='https://paperswithcode.com/api/v1', help='API root, e.g. a local stand-in server.')
+def create_papers_with_code(
+    pairs: list[tuple[str, str]],
+    data_dirpath: pathlib.Path,
+    backup_dirpath: pathlib.Path,
+    cache_dirpath: pathlib.Path,
+    api_root: str,
+):
+    """
+    Crawl PapersWithCode pages of several (entity, relation) pairs in one process.
+
+    Keys completed by a previous run are skipped, so an interrupted crawl is resumed by running the same command again.
+    """
+    from younger_logics_core.scripts.create import general_spider
+    from younger_logics_core.scripts.update.response_cache import get_http_cache_settings
+
+    general_spider.crawl(
+        list(pairs),
+        data_dirpath=data_dirpath,
+        backup_dirpath=backup_dirpath,
+        http_cache_settings=get_http_cache_settings(cache_dirpath),
+        api_root=api_root,
+    )
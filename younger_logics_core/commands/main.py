@@ -6,7 +6,7 @@
 # Author: Jason Young (杨郑鑫).
 # E-Mail: AI.Jason.Young@outlook.com
 # Last Modified by: Jason Young (杨郑鑫)
-# Last Modified time: 2024-12-24 14:22:05
+# Last Modified time: 2026-10-18 20:05:33
 # Copyright (c) 2024 Yangs.AI
 # 
 # This source code is licensed under the Apache License 2.0 found in the
@@ -15,20 +15,42 @@
 
 
 import click
+import importlib
 
-from younger_logics_core.commands.create import create
-from younger_logics_core.commands.update import update
-from younger_logics_core.commands.output import output
 
+class LazyGroup(click.Group):
+    """
+    Group whose subcommands are only imported when they are looked up, e.g. `younger-logics-core create ...` never imports the update and output commands.
 
-@click.group(name='younger-logics-core')
-def main():
-    pass
+    `lazy_subcommands` maps a subcommand name to the `module:attribute` of its command.
+    Command modules must stay cheap to import, the work and the heavy imports of a command belong inside its function.
+    """
+
+    def __init__(self, *args, lazy_subcommands: dict[str, str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or dict()
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
 
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazy_subcommands:
+            module_name, attribute_name = self.lazy_subcommands[cmd_name].split(':')
+            return getattr(importlib.import_module(module_name), attribute_name)
+        return super().get_command(ctx, cmd_name)
 
-main.add_command(create, name='create')
-main.add_command(update, name='update')
-main.add_command(output, name='output')
+
+@click.group(
+    name='younger-logics-core',
+    cls=LazyGroup,
+    lazy_subcommands={
+        'create': 'younger_logics_core.commands.create:create',
+        'update': 'younger_logics_core.commands.update:update',
+        'output': 'younger_logics_core.commands.output:output',
+    },
+)
+def main():
+    pass
 
 
 if __name__ == '__main__':
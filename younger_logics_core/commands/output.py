@@ -6,7 +6,7 @@
 # Author: Jason Young (杨郑鑫).
 # E-Mail: AI.Jason.Young@outlook.com
 # Last Modified by: Jason Young (杨郑鑫)
-# Last Modified time: 2024-12-24 14:22:37
+# Last Modified time: 2026-10-18 19:40:12
 # Copyright (c) 2024 Yangs.AI
 # 
 # This source code is licensed under the Apache License 2.0 found in the
@@ -14,3 +14,44 @@
 ########################################################################
 
 
+
+import click
+import pathlib
+
+
+@click.group(name='output')
+def output():
+    pass
+
+
+@output.command(name='linked-dataset')
+@click.option('--data-dirpath', type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path), default=pathlib.Path('./data'), help='Directory holding the crawled evaluations_to_results and papers_to_repositories (.jsonl sinks or exported .json).')
+@click.option('--class-graph-dirpath', required=True, type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path), help='Output directory of `create class-graphs`, its ledger lists the parsed repositories.')
+@click.option('--output-dirpath', required=True, type=click.Path(file_okay=False, path_type=pathlib.Path), help='Directory receiving the partitioned linked dataset and its manifest.json.')
+@click.option('--partitions', type=int, default=64, help='Number of hash partitions; more partitions lower the memory of each join.')
+@click.option('--chunk-size', type=int, default=100_000, help='Rows read, joined and written at a time.')
+@click.option('--output-format', type=click.Choice(['csv', 'parquet']), default='csv', help='gzip-compressed CSV, or zstd-compressed Parquet (needs pyarrow).')
+def output_linked_dataset(
+    data_dirpath: pathlib.Path,
+    class_graph_dirpath: pathlib.Path,
+    output_dirpath: pathlib.Path,
+    partitions: int,
+    chunk_size: int,
+    output_format: str,
+):
+    """
+    Link PapersWithCode evaluations and results to the repositories of their papers and to the nn-module classes parsed from these repositories.
+    """
+    from younger_logics_core.scripts.output import linked_dataset
+
+    summary = linked_dataset.link_dataset(
+        data_dirpath,
+        class_graph_dirpath,
+        output_dirpath,
+        num_partitions=partitions,
+        chunk_size=chunk_size,
+        output_format=output_format,
+    )
+    for name, rows in summary['rows'].items():
+        click.echo(f'{name}: {rows} rows')
+    click.echo(f'{len(summary["parts"])} parts written to {output_dirpath}')
@@ -6,7 +6,7 @@
 # Author: Jason Young (杨郑鑫).
 # E-Mail: AI.Jason.Young@outlook.com
 # Last Modified by: Jason Young (杨郑鑫)
-# Last Modified time: 2024-12-24 14:22:30
+# Last Modified time: 2026-10-18 18:15:47
 # Copyright (c) 2024 Yangs.AI
 # 
 # This source code is licensed under the Apache License 2.0 found in the
@@ -14,3 +14,46 @@
 ########################################################################
 
 
+
+import click
+import pathlib
+
+
+@click.group(name='update')
+def update():
+    pass
+
+
+@update.command(name='papers-with-code')
+@click.option('--pair', 'pairs', type=(click.Choice(['repositories', 'papers', 'areas', 'tasks', 'datasets', 'evaluations']), str), multiple=True, default=[('evaluations', 'results')], help='Entity and relation to refresh, e.g. `--pair tasks evaluations`; repeat it to refresh several pairs in one run.')
+@click.option('--data-dirpath', type=click.Path(file_okay=False, path_type=pathlib.Path), default=pathlib.Path('./data'), help='Directory holding id_file/, the outputs and spider_record/.')
+@click.option('--backup-dirpath', type=click.Path(file_okay=False, path_type=pathlib.Path), default=pathlib.Path('./data_backup'), help='Directory receiving copies of the outputs.')
+@click.option('--cache-dirpath', type=click.Path(file_okay=False, path_type=pathlib.Path), default=pathlib.Path('./data/http_cache'), help='Persistent HTTP response cache.')
+@click.option('--ttl', type=int, default=86400, help='Seconds during which a cached response is reused without a request; older ones are revalidated with ETag / Last-Modified.')
+@click.option('--offline', is_flag=True, help='Only replay the cached responses, never touch the network.')
+@click.option('--api-root', type=str, default='https://paperswithcode.com/api/v1', help='API root, e.g. a local stand-in server.')
+def update_papers_with_code(
+    pairs: list[tuple[str, str]],
+    data_dirpath: pathlib.Path,
+    backup_dirpath: pathlib.Path,
+    cache_dirpath: pathlib.Path,
+    ttl: int,
+    offline: bool,
+    api_root: str,
+):
+    """
+    Refresh crawled PapersWithCode data through the response cache.
+
+    Unlike a full crawl, keys completed before are fetched again, fresh responses come from the cache and stale ones are conditional requests.
+    """
+    from younger_logics_core.scripts.create import general_spider
+    from younger_logics_core.scripts.update.response_cache import get_http_cache_settings
+
+    general_spider.crawl(
+        list(pairs),
+        data_dirpath=data_dirpath,
+        backup_dirpath=backup_dirpath,
+        http_cache_settings=get_http_cache_settings(cache_dirpath, mode='offline' if offline else 'refresh', ttl=ttl),
+        api_root=api_root,
+        refresh=True,
+    )
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- encoding=utf8 -*-
+
+########################################################################
+# Created time: 2026-10-18 17:20:41
+# Author: Jason Young (杨郑鑫).
+# E-Mail: AI.Jason.Young@outlook.com
+# Last Modified by: Jason Young (杨郑鑫)
+# Last Modified time: 2026-10-18 17:20:41
+# Copyright (c) 2024 Yangs.AI
+#
+# This source code is licensed under the Apache License 2.0 found in the
+# LICENSE file in the root directory of this source tree.
+########################################################################
+
+
+import json
+import time
+import logging
+import pathlib
+
+from collections import deque
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+
+logger = logging.getLogger(__name__)
+
+
+# Statuses that mean the server is overloaded or throttling us
+BACKOFF_STATUSES = {429, 500, 502, 503, 504, 522, 524}
+
+
+def get_adaptive_throttle_settings(
+    metrics_filepath: pathlib.Path | None = None,
+    min_concurrency: int = 1,
+    max_concurrency: int = 32,
+    start_concurrency: int = 8,
+    target_latency: float = 2.0,
+    max_delay: float = 60.0,
+    metrics_interval: float = 10.0,
+) -> dict:
+    """
+    Scrapy settings that enable AdaptiveThrottle.
+
+    CONCURRENT_REQUESTS is only the upper bound, the per-slot concurrency and delay are set by the middleware.
+    """
+    return {
+        'DOWNLOADER_MIDDLEWARES': {f'{__name__}.AdaptiveThrottle': 950},
+        'CONCURRENT_REQUESTS': max_concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': start_concurrency,
+        'ADAPTIVE_THROTTLE_ENABLED': True,
+        'ADAPTIVE_THROTTLE_MIN_CONCURRENCY': min_concurrency,
+        'ADAPTIVE_THROTTLE_MAX_CONCURRENCY': max_concurrency,
+        'ADAPTIVE_THROTTLE_TARGET_LATENCY': target_latency,
+        'ADAPTIVE_THROTTLE_MAX_DELAY': max_delay,
+        'ADAPTIVE_THROTTLE_METRICS_INTERVAL': metrics_interval,
+        'ADAPTIVE_THROTTLE_METRICS_FILE': None if metrics_filepath is None else str(metrics_filepath),
+        # Also retry throttled requests, the slot delay makes the retries back off.
+        'RETRY_HTTP_CODES': sorted(BACKOFF_STATUSES | {408}),
+    }
+
+
+class AdaptiveThrottle(object):
+    """
+    Downloader middleware that adapts the concurrency and delay of every download slot (AIMD).
+
+    - A 429/5xx response or a download error halves the slot concurrency and doubles its delay (or uses Retry-After), at most once per target latency;
+    - a successful response within the target latency grows the concurrency by one per `concurrency` such responses, a slower one shrinks it the same way, and halves the delay.
+
+    Every `ADAPTIVE_THROTTLE_METRICS_INTERVAL` seconds one JSON record with the throughput, latency percentiles, error rate, queue depth, concurrency and delay is logged, written to the crawler stats and appended to `ADAPTIVE_THROTTLE_METRICS_FILE`.
+    It is installed closer to the downloader than RetryMiddleware, so every attempt is observed.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_THROTTLE_ENABLED'):
+            raise NotConfigured
+        self.crawler = crawler
+        self.min_concurrency = settings.getint('ADAPTIVE_THROTTLE_MIN_CONCURRENCY', 1)
+        self.max_concurrency = settings.getint('ADAPTIVE_THROTTLE_MAX_CONCURRENCY', 32)
+        self.target_latency = settings.getfloat('ADAPTIVE_THROTTLE_TARGET_LATENCY', 2.0)
+        self.max_delay = settings.getfloat('ADAPTIVE_THROTTLE_MAX_DELAY', 60.0)
+        self.min_delay = settings.getfloat('DOWNLOAD_DELAY')
+        self.metrics_interval = settings.getfloat('ADAPTIVE_THROTTLE_METRICS_INTERVAL', 10.0)
+        metrics_filepath = settings.get('ADAPTIVE_THROTTLE_METRICS_FILE')
+        self.metrics_file = None
+        if metrics_filepath is not None:
+            pathlib.Path(metrics_filepath).parent.mkdir(parents=True, exist_ok=True)
+            self.metrics_file = open(metrics_filepath, 'a', encoding='utf-8')
+
+        # Per-slot controller state: number of responses since the last change, time of the last decrease
+        self.slot_states: dict[str, dict] = dict()
+        # Observations of the current metrics interval
+        self.latencies: deque[float] = deque()
+        self.responses = 0
+        self.errors = 0
+        self.cached = 0
+        self.metrics_task = None
+        self.start_time = time.time()
+
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        self.start_time = time.time()
+        self.metrics_task = task.LoopingCall(self.emit_metrics)
+        self.metrics_task.start(self.metrics_interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.metrics_task is not None and self.metrics_task.running:
+            self.metrics_task.stop()
+        self.emit_metrics()
+        if self.metrics_file is not None:
+            self.metrics_file.close()
+
+    def get_slot(self, request):
+        key = request.meta.get('download_slot')
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def process_response(self, request, response, spider):
+        latency = request.meta.get('download_latency')
+        if latency is None:
+            # Served by HttpCacheMiddleware without a download.
+            self.cached += 1
+            return response
+        self.responses += 1
+        self.latencies.append(latency)
+        key, slot = self.get_slot(request)
+        if slot is None:
+            return response
+        if response.status in BACKOFF_STATUSES:
+            self.errors += 1
+            self.back_off(key, slot, get_retry_after(response))
+        else:
+            self.adjust(key, slot, latency)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self.responses += 1
+        self.errors += 1
+        key, slot = self.get_slot(request)
+        if slot is not None:
+            self.back_off(key, slot, None)
+
+    def get_slot_state(self, key):
+        return self.slot_states.setdefault(key, dict(count=0, last_decrease=0.0))
+
+    def back_off(self, key, slot, retry_after):
+        slot_state = self.get_slot_state(key)
+        now = time.time()
+        # A burst of errors from the same overload only counts once.
+        if now - slot_state['last_decrease'] < max(self.target_latency, slot.delay):
+            return
+        slot_state['last_decrease'] = now
+        slot_state['count'] = 0
+        slot.concurrency = max(self.min_concurrency, slot.concurrency // 2)
+        delay = retry_after if retry_after is not None else max(2 * slot.delay, 1.0)
+        slot.delay = min(self.max_delay, delay)
+
+    def adjust(self, key, slot, latency):
+        slot_state = self.get_slot_state(key)
+        slot_state['count'] += 1
+        slot.delay = max(self.min_delay, slot.delay / 2 if slot.delay > 0.01 else 0.0)
+        if slot_state['count'] < slot.concurrency:
+            return
+        slot_state['count'] = 0
+        if latency <= self.target_latency:
+            slot.concurrency = min(self.max_concurrency, slot.concurrency + 1)
+        else:
+            slot.concurrency = max(self.min_concurrency, slot.concurrency - 1)
+
+    def get_queue_depth(self):
+        engine = self.crawler.engine
+        engine_slot = getattr(engine, '_slot', None) or getattr(engine, 'slot', None)
+        scheduled = len(engine_slot.scheduler) if engine_slot is not None and engine_slot.scheduler is not None else 0
+        return scheduled, len(engine.downloader.active)
+
+    def emit_metrics(self):
+        now = time.time()
+        latencies = sorted(self.latencies)
+        scheduled, downloading = self.get_queue_depth()
+        slots = self.crawler.engine.downloader.slots
+        metrics = dict(
+            time=now,
+            elapsed=round(now - self.start_time, 3),
+            throughput=round(self.responses / self.metrics_interval, 3),
+            responses=self.responses,
+            cached=self.cached,
+            errors=self.errors,
+            error_rate=round(self.errors / self.responses, 4) if self.responses else 0.0,
+            latency_p50=get_percentile(latencies, 0.50),
+            latency_p90=get_percentile(latencies, 0.90),
+            latency_p99=get_percentile(latencies, 0.99),
+            scheduled=scheduled,
+            downloading=downloading,
+            concurrency={key: slot.concurrency for key, slot in slots.items()},
+            delay={key: round(slot.delay, 3) for key, slot in slots.items()},
+        )
+        self.latencies.clear()
+        self.responses = 0
+        self.errors = 0
+        self.cached = 0
+
+        for name in ('throughput', 'error_rate', 'latency_p50', 'latency_p90', 'latency_p99', 'scheduled', 'downloading'):
+            self.crawler.stats.set_value(f'adaptive_throttle/{name}', metrics[name])
+        logger.info(json.dumps(metrics))
+        if self.metrics_file is not None:
+            self.metrics_file.write(json.dumps(metrics) + '\n')
+            self.metrics_file.flush()
+
+
+def get_retry_after(response) -> float | None:
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is None:
+        return None
+    try:
+        return float(retry_after.decode('latin-1'))
+    except ValueError:
+        # HTTP-date form, fall back to the exponential backoff.
+        return None
+
+
+def get_percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 4)
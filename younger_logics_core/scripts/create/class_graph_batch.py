@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- encoding=utf8 -*-
+
+########################################################################
+# Created time: 2026-10-18 14:10:12
+# Author: Jason Young (杨郑鑫).
+# E-Mail: AI.Jason.Young@outlook.com
+# Last Modified by: Jason Young (杨郑鑫)
+# Last Modified time: 2026-10-18 23:12:08
+# Copyright (c) 2024 Yangs.AI
+#
+# This source code is licensed under the Apache License 2.0 found in the
+# LICENSE file in the root directory of this source tree.
+########################################################################
+
+
+import os
+import sys
+import json
+import time
+import hashlib
+import pathlib
+
+import psutil
+
+from tqdm import tqdm
+
+
+# parser/parse.py of the source checkout, parser/ is not shipped with an installed package
+DEFAULT_PARSE_SCRIPT = pathlib.Path(__file__).resolve().parents[3].joinpath('parser', 'parse.py')
+
+# Ledger statuses that are not run again on resume
+FINAL_STATUSES = {'done', 'skipped', 'missing'}
+
+
+def read_manifest(manifest_path: pathlib.Path) -> list[str]:
+    """
+    One repository path per line, blank lines and lines starting with '#' are ignored.
+    """
+    repo_paths = list()
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                repo_paths.append(line)
+    return repo_paths
+
+
+def get_output_stem(repo_path: str) -> str:
+    repo_path = os.path.abspath(repo_path)
+    digest = hashlib.sha1(repo_path.encode('utf-8')).hexdigest()[:8]
+    return f'{os.path.basename(repo_path.rstrip(os.sep))}-{digest}'
+
+
+class Ledger(object):
+    """
+    Append-only JSON Lines record of every attempt, so a crashed batch can be resumed.
+
+    The last record of a repository decides its state: repositories whose last status is in FINAL_STATUSES are finished.
+    """
+
+    def __init__(self, ledger_path: pathlib.Path):
+        self.ledger_path = ledger_path
+        self.records: dict[str, dict] = dict()
+        if ledger_path.is_file():
+            with open(ledger_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line left by a crash.
+                        continue
+                    self.records[record['repo_path']] = record
+        self.ledger_file = open(ledger_path, 'a', encoding='utf-8')
+
+    def is_finished(self, repo_path: str) -> bool:
+        record = self.records.get(repo_path)
+        return record is not None and record['status'] in FINAL_STATUSES
+
+    def attempts(self, repo_path: str) -> int:
+        record = self.records.get(repo_path)
+        return 0 if record is None else record['attempts']
+
+    def append(self, record: dict):
+        self.records[record['repo_path']] = record
+        self.ledger_file.write(json.dumps(record) + '\n')
+        self.ledger_file.flush()
+        os.fsync(self.ledger_file.fileno())
+
+    def close(self):
+        self.ledger_file.close()
+
+
+class RepoJob(object):
+    def __init__(self, repo_path: str, attempt: int, command: list[str], log_path: pathlib.Path):
+        self.repo_path = repo_path
+        self.attempt = attempt
+        self.start_time = time.time()
+        self.peak_rss = 0
+        self.log_file = open(log_path, 'w', encoding='utf-8')
+        self.process = psutil.Popen(command, stdout=self.log_file, stderr=self.log_file)
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.start_time
+
+    def rss(self) -> int:
+        """
+        RSS of the parser process and all of its children (parse.py --workers).
+        """
+        rss = 0
+        try:
+            processes = [self.process] + self.process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return rss
+        for process in processes:
+            try:
+                rss += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def kill(self):
+        try:
+            processes = self.process.children(recursive=True) + [self.process]
+        except psutil.NoSuchProcess:
+            processes = [self.process]
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        self.process.wait()
+
+    def close(self):
+        self.log_file.close()
+
+
+def run_batch(
+    manifest_path: pathlib.Path,
+    output_dirpath: pathlib.Path,
+    jobs: int = 4,
+    timeout: float = 1800,
+    rss_limit: int = 8 << 30,
+    retries: int = 1,
+    output_format: str = 'json',
+    fast: bool = False,
+    parse_workers: int = 1,
+    dedup: bool = False,
+    parse_script: pathlib.Path | None = None,
+    poll_interval: float = 0.5,
+):
+    """
+    Build the class inheritance graph of every repository in the manifest, `jobs` repositories at a time.
+
+    Each repository is parsed by its own `parse.py` process, which is killed when it runs longer than `timeout` seconds or its RSS (children included) exceeds `rss_limit` bytes.
+    Killed or failed repositories are restarted until they have been attempted `retries + 1` times, then skipped.
+    Manifest entries that are not directories are recorded as missing without being parsed.
+    Every attempt is appended to `ledger.jsonl` in `output_dirpath`; finished repositories are not parsed again when the batch is rerun.
+    With `dedup`, all `parse.py` processes share the content store `content_store/` in `output_dirpath`, so a file content is parsed once for the whole manifest.
+    """
+    parse_script = parse_script or DEFAULT_PARSE_SCRIPT
+    if not parse_script.is_file():
+        raise FileNotFoundError(f'parse.py not found at {parse_script}. The parser is not installed with the package, pass the path of parser/parse.py in a source checkout with `--parse-script`.')
+    parse_options = ['--format', output_format, '--workers', str(parse_workers)]
+    if fast:
+        parse_options.append('--fast')
+    if dedup:
+        parse_options.extend(['--dedup-dir', str(output_dirpath.joinpath('content_store'))])
+    output_dirpath.mkdir(parents=True, exist_ok=True)
+    log_dirpath = output_dirpath.joinpath('logs')
+    log_dirpath.mkdir(exist_ok=True)
+    output_suffix = f'.{output_format}'
+
+    ledger = Ledger(output_dirpath.joinpath('ledger.jsonl'))
+    pending = [repo_path for repo_path in read_manifest(manifest_path) if not ledger.is_finished(repo_path)]
+    pending.reverse()
+    running: list[RepoJob] = list()
+
+    with tqdm(total=len(pending), desc='Class Graphs') as progress_bar:
+        while pending or running:
+            while pending and len(running) < jobs:
+                repo_path = pending.pop()
+                if not os.path.isdir(repo_path):
+                    # parse.py exits normally on a missing directory and would leave an empty graph behind.
+                    ledger.append(dict(
+                        repo_path=repo_path,
+                        status='missing',
+                        attempts=ledger.attempts(repo_path) + 1,
+                        elapsed=0.0,
+                        peak_rss=0,
+                        output=None,
+                        time=time.time(),
+                    ))
+                    progress_bar.update(1)
+                    continue
+                output_stem = get_output_stem(repo_path)
+                command = [sys.executable, str(parse_script), repo_path, str(output_dirpath.joinpath(output_stem + output_suffix))] + parse_options
+                running.append(RepoJob(repo_path, ledger.attempts(repo_path) + 1, command, log_dirpath.joinpath(output_stem + '.log')))
+
+            time.sleep(poll_interval)
+
+            still_running = list()
+            for job in running:
+                returncode = job.process.poll()
+                if returncode is None:
+                    if job.elapsed > timeout:
+                        status = 'timeout'
+                    elif job.rss() > rss_limit:
+                        status = 'rss_exceeded'
+                    else:
+                        still_running.append(job)
+                        continue
+                    job.kill()
+                else:
+                    status = 'done' if returncode == 0 else 'failed'
+                job.close()
+
+                if status != 'done' and job.attempt > retries:
+                    status = 'skipped'
+                ledger.append(dict(
+                    repo_path=job.repo_path,
+                    status=status,
+                    attempts=job.attempt,
+                    elapsed=round(job.elapsed, 3),
+                    peak_rss=job.peak_rss,
+                    output=get_output_stem(job.repo_path) + output_suffix,
+                    time=time.time(),
+                ))
+                if status in FINAL_STATUSES:
+                    progress_bar.update(1)
+                else:
+                    # Restart it after the repositories that have not been tried yet.
+                    pending.insert(0, job.repo_path)
+            running = still_running
+
+    ledger.close()
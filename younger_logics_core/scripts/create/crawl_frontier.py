@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- encoding=utf8 -*-
+
+########################################################################
+# Created time: 2026-10-18 17:58:26
+# Author: Jason Young (杨郑鑫).
+# E-Mail: AI.Jason.Young@outlook.com
+# Last Modified by: Jason Young (杨郑鑫)
+# Last Modified time: 2026-10-18 17:58:26
+# Copyright (c) 2024 Yangs.AI
+#
+# This source code is licensed under the Apache License 2.0 found in the
+# LICENSE file in the root directory of this source tree.
+########################################################################
+
+
+import sqlite3
+import pathlib
+
+
+class CrawlFrontier(object):
+    """
+    Persistent URL frontier shared by every (entity, relation) pair of a crawl.
+
+    Each URL is recorded once with its pair and output key.
+    A URL is scheduled at most once per run, and never again once its key is completed, i.e. all pages of the key reached the sink.
+    Pending URLs of a crashed run are scheduled again on the next run.
+    """
+
+    def __init__(self, frontier_filepath: pathlib.Path):
+        frontier_filepath.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(frontier_filepath)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS urls ('
+            'url TEXT PRIMARY KEY, first_keyword TEXT, second_keyword TEXT, key TEXT, done INTEGER DEFAULT 0'
+            ')'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS urls_key ON urls (first_keyword, second_keyword, key)')
+        self.connection.commit()
+        self.scheduled_urls: set[str] = set()
+
+    def schedule(self, url: str, first_keyword: str, second_keyword: str, key: str) -> bool:
+        """
+        Record `url` and tell whether it should be requested.
+        """
+        if url in self.scheduled_urls:
+            return False
+        row = self.connection.execute('SELECT done FROM urls WHERE url = ?', (url,)).fetchone()
+        if row is not None and row[0]:
+            return False
+        if row is None:
+            self.connection.execute(
+                'INSERT INTO urls (url, first_keyword, second_keyword, key) VALUES (?, ?, ?, ?)',
+                (url, first_keyword, second_keyword, key),
+            )
+        self.scheduled_urls.add(url)
+        return True
+
+    def complete_key(self, first_keyword: str, second_keyword: str, key: str):
+        self.connection.execute(
+            'UPDATE urls SET done = 1 WHERE first_keyword = ? AND second_keyword = ? AND key = ?',
+            (first_keyword, second_keyword, key),
+        )
+        self.connection.commit()
+
+    def reset(self, first_keyword: str, second_keyword: str):
+        """
+        Forget the completion of every URL of a pair, so that it is crawled again.
+        """
+        self.connection.execute(
+            'UPDATE urls SET done = 0 WHERE first_keyword = ? AND second_keyword = ?',
+            (first_keyword, second_keyword),
+        )
+        self.connection.commit()
+
+    def counts(self) -> dict[tuple[str, str], tuple[int, int]]:
+        """
+        Number of (completed, recorded) URLs of every pair.
+        """
+        rows = self.connection.execute(
+            'SELECT first_keyword, second_keyword, SUM(done), COUNT(*) FROM urls GROUP BY first_keyword, second_keyword'
+        )
+        return {(first_keyword, second_keyword): (done, total) for first_keyword, second_keyword, done, total in rows}
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
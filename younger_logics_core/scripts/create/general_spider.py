@@ -1,15 +1,15 @@
 import scrapy
-from scrapy.crawler import CrawlerProcess
-
-from paperswithcode import PapersWithCodeClient
-from tea_client.errors import HttpClientError
 
 import json
-from tqdm import tqdm
 import time
 import copy
+import shutil
+import pathlib
 import threading
-from datetime import datetime
+
+from younger_logics_core.scripts.create.paged_result_sink import PagedResultSink
+from younger_logics_core.scripts.create.adaptive_throttle import get_adaptive_throttle_settings
+from younger_logics_core.scripts.create.crawl_frontier import CrawlFrontier
 
 
 # const var
@@ -17,24 +17,23 @@ ITEMS_PER_PAGE = 400
 # DATE_SHRESHOLD = datetime.strptime('2024-11-20', '%Y-%m-%d')
 FIRST_KEYWORD = 'evaluations'  # 'repositories' 'tasks' 'datasets' 'methods' 'results'
 SECOND_KEYWORD = 'results'
-
-# cnt
-parse_cnt = 0
+API_ROOT = 'https://paperswithcode.com/api/v1'
 
 # initial
-start_time = time.time()
-var_lock = threading.Lock()
 list_lock = threading.Lock()
 list2_lock = threading.Lock()
-client = PapersWithCodeClient()
 
-# output
-out_dict = {}
-url_spider_record = []
-url_spider_all = []
 
-# input
-in_start_url_list = []
+# TODO need to be modify
+def get_out_dict_key(first_keyword, url):
+    if first_keyword == 'repositories':
+        owner = url.split('/')[6]
+        name = url.split('/')[7]
+        return owner + ' / ' + name
+    elif first_keyword in ['papers', 'areas', 'tasks', 'datasets', 'evaluations']:
+        return url.split('/')[6]
+    else:
+        raise Exception
 
 
 # spider class
@@ -42,49 +41,57 @@ class JsonDownloader(scrapy.Spider):
     name = "json_downloader"
     start_urls = []
 
-    def __init__(self, url_list=None, *args, **kwargs):
+    def __init__(self, start_url_lists=None, sinks=None, frontier=None, *args, **kwargs):
         super(JsonDownloader, self).__init__(*args, **kwargs)
-        if url_list is not None:
-            self.start_urls = url_list
-
-    def parse(self, response):
-        global out_dict, parse_cnt, url_spider_record, url_spider_all
-        # cnt ++
-        self.add_parse_cnt()
+        # (first_keyword, second_keyword) -> start urls / sink, all pairs share one frontier
+        self.start_url_lists = start_url_lists or dict()
+        # every key is appended to its sink as soon as all of its pages arrive
+        self.sinks = sinks or dict()
+        self.frontier = frontier
+        self.url_spider_record = {pair: [] for pair in self.start_url_lists}
+        self.url_spider_all = {pair: [] for pair in self.start_url_lists}
+
+    async def start(self):
+        # Scrapy >= 2.13 starts a spider from start(), older versions call start_requests()
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        for (first_keyword, second_keyword), url_list in self.start_url_lists.items():
+            for url in url_list:
+                request = self.make_request(url, first_keyword, second_keyword)
+                if request is not None:
+                    yield request
+
+    def make_request(self, url, first_keyword, second_keyword):
+        if not self.frontier.schedule(url, first_keyword, second_keyword, get_out_dict_key(first_keyword, url)):
+            return None
+        return scrapy.Request(url=url, callback=self.parse, cb_kwargs=dict(first_keyword=first_keyword, second_keyword=second_keyword))
+
+    def parse(self, response, first_keyword, second_keyword):
+        pair = (first_keyword, second_keyword)
+        sink = self.sinks[pair]
         # get data
         json_data = response.json()
         # get info from url
         page_number = int(response.url.split('&')[1].split('=')[1])
         with list_lock:
-            url_spider_record.append(response.url)
-        # TODO need to be modify
-        out_dict_key = ''
-        if FIRST_KEYWORD == 'repositories':
-            owner = response.url.split('/')[6]
-            name = response.url.split('/')[7]
-            out_dict_key = owner + ' / ' + name
-        elif FIRST_KEYWORD in ['papers', 'areas', 'tasks', 'datasets', 'evaluations']:
-            out_dict_key = response.url.split('/')[6]
-        else:
-            raise Exception
+            self.url_spider_record[pair].append(response.url)
+        out_dict_key = get_out_dict_key(first_keyword, response.url)
         # process by page_number
         if page_number == 1:
-            if json_data['count'] != 0:
-                new_urls, page_num = self.extract_new_urls(json_data['count'], response.url)
-                out_dict[out_dict_key] = {'count': json_data['count'], 'results': [json_data['results']] + [[]] * page_num}
-                with list2_lock:
-                    url_spider_all.extend(new_urls)
-                for new_url in new_urls:
-                    yield scrapy.Request(url=new_url, callback=self.parse)
+            new_urls, page_num = self.extract_new_urls(json_data['count'], response.url)
+            completed = sink.start(out_dict_key, json_data['count'], json_data['results'], page_num)
+            with list2_lock:
+                self.url_spider_all[pair].extend(new_urls)
+            for new_url in new_urls:
+                request = self.make_request(new_url, first_keyword, second_keyword)
+                if request is not None:
+                    yield request
         else:
-            out_dict[out_dict_key]['results'][page_number - 1] = json_data['results']
-
-    def add_parse_cnt(self):
-        global parse_cnt
-        with var_lock:
-            parse_cnt += 1
-            if parse_cnt % 10 == 0:
-                print(f'parse_cnt is {parse_cnt}')
+            completed = sink.add_page(out_dict_key, page_number, json_data['results'])
+        if completed:
+            self.frontier.complete_key(first_keyword, second_keyword, out_dict_key)
 
     def extract_new_urls(self, item_num: int, first_url: str):
         new_urls = []
@@ -99,82 +106,133 @@ class JsonDownloader(scrapy.Spider):
 
 
 # get data
-if FIRST_KEYWORD == 'repositories':
-    with open('./data/id_file/repo_owner_list.json', 'r') as f:
-        repo_owner_list = json.load(f)
-    with open('./data/id_file/repo_name_list.json', 'r') as f:
-        repo_name_list = json.load(f)
-    for i in range(len(repo_owner_list)):
-        repo_owner = repo_owner_list[i]
-        repo_name = repo_name_list[i]
-        in_start_url_list.append(
-            f'https://paperswithcode.com/api/v1/{FIRST_KEYWORD}/{repo_owner}/{repo_name}/{SECOND_KEYWORD}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
-elif FIRST_KEYWORD == 'papers':
-    with open('./data/id_file/paper_id_list.json', 'r') as f:
-        paper_id_list = json.load(f)
-    for paper_id in paper_id_list:
-        in_start_url_list.append(
-            f'https://paperswithcode.com/api/v1/{FIRST_KEYWORD}/{paper_id}/{SECOND_KEYWORD}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
-elif FIRST_KEYWORD == 'areas':
-    with open('./data/id_file/area_id_list.json', 'r') as f:
-        area_id_list = json.load(f)
-    for area_id in area_id_list:
-        in_start_url_list.append(
-            f'https://paperswithcode.com/api/v1/{FIRST_KEYWORD}/{area_id}/{SECOND_KEYWORD}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
-elif FIRST_KEYWORD == 'tasks':
-    with open('./data/id_file/task_id_list.json', 'r') as f:
-        task_id_list = json.load(f)
-    for task_id in task_id_list:
-        in_start_url_list.append(
-            f'https://paperswithcode.com/api/v1/{FIRST_KEYWORD}/{task_id}/{SECOND_KEYWORD}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
-elif FIRST_KEYWORD == 'datasets':
-    with open('./data/id_file/dataset_id_list.json', 'r') as f:
-        dataset_id_list = json.load(f)
-    for dataset_id in dataset_id_list:
-        in_start_url_list.append(
-            f'https://paperswithcode.com/api/v1/{FIRST_KEYWORD}/{dataset_id}/{SECOND_KEYWORD}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
-elif FIRST_KEYWORD == 'evaluations':
-    with open('./data/id_file/evaluation_id_list.json', 'r') as f:
-        evaluation_id_list = json.load(f)
-    for evaluation_id in evaluation_id_list:
-        in_start_url_list.append(
-            f'https://paperswithcode.com/api/v1/{FIRST_KEYWORD}/{evaluation_id}/{SECOND_KEYWORD}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
-
-
-# start spider
-process = CrawlerProcess(settings={
-    'CONCURRENT_REQUESTS': 16,  # 设置并发请求数量
-    'RETRY_TIMES': 3,  # 设置重试次数
-})
-process.crawl(JsonDownloader, url_list=in_start_url_list)
-process.start()
-
-# reduce
-try:
-    for key, value in out_dict.items():
-        tmp = [item for sublist in value['results'] for item in sublist]
-        out_dict[key]['results'] = tmp
-except Exception as e:
-    print('reduce exception !!!')
-
-with open(f'./data/{FIRST_KEYWORD}_to_{SECOND_KEYWORD}.json', 'w') as f:
-    json.dump(out_dict, f, indent=4)
-
-with open(f'./data_backup/{FIRST_KEYWORD}_to_{SECOND_KEYWORD}.json', 'w') as f:
-    json.dump(out_dict, f, indent=4)
-
-try:
-    with open(f'./data/spider_record/{FIRST_KEYWORD}_to_{SECOND_KEYWORD}_record.json', 'w') as f:
-        json.dump(url_spider_record, f, indent=4)
-    with open(f'./data_backup/{FIRST_KEYWORD}_to_{SECOND_KEYWORD}_record.json', 'w') as f:
-        json.dump(url_spider_record, f, indent=4)
-    with open(f'./data/spider_record/{FIRST_KEYWORD}_to_{SECOND_KEYWORD}_all.json', 'w') as f:
-        json.dump(url_spider_all, f, indent=4)
-    with open(f'./data_backup/{FIRST_KEYWORD}_to_{SECOND_KEYWORD}_all.json', 'w') as f:
-        json.dump(url_spider_all, f, indent=4)
-except Exception as e:
-    print(f'record save error !!!')
-
-# final
-end_time = time.time()
-print(f'total time is {end_time - start_time}')
+def get_start_urls(first_keyword, second_keyword, data_dirpath, api_root=API_ROOT):
+    in_start_url_list = []
+    if first_keyword == 'repositories':
+        with open(data_dirpath.joinpath('id_file', 'repo_owner_list.json'), 'r') as f:
+            repo_owner_list = json.load(f)
+        with open(data_dirpath.joinpath('id_file', 'repo_name_list.json'), 'r') as f:
+            repo_name_list = json.load(f)
+        for i in range(len(repo_owner_list)):
+            repo_owner = repo_owner_list[i]
+            repo_name = repo_name_list[i]
+            in_start_url_list.append(
+                f'{api_root}/{first_keyword}/{repo_owner}/{repo_name}/{second_keyword}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
+        return in_start_url_list
+
+    id_filename = {
+        'papers': 'paper_id_list.json',
+        'areas': 'area_id_list.json',
+        'tasks': 'task_id_list.json',
+        'datasets': 'dataset_id_list.json',
+        'evaluations': 'evaluation_id_list.json',
+    }.get(first_keyword)
+    if id_filename is not None:
+        with open(data_dirpath.joinpath('id_file', id_filename), 'r') as f:
+            id_list = json.load(f)
+        for id in id_list:
+            in_start_url_list.append(
+                f'{api_root}/{first_keyword}/{id}/{second_keyword}/?format=json&page=1&ordering=id&items_per_page={ITEMS_PER_PAGE}')
+    return in_start_url_list
+
+
+def keep_previous_sink(sink_filepath: pathlib.Path):
+    """
+    Move the sink of the previous run to .jsonl.old before a refresh.
+
+    An existing .jsonl.old, left by an earlier refresh, is first renamed after its modification time (.jsonl.old.<YYYYmmdd-HHMMSS>), so no run is overwritten.
+    """
+    old_filepath = sink_filepath.with_suffix('.jsonl.old')
+    if old_filepath.is_file():
+        timestamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(old_filepath.stat().st_mtime))
+        rotated_filepath = sink_filepath.with_suffix(f'.jsonl.old.{timestamp}')
+        index = 1
+        while rotated_filepath.exists():
+            rotated_filepath = sink_filepath.with_suffix(f'.jsonl.old.{timestamp}-{index}')
+            index += 1
+        old_filepath.replace(rotated_filepath)
+    sink_filepath.replace(old_filepath)
+
+
+def crawl(
+    pairs: list[tuple[str, str]] | None = None,
+    data_dirpath: pathlib.Path = pathlib.Path('./data'),
+    backup_dirpath: pathlib.Path = pathlib.Path('./data_backup'),
+    http_cache_settings: dict | None = None,
+    api_root: str = API_ROOT,
+    refresh: bool = False,
+):
+    """
+    Crawl `first_keyword`/<id>/`second_keyword` of every id listed in `data_dirpath`/id_file, for every (first_keyword, second_keyword) pair, in one CrawlerProcess.
+
+    All pairs share one download queue, connection pool and the persistent frontier `data_dirpath`/spider_record/frontier.sqlite, each pair has its own sink and outputs.
+    Keys completed by a previous run are skipped unless `refresh` is set, in which case the previous sinks are kept as .jsonl.old (see keep_previous_sink) and every key is crawled again.
+    `http_cache_settings` (see scripts/update/response_cache.get_http_cache_settings) enables the persistent response cache.
+    Concurrency and backoff are adapted by AdaptiveThrottle, whose metrics are appended to spider_record/crawl_metrics.jsonl.
+    """
+    # CrawlerProcess sets up the twisted reactor machinery, only import it when a crawl starts
+    from scrapy.crawler import CrawlerProcess
+
+    start_time = time.time()
+    pairs = pairs or [(FIRST_KEYWORD, SECOND_KEYWORD)]
+
+    frontier = CrawlFrontier(data_dirpath.joinpath('spider_record', 'frontier.sqlite'))
+    sinks = dict()
+    start_url_lists = dict()
+    for first_keyword, second_keyword in pairs:
+        # output
+        sink_filepath = data_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.jsonl')
+        if refresh:
+            if sink_filepath.is_file():
+                keep_previous_sink(sink_filepath)
+            frontier.reset(first_keyword, second_keyword)
+        # keys already in the sink are not crawled again
+        sink = PagedResultSink(sink_filepath)
+        sinks[(first_keyword, second_keyword)] = sink
+
+        # skip the keys completed by a previous run
+        in_start_url_list = get_start_urls(first_keyword, second_keyword, data_dirpath, api_root=api_root)
+        in_start_url_list = [url for url in in_start_url_list if get_out_dict_key(first_keyword, url) not in sink.completed_keys]
+        start_url_lists[(first_keyword, second_keyword)] = in_start_url_list
+        print(f'{first_keyword}_to_{second_keyword}: {len(sink.completed_keys)} keys already completed, {len(in_start_url_list)} keys to crawl')
+
+    # start spider
+    process = CrawlerProcess(settings={
+        'RETRY_TIMES': 5,  # 设置重试次数，重试的间隔由AdaptiveThrottle指数退避
+        **get_adaptive_throttle_settings(metrics_filepath=data_dirpath.joinpath('spider_record', 'crawl_metrics.jsonl')),
+        **(http_cache_settings or {}),
+    })
+    crawler = process.create_crawler(JsonDownloader)
+    process.crawl(crawler, start_url_lists=start_url_lists, sinks=sinks, frontier=frontier)
+    process.start()
+    spider = crawler.spider
+    frontier.close()
+
+    backup_dirpath.mkdir(parents=True, exist_ok=True)
+    for (first_keyword, second_keyword), sink in sinks.items():
+        # the pages are already flattened in the sink, convert it to a single json file and copy it as the backup
+        sink.close()
+        if sink.pending:
+            print(f'{first_keyword}_to_{second_keyword}: {len(sink.pending)} keys are incomplete and will be crawled again on the next run')
+        sink.export_json(data_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.json'))
+        shutil.copyfile(data_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.json'), backup_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.json'))
+        shutil.copyfile(data_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.jsonl'), backup_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.jsonl'))
+
+        try:
+            with open(data_dirpath.joinpath('spider_record', f'{first_keyword}_to_{second_keyword}_record.json'), 'w') as f:
+                json.dump(spider.url_spider_record[(first_keyword, second_keyword)], f, indent=4)
+            shutil.copyfile(data_dirpath.joinpath('spider_record', f'{first_keyword}_to_{second_keyword}_record.json'), backup_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}_record.json'))
+            with open(data_dirpath.joinpath('spider_record', f'{first_keyword}_to_{second_keyword}_all.json'), 'w') as f:
+                json.dump(spider.url_spider_all[(first_keyword, second_keyword)], f, indent=4)
+            shutil.copyfile(data_dirpath.joinpath('spider_record', f'{first_keyword}_to_{second_keyword}_all.json'), backup_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}_all.json'))
+        except Exception as e:
+            print(f'record save error !!!')
+
+    # final
+    end_time = time.time()
+    print(f'total time is {end_time - start_time}')
+
+
+if __name__ == '__main__':
+    from younger_logics_core.scripts.update.response_cache import get_http_cache_settings
+    crawl(http_cache_settings=get_http_cache_settings(pathlib.Path('./data/http_cache')))
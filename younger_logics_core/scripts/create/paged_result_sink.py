@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- encoding=utf8 -*-
+
+########################################################################
+# Created time: 2026-10-18 16:02:37
+# Author: Jason Young (杨郑鑫).
+# E-Mail: AI.Jason.Young@outlook.com
+# Last Modified by: Jason Young (杨郑鑫)
+# Last Modified time: 2026-10-18 18:03:12
+# Copyright (c) 2024 Yangs.AI
+#
+# This source code is licensed under the Apache License 2.0 found in the
+# LICENSE file in the root directory of this source tree.
+########################################################################
+
+
+import os
+import json
+import pathlib
+import threading
+
+
+class PagedResultSink(object):
+    """
+    Append-only JSON Lines sink for paginated API results.
+
+    Pages of a key are held in memory only until all of them have arrived; the key is then written as one line `{"key": ..., "count": ..., "results": [...]}` and forgotten.
+    The file doubles as the checkpoint: keys already in it are in `completed_keys` when the sink is reopened, so a restarted crawl can skip them.
+    A torn last line left by a crash is truncated on open.
+    """
+
+    def __init__(self, sink_filepath: pathlib.Path):
+        self.sink_filepath = sink_filepath
+        self.completed_keys: set[str] = set()
+        self.pending: dict[str, dict] = dict()
+        self.lock = threading.Lock()
+
+        valid_size = 0
+        if sink_filepath.is_file():
+            with open(sink_filepath, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    self.completed_keys.add(record['key'])
+                    valid_size += len(line)
+            if valid_size != sink_filepath.stat().st_size:
+                os.truncate(sink_filepath, valid_size)
+        self.sink_file = open(sink_filepath, 'a', encoding='utf-8')
+
+    def start(self, key: str, count: int, first_page: list, page_num: int) -> bool:
+        """
+        Register the first page of `key`, which is followed by `page_num` more pages.
+
+        Returns whether `key` is completed.
+        """
+        with self.lock:
+            self.pending[key] = dict(count=count, pages=[first_page] + [None] * page_num, remaining=page_num)
+            return self.complete_if_ready(key)
+
+    def add_page(self, key: str, page_number: int, page: list) -> bool:
+        """
+        Add page `page_number` (1-based) of `key`.
+
+        Returns whether `key` is completed.
+        """
+        with self.lock:
+            entry = self.pending[key]
+            if entry['pages'][page_number - 1] is None:
+                entry['remaining'] -= 1
+            entry['pages'][page_number - 1] = page
+            return self.complete_if_ready(key)
+
+    def complete_if_ready(self, key: str) -> bool:
+        entry = self.pending[key]
+        if entry['remaining'] != 0:
+            return False
+        del self.pending[key]
+        results = [item for page in entry['pages'] for item in page]
+        self.sink_file.write(json.dumps(dict(key=key, count=entry['count'], results=results)) + '\n')
+        self.sink_file.flush()
+        os.fsync(self.sink_file.fileno())
+        self.completed_keys.add(key)
+        return True
+
+    def close(self):
+        self.sink_file.close()
+
+    def export_json(self, json_filepath: pathlib.Path, skip_empty: bool = True):
+        """
+        Stream the sink into a single JSON object `{key: {"count": ..., "results": [...]}}`, formatted as `json.dump(..., indent=4)` would.
+
+        Only one key is held in memory at a time. Keys with `count == 0` are skipped when `skip_empty` is set.
+        """
+        with open(self.sink_filepath, 'r', encoding='utf-8') as sink_file, open(json_filepath, 'w') as f:
+            separator = '{\n    '
+            for line in sink_file:
+                record = json.loads(line)
+                if skip_empty and record['count'] == 0:
+                    continue
+                value = json.dumps(dict(count=record['count'], results=record['results']), indent=4).replace('\n', '\n    ')
+                f.write(f'{separator}{json.dumps(record["key"])}: {value}')
+                separator = ',\n    '
+            f.write('{}' if separator == '{\n    ' else '\n}')
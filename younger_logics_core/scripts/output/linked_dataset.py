@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- encoding=utf8 -*-
+
+########################################################################
+# Created time: 2026-10-18 19:02:41
+# Author: Jason Young (杨郑鑫).
+# E-Mail: AI.Jason.Young@outlook.com
+# Last Modified by: Jason Young (杨郑鑫)
+# Last Modified time: 2026-10-18 19:02:41
+# Copyright (c) 2024 Yangs.AI
+#
+# This source code is licensed under the Apache License 2.0 found in the
+# LICENSE file in the root directory of this source tree.
+########################################################################
+
+
+import json
+import shutil
+import itertools
+import pathlib
+import tempfile
+
+from typing import Iterable, Iterator
+
+import pandas
+
+from tqdm import tqdm
+
+
+# Columns and dtypes of the frames read from the sources
+RESULT_DTYPES = {
+    'evaluation_id': 'string',
+    'result_id': 'string',
+    'paper_id': 'string',
+    'methodology': 'string',
+    'metrics': 'string',
+    'evaluated_on': 'string',
+}
+PAPER_REPOSITORY_DTYPES = {
+    'paper_id': 'string',
+    'repository': 'string',
+    'repository_url': 'string',
+    'framework': 'string',
+    'is_official': 'boolean',
+    'stars': 'Int64',
+}
+MODULE_DTYPES = {
+    'repository': 'string',
+    'class_name': 'string',
+    'parent_classes': 'string',
+}
+RESULT_REPOSITORY_DTYPES = RESULT_DTYPES | {key: dtype for key, dtype in PAPER_REPOSITORY_DTYPES.items() if key != 'paper_id'}
+LINKED_DTYPES = RESULT_REPOSITORY_DTYPES | {key: dtype for key, dtype in MODULE_DTYPES.items() if key != 'repository'}
+
+OUTPUT_FORMATS = ['csv', 'parquet']
+
+
+def get_sink_filepath(data_dirpath: pathlib.Path, first_keyword: str, second_keyword: str) -> pathlib.Path:
+    """
+    The JSON Lines sink of a crawled pair, or its exported JSON file when there is no sink.
+    """
+    sink_filepath = data_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.jsonl')
+    if sink_filepath.is_file():
+        return sink_filepath
+    return data_dirpath.joinpath(f'{first_keyword}_to_{second_keyword}.json')
+
+
+def iter_sink_records(filepath: pathlib.Path) -> Iterator[tuple[str, list[dict]]]:
+    """
+    (key, results) of every key of a crawled pair.
+
+    A JSON Lines sink is streamed one key at a time, an exported JSON file has to be loaded as a whole.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if filepath.suffix == '.jsonl':
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line left by a crashed crawl.
+                    break
+                yield record['key'], record['results']
+        else:
+            for key, value in json.load(f).items():
+                yield key, value['results']
+
+
+def get_repository_key(url: str | None = None, owner: str | None = None, name: str | None = None) -> str | None:
+    """
+    `owner/name` in lower case, from the owner and name or else from the last two parts of a URL or path.
+    """
+    if not (owner and name) and url:
+        parts = pathlib.PurePosixPath(url.rstrip('/')).parts
+        if len(parts) >= 2:
+            owner, name = parts[-2], parts[-1]
+    if not (owner and name):
+        return None
+    return f'{owner}/{name.removesuffix(".git")}'.lower()
+
+
+def get_id(value) -> str | None:
+    if isinstance(value, dict):
+        value = value.get('id')
+    return None if value is None else str(value)
+
+
+def iter_result_rows(filepath: pathlib.Path) -> Iterator[tuple]:
+    for evaluation_id, results in iter_sink_records(filepath):
+        for result in results:
+            yield (
+                evaluation_id,
+                get_id(result.get('id')),
+                get_id(result.get('paper')),
+                result.get('methodology'),
+                json.dumps(result.get('metrics')),
+                result.get('evaluated_on'),
+            )
+
+
+def iter_paper_repository_rows(filepath: pathlib.Path) -> Iterator[tuple]:
+    for paper_id, repositories in iter_sink_records(filepath):
+        for repository in repositories:
+            yield (
+                paper_id,
+                get_repository_key(repository.get('url'), repository.get('owner'), repository.get('name')),
+                repository.get('url'),
+                repository.get('framework'),
+                repository.get('is_official'),
+                repository.get('stars'),
+            )
+
+
+def iter_nn_modules(class_graph_filepath: pathlib.Path) -> Iterator[tuple[str, list[str]]]:
+    """
+    (class_name, parent_classes) of the nn modules in a json or jsonl output of parse.py.
+
+    The jsonl format is streamed, the json format is loaded as a whole.
+    """
+    with open(class_graph_filepath, 'r', encoding='utf-8') as f:
+        if class_graph_filepath.suffix == '.jsonl':
+            next(f)
+            nn_module_names = set(json.loads(next(f))['class_names'])
+            for line in f:
+                record = json.loads(line)
+                if record['class_name'] in nn_module_names:
+                    yield record['class_name'], record['parent_classes']
+        else:
+            for class_name, class_info in json.load(f)['nn_moudles_subclass'].items():
+                yield class_name, class_info['parent_classes']
+
+
+def iter_module_rows(class_graph_dirpath: pathlib.Path) -> Iterator[tuple]:
+    """
+    Rows of the nn modules of every repository finished by `create class-graphs` in `class_graph_dirpath`.
+
+    The repository of a class graph is the `owner/name` formed by the last two parts of its path.
+    """
+    records = dict()
+    with open(class_graph_dirpath.joinpath('ledger.jsonl'), 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record['repo_path']] = record
+    for repo_path, record in records.items():
+        repository = get_repository_key(repo_path)
+        if record['status'] != 'done' or repository is None:
+            continue
+        for class_name, parent_classes in iter_nn_modules(class_graph_dirpath.joinpath(record['output'])):
+            yield repository, class_name, json.dumps(parent_classes)
+
+
+def make_frame(rows: list[tuple], dtypes: dict[str, str]) -> pandas.DataFrame:
+    return pandas.DataFrame.from_records(rows, columns=list(dtypes)).astype(dtypes)
+
+
+def iter_frames(rows: Iterable[tuple], dtypes: dict[str, str], chunk_size: int) -> Iterator[pandas.DataFrame]:
+    """
+    Typed frames of at most `chunk_size` rows.
+    """
+    chunk = list()
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield make_frame(chunk, dtypes)
+            chunk = list()
+    if chunk:
+        yield make_frame(chunk, dtypes)
+
+
+class PartitionedSpill(object):
+    """
+    Frames hash-partitioned on disk by a key column, so that a join only holds one partition of its inputs in memory (a grace hash join).
+
+    Every written frame adds one pickle to each partition it hits, each pickle has at most as many rows as the written frame.
+    Rows whose key is missing cannot be joined and are dropped.
+    """
+
+    def __init__(self, dirpath: pathlib.Path, dtypes: dict[str, str], key: str, num_partitions: int):
+        self.dirpath = dirpath
+        self.dtypes = dtypes
+        self.key = key
+        self.num_partitions = num_partitions
+        self.chunk_counts = [0] * num_partitions
+        self.rows = 0
+        dirpath.mkdir(parents=True, exist_ok=True)
+
+    def get_chunk_filepath(self, partition: int, index: int) -> pathlib.Path:
+        return self.dirpath.joinpath(f'{partition:05d}-{index:06d}.pkl')
+
+    def write(self, frame: pandas.DataFrame):
+        frame = frame[frame[self.key].notna()]
+        partitions = pandas.util.hash_pandas_object(frame[self.key], index=False).to_numpy() % self.num_partitions
+        for partition, part in frame.groupby(partitions, sort=False):
+            part.to_pickle(self.get_chunk_filepath(partition, self.chunk_counts[partition]))
+            self.chunk_counts[partition] += 1
+        self.rows += len(frame)
+
+    def iter_chunks(self, partition: int) -> Iterator[pandas.DataFrame]:
+        for index in range(self.chunk_counts[partition]):
+            yield pandas.read_pickle(self.get_chunk_filepath(partition, index))
+
+    def read(self, partition: int) -> pandas.DataFrame:
+        chunks = list(self.iter_chunks(partition))
+        if not chunks:
+            return make_frame([], self.dtypes)
+        return pandas.concat(chunks, ignore_index=True)
+
+
+def iter_joined(probe_chunks: Iterable[pandas.DataFrame], build: pandas.DataFrame, key: str, chunk_size: int) -> Iterator[pandas.DataFrame]:
+    """
+    Inner join of every probe chunk with `build` on `key`, cut so that each joined frame has about `chunk_size` rows.
+
+    The number of matches of each probe row is known from the key counts of `build`, so a chunk is split before it is joined rather than after.
+    """
+    key_counts = build[key].value_counts()
+    for probe in probe_chunks:
+        match_counts = probe[key].map(key_counts).fillna(0).astype('int64').to_numpy()
+        probe = probe[match_counts > 0]
+        if probe.empty:
+            continue
+        slices = (match_counts[match_counts > 0].cumsum() - 1) // chunk_size
+        for _, probe_slice in probe.groupby(slices, sort=True):
+            yield probe_slice.merge(build, on=key, how='inner')
+
+
+def write_part(frame: pandas.DataFrame, dirpath: pathlib.Path, index: int, output_format: str) -> pathlib.Path:
+    dirpath.mkdir(parents=True, exist_ok=True)
+    if output_format == 'parquet':
+        part_filepath = dirpath.joinpath(f'part-{index:05d}.parquet')
+        frame.to_parquet(part_filepath, compression='zstd', index=False)
+    else:
+        part_filepath = dirpath.joinpath(f'part-{index:05d}.csv.gz')
+        frame.to_csv(part_filepath, compression='gzip', index=False)
+    return part_filepath
+
+
+def link_dataset(
+    data_dirpath: pathlib.Path,
+    class_graph_dirpath: pathlib.Path,
+    output_dirpath: pathlib.Path,
+    num_partitions: int = 64,
+    chunk_size: int = 100_000,
+    output_format: str = 'csv',
+) -> dict:
+    """
+    Link evaluation → result → repository → nn-module classes of the crawled PapersWithCode data and the class graphs of `create class-graphs`.
+
+    Results come from evaluations_to_results, the repositories of their papers from papers_to_repositories (both in `data_dirpath`) and the nn modules from the class graphs in `class_graph_dirpath`.
+    Every source is read in typed frames of `chunk_size` rows and hash-partitioned to disk by its join key, each join then holds one of the `num_partitions` partitions of its smaller side and a chunk of its larger side.
+    Memory is therefore bounded by the partition size and `chunk_size`, not by the size of the dataset.
+
+    The linked rows are written to `output_dirpath`/linked/bucket=<partition>/part-<index>.csv.gz (or .parquet with zstd, which needs pyarrow), partitioned by the hash of the repository, each part with about `chunk_size` rows.
+    A summary is written to `output_dirpath`/manifest.json and returned.
+    """
+    assert output_format in OUTPUT_FORMATS, f'Unknown output format: {output_format}'
+    if output_format == 'parquet':
+        # Fail before the sources are read.
+        import pyarrow
+
+    results_filepath = get_sink_filepath(data_dirpath, 'evaluations', 'results')
+    paper_repositories_filepath = get_sink_filepath(data_dirpath, 'papers', 'repositories')
+    output_dirpath.mkdir(parents=True, exist_ok=True)
+    linked_dirpath = output_dirpath.joinpath('linked')
+    if linked_dirpath.exists():
+        shutil.rmtree(linked_dirpath)
+
+    summary = dict(format=output_format, partitions=num_partitions, chunk_size=chunk_size, columns=LINKED_DTYPES)
+    with tempfile.TemporaryDirectory(prefix='.spill-', dir=output_dirpath) as spill_dirpath:
+        spill_dirpath = pathlib.Path(spill_dirpath)
+
+        # evaluation → result → repository, joined on the paper
+        results = PartitionedSpill(spill_dirpath.joinpath('results'), RESULT_DTYPES, 'paper_id', num_partitions)
+        for frame in tqdm(iter_frames(iter_result_rows(results_filepath), RESULT_DTYPES, chunk_size), desc='Results'):
+            results.write(frame)
+        paper_repositories = PartitionedSpill(spill_dirpath.joinpath('paper_repositories'), PAPER_REPOSITORY_DTYPES, 'paper_id', num_partitions)
+        for frame in tqdm(iter_frames(iter_paper_repository_rows(paper_repositories_filepath), PAPER_REPOSITORY_DTYPES, chunk_size), desc='Paper Repositories'):
+            paper_repositories.write(frame)
+
+        result_repositories = PartitionedSpill(spill_dirpath.joinpath('result_repositories'), RESULT_REPOSITORY_DTYPES, 'repository', num_partitions)
+        for partition in tqdm(range(num_partitions), desc='Link Repositories'):
+            build = paper_repositories.read(partition).drop_duplicates(['paper_id', 'repository'])
+            for joined in iter_joined(results.iter_chunks(partition), build, 'paper_id', chunk_size):
+                result_repositories.write(joined)
+
+        # repository → nn-module classes, joined on the repository
+        modules = PartitionedSpill(spill_dirpath.joinpath('modules'), MODULE_DTYPES, 'repository', num_partitions)
+        for frame in tqdm(iter_frames(iter_module_rows(class_graph_dirpath), MODULE_DTYPES, chunk_size), desc='Modules'):
+            modules.write(frame)
+
+        linked_rows = 0
+        part_filepaths = list()
+        for partition in tqdm(range(num_partitions), desc='Link Modules'):
+            build = modules.read(partition).drop_duplicates(['repository', 'class_name'])
+            if build.empty:
+                continue
+            # joined frames are buffered until a part of `chunk_size` rows can be written
+            buffer, buffer_rows, part_index = list(), 0, 0
+            joined_frames = iter_joined(result_repositories.iter_chunks(partition), build, 'repository', chunk_size)
+            for joined in itertools.chain(joined_frames, [None]):
+                if joined is not None:
+                    buffer.append(joined[list(LINKED_DTYPES)])
+                    buffer_rows += len(joined)
+                if buffer and (buffer_rows >= chunk_size or joined is None):
+                    part_dirpath = linked_dirpath.joinpath(f'bucket={partition:05d}')
+                    part_filepath = write_part(pandas.concat(buffer, ignore_index=True), part_dirpath, part_index, output_format)
+                    part_filepaths.append(str(part_filepath.relative_to(output_dirpath)))
+                    linked_rows += buffer_rows
+                    part_index += 1
+                    buffer, buffer_rows = list(), 0
+
+        summary['rows'] = dict(
+            results=results.rows,
+            paper_repositories=paper_repositories.rows,
+            result_repositories=result_repositories.rows,
+            modules=modules.rows,
+            linked=linked_rows,
+        )
+        summary['parts'] = part_filepaths
+
+    with open(output_dirpath.joinpath('manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=4)
+    return summary
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- encoding=utf8 -*-
+
+########################################################################
+# Created time: 2026-10-18 20:05:33
+# Author: Jason Young (杨郑鑫).
+# E-Mail: AI.Jason.Young@outlook.com
+# Last Modified by: Jason Young (杨郑鑫)
+# Last Modified time: 2026-10-18 21:52:08
+# Copyright (c) 2024 Yangs.AI
+#
+# This source code is licensed under the Apache License 2.0 found in the
+# LICENSE file in the root directory of this source tree.
+########################################################################
+
+
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+import click
+
+
+# Modules that `--help` must never import, they belong inside the command functions
+HEAVY_MODULES = ['scrapy', 'twisted', 'paperswithcode', 'tea_client', 'pandas', 'numpy', 'psutil', 'tqdm', 'networkx', 'torch']
+
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def get_help_commands() -> list[list[str]]:
+    """
+    Arguments of `--help` of the main group and of every group and command below it.
+    """
+    from younger_logics_core.commands.main import main
+
+    help_commands = list()
+
+    def visit(command: click.Command, arguments: list[str]):
+        help_commands.append(arguments + ['--help'])
+        if isinstance(command, click.Group):
+            context = click.Context(command)
+            for name in command.list_commands(context):
+                visit(command.get_command(context, name), arguments + [name])
+
+    visit(main, [])
+    return help_commands
+
+
+def measure_startup(arguments: list[str]) -> dict:
+    """
+    Run `younger-logics-core <arguments>` under `python -X importtime`.
+
+    The import time is the sum of the self times of all imports, since modules loaded by importlib.import_module (LazyGroup) are not nested under their importer.
+    Times are in milliseconds.
+    """
+    start_time = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'younger_logics_core.commands.main', *arguments],
+        capture_output=True,
+        text=True,
+    )
+    wall_time = (time.perf_counter() - start_time) * 1000
+
+    import_time = 0
+    top_level_modules = set()
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match is not None:
+            import_time += int(match.group(1))
+            top_level_modules.add(match.group(4).split('.')[0])
+    return dict(
+        arguments=arguments,
+        returncode=process.returncode,
+        wall_time=wall_time,
+        import_time=import_time / 1000,
+        heavy_modules=sorted(top_level_modules.intersection(HEAVY_MODULES)),
+    )
+
+
+def check_startup(budget: float = 250.0, repeat: int = 5) -> list[dict]:
+    """
+    Check that every `--help` imports none of HEAVY_MODULES and spends at most `budget` milliseconds importing.
+
+    Each command runs `repeat` times and the median import and wall times are checked, so one slow or one lucky run does not decide the result.
+    A command fails when any of its runs exits with an error or imports a heavy module.
+    Returns the measurement of every command, each with the list of its `problems`.
+    """
+    measurements = list()
+    for arguments in get_help_commands():
+        runs = [measure_startup(arguments) for _ in range(repeat)]
+        measurement = dict(
+            arguments=arguments,
+            returncode=next((run['returncode'] for run in runs if run['returncode'] != 0), 0),
+            wall_time=statistics.median(run['wall_time'] for run in runs),
+            import_time=statistics.median(run['import_time'] for run in runs),
+            heavy_modules=sorted(set().union(*(run['heavy_modules'] for run in runs))),
+        )
+        problems = list()
+        if measurement['returncode'] != 0:
+            problems.append(f'exited with {measurement["returncode"]}')
+        if measurement['heavy_modules']:
+            problems.append(f'imports {", ".join(measurement["heavy_modules"])}')
+        if measurement['import_time'] > budget:
+            problems.append(f'import time {measurement["import_time"]:.1f}ms exceeds {budget:.1f}ms')
+        measurement['problems'] = problems
+        measurements.append(measurement)
+    return measurements
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Check the startup time of `younger-logics-core --help` and of the --help of every subcommand.')
+    arg_parser.add_argument('--budget', type=float, default=250.0, help='Import time budget of one command in milliseconds, compared with the median of its runs.')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Runs of each command, their median is checked.')
+    args = arg_parser.parse_args()
+
+    measurements = check_startup(budget=args.budget, repeat=args.repeat)
+    for measurement in measurements:
+        status = 'FAIL' if measurement['problems'] else 'ok'
+        print(f'{status:4} {measurement["import_time"]:7.1f}ms import {measurement["wall_time"]:7.1f}ms wall  {" ".join(measurement["arguments"])}  {"; ".join(measurement["problems"])}')
+    if any(measurement['problems'] for measurement in measurements):
+        sys.exit(1)
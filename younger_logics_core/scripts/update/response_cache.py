@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- encoding=utf8 -*-
+
+########################################################################
+# Created time: 2026-10-18 16:40:15
+# Author: Jason Young (杨郑鑫).
+# E-Mail: AI.Jason.Young@outlook.com
+# Last Modified by: Jason Young (杨郑鑫)
+# Last Modified time: 2026-10-18 16:40:15
+# Copyright (c) 2024 Yangs.AI
+#
+# This source code is licensed under the Apache License 2.0 found in the
+# LICENSE file in the root directory of this source tree.
+########################################################################
+
+
+import time
+import pickle
+import pathlib
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from scrapy.extensions.httpcache import RFC2616Policy
+
+
+# Modes of get_http_cache_settings
+HTTP_CACHE_MODES = ['refresh', 'offline']
+
+
+class TTLCachePolicy(RFC2616Policy):
+    """
+    RFC 2616 policy in which a cached response younger than `HTTPCACHE_TTL` seconds is always fresh and is served without touching the network.
+
+    Older responses are revalidated with If-None-Match / If-Modified-Since when the API sent an ETag / Last-Modified, so unchanged pages cost a 304 instead of a full body.
+    """
+
+    def __init__(self, settings):
+        super(TTLCachePolicy, self).__init__(settings)
+        self.ttl = settings.getint('HTTPCACHE_TTL', 0)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        if self.ttl > 0 and self._compute_current_age(cachedresponse, request, time.time()) < self.ttl:
+            return True
+        return super(TTLCachePolicy, self).is_cached_response_fresh(cachedresponse, request)
+
+
+def get_http_cache_settings(cache_dirpath: pathlib.Path, mode: str = 'refresh', ttl: int = 0) -> dict:
+    """
+    Scrapy settings of a persistent response cache in `cache_dirpath`.
+
+    Bodies, headers (ETag, Last-Modified, Date) and timestamps are stored per request URL by Scrapy's FilesystemCacheStorage.
+    `refresh` serves responses younger than `ttl` seconds from the cache and revalidates the others.
+    `offline` replays the cache only, requests that were never recorded are dropped.
+    """
+    assert mode in HTTP_CACHE_MODES, f'Unknown HTTP cache mode: {mode}'
+    settings = {
+        'HTTPCACHE_ENABLED': True,
+        # Scrapy resolves relative paths against the project data directory.
+        'HTTPCACHE_DIR': str(cache_dirpath.absolute()),
+        'HTTPCACHE_STORAGE': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+        'HTTPCACHE_EXPIRATION_SECS': 0,
+        # The API does not always send cache headers, keep every response and decide freshness by the TTL.
+        'HTTPCACHE_ALWAYS_STORE': True,
+        'HTTPCACHE_IGNORE_HTTP_CODES': [429, 500, 502, 503, 504],
+    }
+    if mode == 'refresh':
+        settings['HTTPCACHE_POLICY'] = f'{__name__}.TTLCachePolicy'
+        settings['HTTPCACHE_TTL'] = ttl
+    else:
+        settings['HTTPCACHE_POLICY'] = 'scrapy.extensions.httpcache.DummyPolicy'
+        settings['HTTPCACHE_IGNORE_MISSING'] = True
+    return settings
+
+
+def read_cached_responses(cache_dirpath: pathlib.Path) -> dict[str, pathlib.Path]:
+    """
+    Index the entries of a FilesystemCacheStorage directory by the path and query of their URL.
+    """
+    cached_responses = dict()
+    for pickled_meta_filepath in cache_dirpath.glob('*/*/*/pickled_meta'):
+        with open(pickled_meta_filepath, 'rb') as f:
+            metadata = pickle.load(f)
+        url = urlsplit(metadata['url'])
+        cached_responses[f'{url.path}?{url.query}' if url.query else url.path] = pickled_meta_filepath.parent
+    return cached_responses
+
+
+class CachedResponseHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        entry_dirpath = self.server.cached_responses.get(self.path)
+        if entry_dirpath is None:
+            self.send_error(404, f'Not recorded: {self.path}')
+            return
+        with open(entry_dirpath.joinpath('pickled_meta'), 'rb') as f:
+            metadata = pickle.load(f)
+        body = entry_dirpath.joinpath('response_body').read_bytes()
+        self.send_response(metadata['status'])
+        for header in entry_dirpath.joinpath('response_headers').read_bytes().decode('latin-1').split('\r\n'):
+            name, separator, value = header.partition(':')
+            if separator and name.lower() not in {'content-length', 'content-encoding', 'transfer-encoding', 'connection'}:
+                self.send_header(name, value.strip())
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_cached_responses(cache_dirpath: pathlib.Path, host: str = '127.0.0.1', port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Local stand-in for the API that replays the responses recorded in `cache_dirpath`, for tests and offline runs.
+
+    Point the crawler at it with `api_root=f'http://{host}:{port}/api/v1'` and call `serve_forever()` (or run it in a thread).
+    """
+    server = ThreadingHTTPServer((host, port), CachedResponseHandler)
+    server.daemon_threads = True
+    server.cached_responses = read_cached_responses(cache_dirpath)
+    return server